@@ -57,13 +57,16 @@ function WritingPage() {
 
     try {
       const parentEssayId = isRevising && submittedEssay ? submittedEssay.id : null
-      const response = await writingAPI.submitEssay(
+      const submitted = await writingAPI.submitEssay(
         selectedPrompt.id,
         content,
         parentEssayId
       )
 
-      setSubmittedEssay(response.data)
+      // Scoring runs in the background; wait for the job to finish
+      const response = await writingAPI.waitForScoring(submitted.data.job_id)
+
+      setSubmittedEssay(response.data.essay)
 
       // Check for newly earned badges
       if (response.data.newly_earned_badges && response.data.newly_earned_badges.length > 0) {
@@ -73,7 +76,7 @@ function WritingPage() {
       setView('feedback')
       loadRecentEssays()
     } catch (err) {
-      setError(err.response?.data?.detail || 'Failed to submit essay')
+      setError(err.response?.data?.detail || err.message || 'Failed to submit essay')
       console.error(err)
     } finally {
       setSubmitting(false)
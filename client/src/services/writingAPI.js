@@ -1,5 +1,8 @@
 import api from './api'
 
+// Covers the longest queue wait the server accepts plus scoring time
+const SCORING_TIMEOUT_MS = 15 * 60 * 1000
+
 export const writingAPI = {
   getPrompts: (difficulty) => {
     const params = difficulty ? { difficulty } : {}
@@ -15,11 +18,32 @@ export const writingAPI = {
       parent_essay_id: parentEssayId,
     }),
 
+  // Long-polls until the scoring job finishes or `wait` seconds pass
+  getScoringJob: (jobId, wait = 20) =>
+    api.get(`/writing/jobs/${jobId}`, { params: { wait } }),
+
+  // Gives up after `timeoutMs`; the essay stays saved and is scored later
+  waitForScoring: async (jobId, timeoutMs = SCORING_TIMEOUT_MS) => {
+    const deadline = Date.now() + timeoutMs
+    while (Date.now() < deadline) {
+      const response = await writingAPI.getScoringJob(jobId)
+      if (response.data.status === 'completed') return response
+      if (response.data.status === 'failed') {
+        throw new Error(response.data.error || 'Essay scoring failed')
+      }
+    }
+    throw new Error(
+      'Scoring is taking longer than expected. Your essay is saved; check your recent essays later.'
+    )
+  },
+
   getEssays: (limit = 10) => api.get('/writing/essays', { params: { limit } }),
 
   getEssay: (essayId) => api.get(`/writing/essays/${essayId}`),
 
   getRevisions: (essayId) => api.get(`/writing/essays/${essayId}/revisions`),
 
+  getRevisionTree: (essayId) => api.get(`/writing/essays/${essayId}/tree`),
+
   getStats: () => api.get('/writing/stats'),
 }
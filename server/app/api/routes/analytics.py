@@ -0,0 +1,82 @@
+"""
+Admin analytics routes
+"""
+
+from fastapi import APIRouter, Depends, Query, BackgroundTasks
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.config.database import get_db, SessionLocal
+from app.models.user import User
+from app.api.schemas.analytics import TimingQuantiles, RebuildJobResponse
+from app.services.auth import get_current_admin_user
+from app.services.analytics_service import AnalyticsService, SCOPE_QUESTION
+from app.services.percentile_service import PercentileService
+from app.services.sketch_service import SketchService
+
+router = APIRouter(prefix="/admin/analytics", tags=["Admin Analytics"])
+
+
+def _rebuild_reading_timing_job():
+    """Run the timing sketch rebuild with its own session"""
+    db = SessionLocal()
+    try:
+        result = AnalyticsService.rebuild_reading_timing(db)
+        print(f"Rebuilt reading timing sketches: {result}")
+    except Exception as e:
+        print(f"Error rebuilding reading timing sketches: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def _rebuild_percentiles_job():
+    """Run the score percentile sketch rebuild with its own session"""
+    db = SessionLocal()
+    try:
+        result = PercentileService.rebuild(db)
+        print(f"Rebuilt score percentile sketches: {result}")
+    except Exception as e:
+        print(f"Error rebuilding score percentile sketches: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+@router.get("/reading/timing", response_model=List[TimingQuantiles])
+async def get_reading_timing(
+    scope: str = Query(SCOPE_QUESTION, regex="^(question|skill)$"),
+    key: Optional[str] = Query(None, description="Question id or skill name; omit for all"),
+    admin_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Get solve-time quantiles per question or per skill"""
+    # Include this worker's buffered observations
+    SketchService.flush(db)
+    return [TimingQuantiles(**row) for row in AnalyticsService.get_reading_timing(db, scope, key)]
+
+
+@router.post("/reading/timing/rebuild", response_model=RebuildJobResponse)
+async def rebuild_reading_timing(
+    background_tasks: BackgroundTasks,
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """Rebuild timing sketches from the full attempts history"""
+    background_tasks.add_task(_rebuild_reading_timing_job)
+    return RebuildJobResponse(
+        status="accepted",
+        message="Reading timing sketch rebuild started"
+    )
+
+
+@router.post("/percentiles/rebuild", response_model=RebuildJobResponse)
+async def rebuild_percentiles(
+    background_tasks: BackgroundTasks,
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """Rebuild essay score and reading accuracy sketches from the full history"""
+    background_tasks.add_task(_rebuild_percentiles_job)
+    return RebuildJobResponse(
+        status="accepted",
+        message="Score percentile sketch rebuild started"
+    )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, BackgroundTasks
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
@@ -7,26 +7,43 @@ from app.models.user import User
 from app.models.reading import ReadingItem, ReadingQuestion
 from app.api.schemas.reading import (
     ReadingItemResponse,
+    NextReadingItemResponse,
     ReadingItemSummary,
+    ReadingSearchResult,
     ReadingQuestionResponse,
     AnswerSubmission,
     AnswerFeedback,
-    ReadingStats
+    ReadingStats,
+    ReviewQueueItem,
+    VocabularyDrillWord,
+    MockTestRequest,
+    MockTestFormResponse,
+    SyncRequest,
+    SyncResponse
 )
 from app.services.auth import get_current_active_user
 from app.services.reading_service import ReadingService
+from app.services.reading_search_service import ReadingSearchService
+from app.services.review_service import ReviewService
+from app.services.vocabulary_service import VocabularyService
+from app.services.mock_test_service import MockTestService
+from app.services.prefetch_service import PrefetchService
 
 router = APIRouter(prefix="/reading", tags=["Reading Practice"])
 
 
-@router.get("/next", response_model=ReadingItemResponse)
+@router.get("/next", response_model=NextReadingItemResponse)
 async def get_next_reading_item(
+    response: Response,
+    background_tasks: BackgroundTasks,
     difficulty: Optional[str] = Query(None, regex="^(easy|medium|hard)$"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get next reading item with adaptive difficulty"""
-    reading_item = ReadingService.get_next_reading_item(db, current_user.id, difficulty)
+    reading_item, used_difficulty, prefetch_item_id = PrefetchService.get_next_item(
+        db, current_user.id, difficulty
+    )
 
     if not reading_item:
         raise HTTPException(
@@ -34,39 +51,57 @@ async def get_next_reading_item(
             detail="No reading items available"
         )
 
+    # Precompute the following recommendations after the response is sent
+    background_tasks.add_task(
+        PrefetchService.refill, current_user.id, used_difficulty, reading_item.id
+    )
+    if prefetch_item_id:
+        response.headers["Link"] = f"</api/reading/items/{prefetch_item_id}>; rel=prefetch"
+
     # Don't include correct answers in the response
-    response = ReadingItemResponse.from_orm(reading_item)
-    for question in response.questions:
+    response_data = NextReadingItemResponse.from_orm(reading_item)
+    response_data.prefetch_item_id = prefetch_item_id
+    for question in response_data.questions:
         question.correct_answer = None
         question.explanation = None
 
-    return response
+    return response_data
 
 
 @router.get("/items", response_model=List[ReadingItemSummary])
 async def get_reading_items(
     difficulty: Optional[str] = Query(None, regex="^(easy|medium|hard)$"),
+    min_difficulty_score: Optional[float] = Query(None),
+    max_difficulty_score: Optional[float] = Query(None),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get list of all reading items"""
-    query = db.query(ReadingItem)
-
-    if difficulty:
-        query = query.filter(ReadingItem.difficulty == difficulty)
+    summaries = ReadingService.get_item_summaries(
+        db, difficulty, min_difficulty_score, max_difficulty_score
+    )
+    return [ReadingItemSummary(**summary) for summary in summaries]
 
-    items = query.all()
 
-    return [
-        ReadingItemSummary(
-            id=item.id,
-            title=item.title,
-            difficulty=item.difficulty,
-            question_count=len(item.questions),
-            skill_tags=item.skill_tags or []
+@router.get("/search", response_model=List[ReadingSearchResult])
+async def search_reading_items(
+    q: Optional[str] = Query(None, min_length=1, max_length=200),
+    tags: Optional[List[str]] = Query(None),
+    difficulty: Optional[str] = Query(None, regex="^(easy|medium|hard)$"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Search reading items by title/passage text and skill tags"""
+    if not q and not tags:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide a search query or at least one skill tag"
         )
-        for item in items
-    ]
+
+    results = ReadingSearchService.search(db, q, tags, difficulty, limit, offset)
+    return [ReadingSearchResult(**result) for result in results]
 
 
 @router.get("/items/{item_id}", response_model=ReadingItemResponse)
@@ -76,7 +111,7 @@ async def get_reading_item(
     db: Session = Depends(get_db)
 ):
     """Get specific reading item by ID"""
-    reading_item = db.query(ReadingItem).filter(ReadingItem.id == item_id).first()
+    reading_item = ReadingService.get_item_with_questions(db, item_id)
 
     if not reading_item:
         raise HTTPException(
@@ -116,6 +151,9 @@ async def submit_answer(
 
     is_correct, question, newly_earned_badges = result
 
+    # Prefetched items are stale once answers move the recommended difficulty
+    PrefetchService.on_answer(db, current_user.id)
+
     # Format badges for response
     badges_data = [
         {
@@ -129,7 +167,7 @@ async def submit_answer(
     ]
 
     return AnswerFeedback(
-        question_id=question.id,
+        question_id=question.question_id,
         is_correct=is_correct,
         correct_answer=question.correct_answer,
         explanation=question.explanation or "No explanation available",
@@ -138,6 +176,37 @@ async def submit_answer(
     )
 
 
+@router.post("/sync", response_model=SyncResponse)
+async def sync_attempts(
+    sync_request: SyncRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Sync a batch of offline attempts; safe to retry with the same idempotency keys"""
+    result = ReadingService.sync_attempts(
+        db,
+        current_user.id,
+        [attempt.dict() for attempt in sync_request.attempts]
+    )
+
+    if result["accepted"]:
+        PrefetchService.on_answer(db, current_user.id)
+
+    # Format badges for response
+    result["newly_earned_badges"] = [
+        {
+            "id": ub.badge.id,
+            "name": ub.badge.name,
+            "description": ub.badge.description,
+            "badge_type": ub.badge.badge_type,
+            "icon_url": ub.badge.icon_url,
+        }
+        for ub in result["newly_earned_badges"]
+    ]
+
+    return SyncResponse(**result)
+
+
 @router.get("/stats", response_model=ReadingStats)
 async def get_reading_stats(
     current_user: User = Depends(get_current_active_user),
@@ -146,3 +215,74 @@ async def get_reading_stats(
     """Get user's reading practice statistics"""
     stats = ReadingService.get_user_stats(db, current_user.id)
     return ReadingStats(**stats)
+
+
+@router.get("/review", response_model=List[ReviewQueueItem])
+async def get_review_queue(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get missed questions that are due for spaced-repetition review"""
+    due = ReviewService.get_due_reviews(db, current_user.id, limit)
+    return [ReviewQueueItem(**item) for item in due]
+
+
+@router.get("/vocabulary", response_model=List[VocabularyDrillWord])
+async def get_vocabulary_drill(
+    limit: int = Query(20, ge=1, le=100),
+    passages: int = Query(5, ge=1, le=20),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get the most frequent vocabulary in the user's upcoming passages"""
+    item_ids = ReadingService.get_upcoming_item_ids(db, current_user.id, passages)
+    words = VocabularyService.get_drill_words(db, item_ids, limit)
+    return [VocabularyDrillWord(**word) for word in words]
+
+
+@router.post("/mock-tests", response_model=MockTestFormResponse)
+async def assemble_mock_test(
+    request: MockTestRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Assemble a timed mock reading test from passages the user hasn't seen"""
+    try:
+        form = MockTestService.assemble(
+            db,
+            current_user.id,
+            exam_type=request.exam_type,
+            skill_mix=request.skill_mix,
+            difficulty=request.difficulty,
+            target_difficulty_score=request.target_difficulty_score,
+            time_limit_minutes=request.time_limit_minutes,
+            passages=request.passages,
+            freeze=request.freeze,
+            name=request.name
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+    return MockTestFormResponse(**form)
+
+
+@router.get("/mock-tests/{form_id}", response_model=MockTestFormResponse)
+async def get_mock_test_form(
+    form_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get a frozen mock test form shared by a cohort"""
+    form = MockTestService.get_form(db, form_id)
+
+    if not form:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Mock test form not found"
+        )
+
+    return MockTestFormResponse(**form)
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+import json
+import math
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.config.database import get_db
+from app.config.database import SessionLocal, get_db
 from app.models.user import User
-from app.models.writing import Essay, EssayPrompt
+from app.models.writing import Essay, EssayPrompt, EssayScoringJob
 from app.api.schemas.writing import (
     EssayPromptResponse,
     EssaySubmission,
@@ -12,13 +19,36 @@ from app.api.schemas.writing import (
     EssaySummary,
     WritingStats,
     EssayScores,
-    EssayFeedback
+    EssayFeedback,
+    EssayJobAccepted,
+    EssayJobStatus,
+    EssayRevisionTree,
+    RevisionTreeNode,
+    NearDuplicateMatch
 )
 from app.services.auth import get_current_active_user
-from app.services.writing_service import WritingService
+from app.services.essay_scoring_service import (
+    EssayScoringService,
+    JOB_COMPLETED,
+    JOB_QUEUED,
+    TERMINAL_STATUSES
+)
+from app.services.scoring_scheduler import (
+    ScoringScheduler,
+    ScoringBackpressure,
+    QueueSaturated,
+    PRIORITY_NAMES
+)
+from app.services.writing_service import WritingService, REVISION_SCORE_COLUMNS
 
 router = APIRouter(prefix="/writing", tags=["Writing Coach"])
 
+# How often a long-polling job status request re-reads the job
+JOB_POLL_INTERVAL_SECONDS = 0.5
+
+# How long a feedback stream waits on a job another worker is scoring
+STREAM_FOLLOW_TIMEOUT_SECONDS = 120
+
 
 @router.get("/prompts", response_model=List[EssayPromptResponse])
 async def get_essay_prompts(
@@ -47,43 +77,123 @@ async def get_essay_prompt(
     return prompt
 
 
-@router.post("/submit", response_model=EssayResponse, status_code=status.HTTP_201_CREATED)
+def _near_duplicate_matches(job: EssayScoringJob, user_id: int) -> List[NearDuplicateMatch]:
+    """Similar earlier essays, without revealing other users' essay ids"""
+    return [
+        NearDuplicateMatch(
+            similarity=match["similarity"],
+            same_user=match["user_id"] == user_id,
+            essay_id=match["essay_id"] if match["user_id"] == user_id else None
+        )
+        for match in job.near_duplicates or []
+    ]
+
+
+@router.post("/submit", response_model=EssayJobAccepted, status_code=status.HTTP_202_ACCEPTED)
 async def submit_essay(
     submission: EssaySubmission,
+    request: Request,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Submit an essay and receive AI feedback"""
+    """Submit an essay; AI feedback is produced by a background scoring job"""
     try:
-        essay, newly_earned_badges = WritingService.submit_essay(
+        essay, job = WritingService.submit_essay(
             db,
             current_user.id,
             submission.prompt_id,
             submission.content,
-            submission.parent_essay_id
+            submission.parent_essay_id,
+            stream=submission.stream
         )
 
-        # Get prompt details
-        prompt = essay.prompt
-
-        # Format badges for response
-        badges_data = [
-            {
-                "id": ub.badge.id,
-                "name": ub.badge.name,
-                "description": ub.badge.description,
-                "badge_type": ub.badge.badge_type,
-                "icon_url": ub.badge.icon_url,
-            }
-            for ub in newly_earned_badges
-        ]
-
-        # Build response
-        return EssayResponse(
+        return EssayJobAccepted(
+            job_id=job.id,
+            essay_id=essay.id,
+            status=job.status,
+            status_url=str(request.url_for("get_scoring_job", job_id=job.id)),
+            stream_url=str(request.url_for("stream_scoring_job", job_id=job.id)) if submission.stream else None,
+            near_duplicates=_near_duplicate_matches(job, current_user.id),
+            priority=PRIORITY_NAMES[job.priority],
+            estimated_wait_seconds=ScoringScheduler.estimate_wait(db, job.priority, job.fair_rank, job.id),
+            created_at=job.created_at
+        )
+
+    except ScoringBackpressure as e:
+        retry_after = max(1, math.ceil(e.retry_after))
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE if isinstance(e, QueueSaturated)
+            else status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"{e} (retry in about {retry_after} seconds)",
+            headers={"Retry-After": str(retry_after)}
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to submit essay: {str(e)}"
+        )
+
+
+def _job_status(job_id: int) -> Optional[str]:
+    db = SessionLocal()
+    try:
+        return db.query(EssayScoringJob.status).filter(EssayScoringJob.id == job_id).scalar()
+    finally:
+        db.close()
+
+
+@router.get("/jobs/{job_id}", response_model=EssayJobStatus)
+async def get_scoring_job(
+    job_id: int,
+    wait: int = Query(0, ge=0, le=30, description="Seconds to hold the request open until the job finishes"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get the status of an essay scoring job, optionally long-polling for completion"""
+    job = EssayScoringService.get_job(db, job_id, current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Scoring job not found"
+        )
+
+    if wait and job.status not in TERMINAL_STATUSES:
+        # Return the request's connection to the pool while waiting, and poll
+        # off the event loop with a short-lived session per check
+        job_status = job.status
+        db.rollback()
+        deadline = time.monotonic() + wait
+        while job_status not in TERMINAL_STATUSES and time.monotonic() < deadline:
+            await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS)
+            job_status = await run_in_threadpool(_job_status, job_id)
+        db.refresh(job)
+
+    essay = job.essay
+    result = job.result or {}
+
+    return EssayJobStatus(
+        job_id=job.id,
+        essay_id=job.essay_id,
+        status=job.status,
+        attempts=job.attempts,
+        error=job.last_error if job.status in TERMINAL_STATUSES else None,
+        created_at=job.created_at,
+        completed_at=job.completed_at,
+        provisional_scores=EssayScores(**job.provisional_scores)
+        if job.provisional_scores and job.status != JOB_COMPLETED else None,
+        near_duplicates=_near_duplicate_matches(job, current_user.id),
+        estimated_wait_seconds=ScoringScheduler.estimate_wait(db, job.priority, job.fair_rank, job.id)
+        if job.status == JOB_QUEUED else None,
+        essay=EssayResponse(
             id=essay.id,
             prompt_id=essay.prompt_id,
-            prompt_title=prompt.title if prompt else None,
-            prompt_text=prompt.prompt_text if prompt else None,
+            prompt_title=essay.prompt.title if essay.prompt else None,
+            prompt_text=essay.prompt.prompt_text if essay.prompt else None,
             content=essay.content,
             word_count=essay.word_count,
             scores=EssayScores(
@@ -97,21 +207,70 @@ async def submit_essay(
             submission_number=essay.submission_number,
             parent_essay_id=essay.parent_essay_id,
             created_at=essay.created_at,
-            has_revisions=False,
-            newly_earned_badges=badges_data
-        )
+            has_revisions=False
+        ) if job.status == JOB_COMPLETED and essay else None,
+        newly_earned_badges=result.get("newly_earned_badges", [])
+    )
 
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
-    except Exception as e:
+
+@router.get("/jobs/{job_id}/stream")
+async def stream_scoring_job(
+    job_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream essay feedback as Server-Sent Events
+    Events: provisional (local estimate), scores, one per feedback field
+    (strengths, weaknesses, ...),
+    then complete (with newly earned badges) or error. If a worker already
+    claimed the job, status events are sent until it finishes.
+    """
+    if not EssayScoringService.get_job(db, job_id, current_user.id):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to submit essay: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Scoring job not found"
         )
 
+    return StreamingResponse(
+        _feedback_events(job_id, current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _feedback_events(job_id: int, user_id: int):
+    """SSE frames for a job; runs in the threadpool with its own session"""
+    db = SessionLocal()
+    claimed = None
+    try:
+        job = EssayScoringService.claim_job(db, job_id, user_id)
+        if job is not None:
+            claimed = job.started_at
+            events = EssayScoringService.stream_job(db, job)
+        else:
+            job = EssayScoringService.get_job(db, job_id, user_id)
+            events = EssayScoringService.follow_job(
+                db, job, STREAM_FOLLOW_TIMEOUT_SECONDS, JOB_POLL_INTERVAL_SECONDS
+            )
+
+        if job.provisional_scores and job.status != JOB_COMPLETED:
+            yield f"event: provisional\ndata: {json.dumps(job.provisional_scores)}\n\n"
+
+        for event, data in events:
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    finally:
+        if claimed is not None:
+            # The client left before stream_job settled the job (or even started)
+            try:
+                EssayScoringService.release_job(db, job_id, claimed)
+            except Exception as e:
+                print(f"Error releasing essay scoring job {job_id}: {e}")
+        db.close()
+
 
 @router.get("/essays", response_model=List[EssaySummary])
 async def get_user_essays(
@@ -183,7 +342,7 @@ async def get_essay_revisions(
     db: Session = Depends(get_db)
 ):
     """Get all revisions of an essay"""
-    revisions = WritingService.get_essay_revisions(db, essay_id, current_user.id)
+    revisions = WritingService.get_essay_revisions(db, essay_id, current_user.id, with_body=True)
 
     return [
         EssayResponse(
@@ -210,6 +369,54 @@ async def get_essay_revisions(
     ]
 
 
+@router.get("/essays/{essay_id}/tree", response_model=EssayRevisionTree)
+async def get_revision_tree(
+    essay_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get the whole revision chain an essay belongs to, with score changes between revisions"""
+    rows = WritingService.get_revision_tree(db, essay_id, current_user.id)
+
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Essay not found"
+        )
+
+    nodes = [
+        RevisionTreeNode(
+            id=row["id"],
+            parent_essay_id=row["parent_essay_id"],
+            submission_number=row["submission_number"],
+            depth=row["depth"],
+            word_count=row["word_count"],
+            created_at=row["created_at"],
+            scores=EssayScores(
+                **{column: float(row[column]) for column in REVISION_SCORE_COLUMNS}
+            ) if row["overall_score"] else None,
+            score_deltas={
+                column: float(row[f"{column}_delta"]) for column in REVISION_SCORE_COLUMNS
+            } if row["overall_score_delta"] is not None else None
+        )
+        for row in rows
+    ]
+
+    scored = [node for node in nodes if node.scores]
+    latest = max(scored, key=lambda node: (node.created_at, node.id)) if scored else None
+    overall_improvement = (
+        round(latest.scores.overall_score - nodes[0].scores.overall_score, 1)
+        if latest and nodes[0].scores else None
+    )
+
+    return EssayRevisionTree(
+        root_essay_id=nodes[0].id,
+        essay_count=len(nodes),
+        overall_improvement=overall_improvement,
+        essays=nodes
+    )
+
+
 @router.get("/stats", response_model=WritingStats)
 async def get_writing_stats(
     current_user: User = Depends(get_current_active_user),
@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from typing import Optional, Dict
+
+
+class TimingQuantiles(BaseModel):
+    scope: str  # question, skill
+    key: str
+    count: int
+    mean_seconds: Optional[float] = None
+    p50_seconds: Optional[float] = None
+    p90_seconds: Optional[float] = None
+    p99_seconds: Optional[float] = None
+    min_seconds: Optional[float] = None
+    max_seconds: Optional[float] = None
+
+
+class ScorePercentile(BaseModel):
+    scope: str  # prompt, essay_type or skill
+    key: str  # prompt id, essay type or skill name
+    value: float  # the learner's best score or accuracy
+    percentile: float  # share of scores below it, 0-100
+    sample_size: int
+
+
+class RebuildJobResponse(BaseModel):
+    status: str
+    message: str
+    details: Dict[str, int] = {}
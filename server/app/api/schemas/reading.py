@@ -1,7 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 
+from app.api.schemas.analytics import ScorePercentile
+
 
 class QuestionOption(BaseModel):
     A: str
@@ -41,17 +43,26 @@ class ReadingItemResponse(ReadingItemBase):
         from_attributes = True
 
 
+class NextReadingItemResponse(ReadingItemResponse):
+    prefetch_item_id: Optional[int] = None  # item the client can load ahead of time
+
+
 class ReadingItemSummary(BaseModel):
     id: int
     title: str
     difficulty: str
     question_count: int
     skill_tags: List[str]
+    difficulty_score: Optional[float] = None
 
     class Config:
         from_attributes = True
 
 
+class ReadingSearchResult(ReadingItemSummary):
+    rank: float = 0.0
+
+
 class AnswerSubmission(BaseModel):
     question_id: int
     user_answer: str
@@ -67,10 +78,90 @@ class AnswerFeedback(BaseModel):
     newly_earned_badges: List[Dict[str, Any]] = []
 
 
+class ReviewQueueItem(BaseModel):
+    question_id: int
+    reading_item_id: int
+    reading_item_title: str
+    question: str
+    options: Dict[str, str]
+    skill_category: Optional[str] = None
+    due_at: datetime
+    repetitions: int
+    lapses: int
+
+
+class VocabularyDrillWord(BaseModel):
+    word: str
+    occurrences: int  # across the learner's upcoming passages
+    passage_count: int
+    catalog_passage_count: int
+    example_sentence: Optional[str] = None
+
+
+class MockTestRequest(BaseModel):
+    exam_type: str = Field("ielts", pattern="^(ielts|toefl)$")
+    skill_mix: Dict[str, int] = {}  # skill_category -> number of questions
+    difficulty: Optional[str] = Field(None, pattern="^(easy|medium|hard)$")
+    target_difficulty_score: Optional[float] = None
+    time_limit_minutes: Optional[int] = Field(None, ge=5, le=180)
+    passages: Optional[int] = Field(None, ge=1, le=5)
+    freeze: bool = False  # save as a shared form for a cohort
+    name: Optional[str] = None
+
+
+class MockTestPassage(ReadingItemBase):
+    id: int
+    questions: List[ReadingQuestionResponse]
+    created_at: datetime
+
+
+class MockTestFormResponse(BaseModel):
+    form_id: Optional[int] = None
+    name: str
+    exam_type: str
+    time_limit_minutes: int
+    estimated_minutes: Optional[float] = None
+    question_count: int
+    skill_counts: Dict[str, int]
+    skill_shortfall: Dict[str, int] = {}
+    passages: List[MockTestPassage]
+
+
 class ReadingStats(BaseModel):
     total_attempts: int
     correct_answers: int
     accuracy: float
     skill_breakdown: Dict[str, Dict[str, Any]]  # skill -> {correct, total, accuracy}
+    percentiles: List[ScorePercentile] = []  # accuracy rank per skill
     recent_difficulty: str
     recommended_difficulty: str
+
+
+class SyncAttempt(BaseModel):
+    idempotency_key: str = Field(..., min_length=1, max_length=64)
+    question_id: int
+    user_answer: str
+    time_spent_seconds: Optional[int] = None
+    client_timestamp: Optional[datetime] = None
+
+
+class SyncRequest(BaseModel):
+    attempts: List[SyncAttempt] = Field(..., max_length=500)
+
+
+class SyncAttemptResult(BaseModel):
+    idempotency_key: str
+    status: str  # accepted, duplicate
+    question_id: Optional[int] = None
+    is_correct: Optional[bool] = None
+    correct_answer: Optional[str] = None
+    explanation: Optional[str] = None
+
+
+class SyncResponse(BaseModel):
+    accepted: int
+    duplicates: int
+    rejected: List[Dict[str, Any]] = []
+    results: List[SyncAttemptResult]
+    stats: ReadingStats
+    newly_earned_badges: List[Dict[str, Any]] = []
@@ -3,6 +3,8 @@ from typing import List, Dict, Optional, Any
 from datetime import datetime
 from decimal import Decimal
 
+from app.api.schemas.analytics import ScorePercentile
+
 
 class EssayPromptBase(BaseModel):
     title: str
@@ -26,6 +28,7 @@ class EssaySubmission(BaseModel):
     prompt_id: int
     content: str
     parent_essay_id: Optional[int] = None  # For revisions
+    stream: bool = False  # Hold the job for GET /writing/jobs/{id}/stream
 
 
 class EssayFeedback(BaseModel):
@@ -66,6 +69,24 @@ class EssayResponse(BaseModel):
         from_attributes = True
 
 
+class RevisionTreeNode(BaseModel):
+    id: int
+    parent_essay_id: Optional[int]
+    submission_number: int
+    depth: int  # 0 for the original essay
+    word_count: Optional[int]
+    created_at: datetime
+    scores: Optional[EssayScores]
+    score_deltas: Optional[Dict[str, float]] = None  # change from the parent essay
+
+
+class EssayRevisionTree(BaseModel):
+    root_essay_id: int
+    essay_count: int
+    overall_improvement: Optional[float] = None  # latest scored essay minus the original
+    essays: List[RevisionTreeNode]  # root first, ordered by depth
+
+
 class EssaySummary(BaseModel):
     id: int
     prompt_title: Optional[str]
@@ -86,3 +107,37 @@ class WritingStats(BaseModel):
     average_word_count: int
     score_trends: List[Dict[str, Any]]  # Historical scores
     skill_averages: Dict[str, float]  # Average by rubric criterion
+    percentiles: List[ScorePercentile] = []
+
+
+class NearDuplicateMatch(BaseModel):
+    similarity: float  # estimated share of shared five-word phrases
+    same_user: bool
+    essay_id: Optional[int] = None  # only given for the submitter's own essays
+
+
+class EssayJobAccepted(BaseModel):
+    job_id: int
+    essay_id: int
+    status: str
+    status_url: str
+    stream_url: Optional[str] = None
+    near_duplicates: List[NearDuplicateMatch] = []
+    priority: str  # boss, quest, practice, low
+    estimated_wait_seconds: float
+    created_at: datetime
+
+
+class EssayJobStatus(BaseModel):
+    job_id: int
+    essay_id: int
+    status: str  # queued, running, completed, failed
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    provisional_scores: Optional[EssayScores] = None  # local estimate until scored
+    near_duplicates: List[NearDuplicateMatch] = []
+    estimated_wait_seconds: Optional[float] = None  # while queued
+    essay: Optional[EssayResponse] = None  # present once scored
+    newly_earned_badges: List[Dict[str, Any]] = []
@@ -13,11 +13,49 @@ class Settings(BaseSettings):
 
     # Gemini AI
     gemini_api_key: Optional[str] = None
+    gemini_model: str = "gemini-pro"
+    gemini_api_endpoint: Optional[str] = None  # e.g. http://localhost:8090 for a stub server
+    gemini_max_concurrency: int = 4
+    gemini_requests_per_minute: float = 60
+    gemini_timeout_seconds: float = 30
+    gemini_max_retries: int = 3
+    gemini_breaker_failure_threshold: int = 5
+    gemini_breaker_reset_seconds: float = 60
+    gemini_structured_output: bool = True  # JSON mode with a response schema, on models that support it
 
     # Server
     debug: bool = True
     port: int = 8001
 
+    # Admin access (comma-separated emails)
+    admin_emails: str = ""
+
+    # Analytics sketches
+    sketch_flush_batch_size: int = 200
+    sketch_flush_interval_seconds: int = 30
+
+    # Essay scoring workers (0 disables the in-process pool)
+    essay_scoring_workers: int = 2
+    essay_scoring_poll_interval_seconds: float = 2.0
+
+    # Essay scoring scheduler: pending jobs allowed per user, and the
+    # estimated wait above which practice essays are turned away
+    essay_scoring_user_queue_limit: int = 5
+    essay_scoring_max_wait_seconds: int = 600
+
+    # Essay score cache: "database" (shared across workers), "memory" or "none"
+    essay_score_cache_backend: str = "database"
+    essay_score_cache_ttl_seconds: int = 30 * 24 * 3600
+    essay_score_cache_max_entries: int = 200000
+
+    # Essay bodies and feedback: "database" (essay_blobs, shared by all
+    # replicas), "filesystem" (single instance; blob_store_path must be an
+    # absolute path on a persistent volume) or "memory" (tests only);
+    # blobs are zstd-compressed and deduplicated
+    blob_store_backend: str = "database"
+    blob_store_path: str = ""
+    blob_store_compression_level: int = 9
+
     # Web3 Configuration
     web3_rpc_url: str = "https://rpc-amoy.polygon.technology/"
     web3_chain_id: int = 80002
@@ -1,7 +1,27 @@
 # Models package
 from app.models.user import User
-from app.models.reading import ReadingItem, ReadingQuestion, UserReadingAttempt
-from app.models.writing import EssayPrompt, Essay
+from app.models.reading import (
+    ReadingItem,
+    ReadingQuestion,
+    UserReadingAttempt,
+    ReadingReviewSchedule,
+    ReadingQuestionStats,
+    PassageVocabulary,
+    VocabularyTerm,
+    MockTestForm
+)
+from app.models.writing import (
+    EssayPrompt,
+    Essay,
+    EssayScoringJob,
+    EssayScoreCache,
+    EssayScorerModel,
+    UserWritingStats,
+    EssayMinHash,
+    EssayLshBucket,
+    EssayBlob
+)
+from app.models.analytics import QuantileSketch, JobWatermark
 from app.models.quest import Quest, UserQuest, Badge, UserBadge
 from app.models.staking import (
     Wallet,
@@ -23,8 +43,22 @@ __all__ = [
     "ReadingItem",
     "ReadingQuestion",
     "UserReadingAttempt",
+    "ReadingReviewSchedule",
+    "ReadingQuestionStats",
+    "PassageVocabulary",
+    "VocabularyTerm",
+    "MockTestForm",
     "EssayPrompt",
     "Essay",
+    "EssayScoringJob",
+    "EssayScoreCache",
+    "EssayScorerModel",
+    "UserWritingStats",
+    "EssayMinHash",
+    "EssayLshBucket",
+    "EssayBlob",
+    "QuantileSketch",
+    "JobWatermark",
     "Quest",
     "UserQuest",
     "Badge",
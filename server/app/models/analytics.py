@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+from app.config.database import Base
+
+
+class QuantileSketch(Base):
+    """Serialized quantile sketch for one metric and scope (e.g. reading time per question)"""
+    __tablename__ = "quantile_sketches"
+    __table_args__ = (
+        UniqueConstraint("metric", "scope", "scope_key", name="uq_quantile_sketch_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    metric = Column(String(100), nullable=False)  # reading_time_seconds, etc.
+    scope = Column(String(50), nullable=False)  # question, skill
+    scope_key = Column(String(255), nullable=False)  # question id, skill name
+    sketch = Column(JSON, nullable=False)  # DDSketch.to_dict()
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class JobWatermark(Base):
+    """High-water mark for incremental batch jobs"""
+    __tablename__ = "job_watermarks"
+
+    job_name = Column(String(100), primary_key=True)
+    last_id = Column(BigInteger, nullable=False, default=0)  # last source row id processed
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
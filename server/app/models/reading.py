@@ -1,11 +1,22 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, ARRAY, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, ARRAY, JSON, Index, UniqueConstraint, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.config.database import Base
 
+# Weighted full-text document for reading items (title ranks above passage).
+# Queries must use this exact expression so Postgres can match the GIN index.
+READING_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(passage, '')), 'B')"
+)
+
 
 class ReadingItem(Base):
     __tablename__ = "reading_items"
+    __table_args__ = (
+        Index("idx_reading_items_search", text(f"({READING_SEARCH_DOCUMENT})"), postgresql_using="gin"),
+        Index("idx_reading_items_skill_tags", "skill_tags", postgresql_using="gin"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -14,6 +25,19 @@ class ReadingItem(Base):
     skill_tags = Column(ARRAY(String), default=[])
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Readability features (precomputed by ReadingImportService)
+    word_count = Column(Integer)
+    sentence_count = Column(Integer)
+    avg_sentence_length = Column(Float)
+    sentence_length_std = Column(Float)
+    avg_syllables_per_word = Column(Float)
+    flesch_reading_ease = Column(Float)
+    flesch_kincaid_grade = Column(Float)
+    lexical_density = Column(Float)
+    rare_word_ratio = Column(Float)
+    difficulty_score = Column(Float, index=True)
+    features_updated_at = Column(DateTime(timezone=True))
+
     # Relationships
     questions = relationship("ReadingQuestion", back_populates="reading_item", cascade="all, delete-orphan")
 
@@ -36,14 +60,99 @@ class ReadingQuestion(Base):
 
 class UserReadingAttempt(Base):
     __tablename__ = "user_reading_attempts"
+    __table_args__ = (
+        Index(
+            "uq_reading_attempts_user_idempotency",
+            "user_id",
+            "idempotency_key",
+            unique=True,
+            postgresql_where=text("idempotency_key IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    question_id = Column(Integer, ForeignKey("reading_questions.id", ondelete="CASCADE"), nullable=False)
+    question_id = Column(Integer, ForeignKey("reading_questions.id", ondelete="CASCADE"), nullable=False, index=True)
     user_answer = Column(String(10), nullable=False)
     is_correct = Column(Boolean, nullable=False)
     time_spent_seconds = Column(Integer)
     attempted_at = Column(DateTime(timezone=True), server_default=func.now())
+    idempotency_key = Column(String(64))  # client-generated, for offline sync retries
 
     # Relationships
     question = relationship("ReadingQuestion", back_populates="attempts")
+
+
+class ReadingReviewSchedule(Base):
+    """SM-2 spaced-repetition state for a question the user has missed"""
+    __tablename__ = "reading_review_schedule"
+    __table_args__ = (
+        UniqueConstraint("user_id", "question_id", name="uq_reading_review_user_question"),
+        Index("idx_reading_review_user_due", "user_id", "due_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    question_id = Column(Integer, ForeignKey("reading_questions.id", ondelete="CASCADE"), nullable=False)
+    easiness = Column(Float, nullable=False, default=2.5)  # SM-2 easiness factor, >= 1.3
+    interval_days = Column(Float, nullable=False, default=0)
+    repetitions = Column(Integer, nullable=False, default=0)  # consecutive correct reviews
+    lapses = Column(Integer, nullable=False, default=0)  # total times answered wrong
+    due_at = Column(DateTime(timezone=True), nullable=False)
+    last_reviewed_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    question = relationship("ReadingQuestion")
+
+
+class ReadingQuestionStats(Base):
+    """Classical item-analysis results for a reading question (batch-computed)"""
+    __tablename__ = "reading_question_stats"
+
+    question_id = Column(Integer, ForeignKey("reading_questions.id", ondelete="CASCADE"), primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    respondents = Column(Integer, nullable=False, default=0)
+    p_value = Column(Float)  # proportion of correct answers
+    point_biserial = Column(Float)  # correlation with respondents' rest score
+    distractor_rates = Column(JSON, default={})  # {"A": 0.1, "B": 0.7, ...}
+    flags = Column(JSON, default=[])  # ["too_easy", "low_discrimination", ...]
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    question = relationship("ReadingQuestion")
+
+
+class PassageVocabulary(Base):
+    """Inverted index entry: how often a vocabulary term occurs in a passage"""
+    __tablename__ = "passage_vocabulary"
+
+    reading_item_id = Column(Integer, ForeignKey("reading_items.id", ondelete="CASCADE"), primary_key=True)
+    term = Column(String(100), primary_key=True, index=True)
+    occurrences = Column(Integer, nullable=False, default=0)
+    example_sentence = Column(Text)  # first sentence in the passage using the term
+
+
+class VocabularyTerm(Base):
+    """Catalog-wide frequency of a vocabulary term"""
+    __tablename__ = "vocabulary_terms"
+
+    term = Column(String(100), primary_key=True)
+    document_count = Column(Integer, nullable=False, default=0)  # passages containing the term
+    total_occurrences = Column(Integer, nullable=False, default=0)
+
+
+class MockTestForm(Base):
+    """Frozen mock test form that a whole cohort can take"""
+    __tablename__ = "mock_test_forms"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), nullable=False)
+    exam_type = Column(String(50), nullable=False)  # ielts, toefl
+    constraints = Column(JSON, nullable=False)  # skill mix, difficulty target, time limit
+    reading_item_ids = Column(JSON, nullable=False)  # ordered passage ids
+    question_ids = Column(JSON, nullable=False)
+    time_limit_minutes = Column(Integer, nullable=False)
+    estimated_minutes = Column(Float)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, DECIMAL
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, JSON, DECIMAL, Index, Float, LargeBinary
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from app.config.database import Base
+from app.services.blob_store import BlobJSON, BlobText
 
 
 class EssayPrompt(Base):
@@ -27,7 +28,8 @@ class Essay(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     prompt_id = Column(Integer, ForeignKey("essay_prompts.id", ondelete="SET NULL"))
-    content = Column(Text, nullable=False)
+    # Bodies live in the blob store and load only when accessed (both at once)
+    content = deferred(Column(BlobText, nullable=False), group="body")
     word_count = Column(Integer)
 
     # AI scores (IELTS/TOEFL rubric)
@@ -38,15 +40,122 @@ class Essay(Base):
     overall_score = Column(DECIMAL(3, 1))
 
     # AI feedback
-    ai_feedback = Column(JSON)  # Structured feedback from Gemini
+    ai_feedback = deferred(Column(BlobJSON), group="body")  # Structured feedback from Gemini
+    scorer = Column(String(100))  # scorer version that produced the scores
 
     # Revision tracking
     submission_number = Column(Integer, default=1)
     parent_essay_id = Column(Integer, ForeignKey("essays.id"))
+    root_essay_id = Column(Integer, ForeignKey("essays.id"), index=True)  # first essay in the chain; NULL for originals
+
+    # Closest earlier essay found by the near-duplicate index at submit time
+    duplicate_of_essay_id = Column(Integer, ForeignKey("essays.id", ondelete="SET NULL"))
+    duplicate_similarity = Column(Float)  # estimated Jaccard similarity of word shingles
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     prompt = relationship("EssayPrompt", back_populates="essays")
-    revisions = relationship("Essay", remote_side=[parent_essay_id])
+    revisions = relationship("Essay", remote_side=[parent_essay_id], foreign_keys=[parent_essay_id])
+
+
+class EssayScoringJob(Base):
+    """Queued AI scoring work for a submitted essay"""
+    __tablename__ = "essay_scoring_jobs"
+    __table_args__ = (
+        Index("idx_essay_scoring_jobs_claim", "status", "available_at"),
+        Index("idx_essay_scoring_jobs_schedule", "status", "priority", "fair_rank", "id"),
+        Index("idx_essay_scoring_jobs_user_status", "user_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    essay_id = Column(Integer, ForeignKey("essays.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed, failed
+    priority = Column(Integer, nullable=False, default=2)  # 0 boss, 1 quest, 2 practice, 3 low; lower runs first
+    fair_rank = Column(Integer, nullable=False, default=0)  # user's pending jobs at enqueue, for round-robin
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    result = Column(JSON)  # newly earned badges once scored
+    provisional_scores = Column(JSON)  # local pre-scorer estimate shown while pending
+    near_duplicates = Column(JSON)  # earlier essays found similar at submit time
+    available_at = Column(DateTime(timezone=True), server_default=func.now())  # retry backoff
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime(timezone=True))
+
+    # Relationships
+    essay = relationship("Essay")
+
+
+class EssayScoreCache(Base):
+    """Scorer result shared across workers, keyed by a hash of the normalized essay and prompt"""
+    __tablename__ = "essay_score_cache"
+
+    cache_key = Column(String(64), primary_key=True)  # sha256 hex
+    scorer_version = Column(String(100), nullable=False)
+    result = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class EssayScorerModel(Base):
+    """Calibrated weights for a local essay scoring model"""
+    __tablename__ = "essay_scorer_models"
+
+    name = Column(String(50), primary_key=True)
+    model = Column(JSON, nullable=False)  # EssayPreScoreModel.to_dict()
+    metrics = Column(JSON)  # holdout error from the last calibration
+    sample_size = Column(Integer)
+    trained_at = Column(DateTime(timezone=True))
+
+
+class UserWritingStats(Base):
+    """Running totals behind a user's writing statistics, updated as essays are submitted and scored"""
+    __tablename__ = "user_writing_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_essays = Column(Integer, nullable=False, default=0)
+    total_revisions = Column(Integer, nullable=False, default=0)
+    word_count_total = Column(BigInteger, nullable=False, default=0)
+    word_counted_essays = Column(Integer, nullable=False, default=0)
+
+    # Sums over scored essays; averages are sum / scored_essays
+    scored_essays = Column(Integer, nullable=False, default=0)
+    overall_score_total = Column(DECIMAL(12, 1), nullable=False, default=0)
+    best_overall_score = Column(DECIMAL(3, 1))
+    task_response_total = Column(DECIMAL(12, 1), nullable=False, default=0)
+    coherence_cohesion_total = Column(DECIMAL(12, 1), nullable=False, default=0)
+    lexical_resource_total = Column(DECIMAL(12, 1), nullable=False, default=0)
+    grammatical_range_total = Column(DECIMAL(12, 1), nullable=False, default=0)
+
+    recent_essays = Column(JSON)  # last 10 essays, oldest first, for score trends
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class EssayMinHash(Base):
+    """MinHash signature of an essay's word shingles"""
+    __tablename__ = "essay_minhashes"
+
+    essay_id = Column(Integer, ForeignKey("essays.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    signature = Column(LargeBinary, nullable=False)  # uint32 array, NUM_PERMUTATIONS long
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class EssayLshBucket(Base):
+    """LSH band bucket membership; essays sharing any bucket are near-duplicate candidates"""
+    __tablename__ = "essay_lsh_buckets"
+
+    bucket = Column(BigInteger, primary_key=True)  # hash of (band number, band values)
+    essay_id = Column(Integer, ForeignKey("essays.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+
+class EssayBlob(Base):
+    """Compressed essay bodies and feedback for the database blob store backend"""
+    __tablename__ = "essay_blobs"
+
+    key = Column(String(64), primary_key=True)  # sha256 hex of the uncompressed bytes
+    data = Column(LargeBinary, nullable=False)  # zstd-compressed
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
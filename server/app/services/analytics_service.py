@@ -0,0 +1,99 @@
+"""
+Reading analytics built on quantile sketches
+Tracks solve-time distributions per question and per skill without
+scanning user_reading_attempts at query time
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.reading import ReadingQuestion, UserReadingAttempt
+from app.services.sketch_service import SketchService
+from app.services.sketches import DDSketch
+
+READING_TIME_METRIC = "reading_time_seconds"
+SCOPE_QUESTION = "question"
+SCOPE_SKILL = "skill"
+
+
+class AnalyticsService:
+    @staticmethod
+    def record_reading_time(question_id: int, skill_category: Optional[str], seconds: Optional[int]):
+        """Buffer a solve time for the question and its skill"""
+        if seconds is None or seconds < 0:
+            return
+        SketchService.record(READING_TIME_METRIC, SCOPE_QUESTION, question_id, seconds)
+        if skill_category:
+            SketchService.record(READING_TIME_METRIC, SCOPE_SKILL, skill_category, seconds)
+
+    @staticmethod
+    def summarize(scope: str, scope_key: str, sketch: DDSketch) -> Dict:
+        """Describe a timing sketch with the quantiles the dashboards use"""
+        return {
+            "scope": scope,
+            "key": scope_key,
+            "count": sketch.count,
+            "mean_seconds": round(sketch.mean, 1) if sketch.count else None,
+            "p50_seconds": sketch.quantile(0.5),
+            "p90_seconds": sketch.quantile(0.9),
+            "p99_seconds": sketch.quantile(0.99),
+            "min_seconds": sketch.min,
+            "max_seconds": sketch.max,
+        }
+
+    @staticmethod
+    def get_reading_timing(
+        db: Session, scope: str, scope_key: Optional[str] = None
+    ) -> List[Dict]:
+        """Timing quantiles for one key, or every key in the scope"""
+        if scope_key is not None:
+            sketch = SketchService.get_sketch(db, READING_TIME_METRIC, scope, scope_key)
+            return [AnalyticsService.summarize(scope, str(scope_key), sketch)]
+
+        return [
+            AnalyticsService.summarize(scope, key, sketch)
+            for key, sketch in SketchService.get_sketches(db, READING_TIME_METRIC, scope)
+        ]
+
+    @staticmethod
+    def rebuild_reading_timing(db: Session, batch_size: int = 5000) -> Dict[str, int]:
+        """Rebuild all reading timing sketches from the attempts table"""
+        question_sketches: Dict[int, DDSketch] = defaultdict(DDSketch)
+        skill_sketches: Dict[str, DDSketch] = defaultdict(DDSketch)
+
+        rows = (
+            db.query(
+                UserReadingAttempt.question_id,
+                ReadingQuestion.skill_category,
+                UserReadingAttempt.time_spent_seconds
+            )
+            .join(ReadingQuestion, ReadingQuestion.id == UserReadingAttempt.question_id)
+            .filter(UserReadingAttempt.time_spent_seconds.isnot(None))
+            .yield_per(batch_size)
+        )
+
+        attempts = 0
+        for question_id, skill_category, seconds in rows:
+            if seconds < 0:
+                continue
+            question_sketches[question_id].add(seconds)
+            if skill_category:
+                skill_sketches[skill_category].add(seconds)
+            attempts += 1
+
+        sketches = [
+            (SCOPE_QUESTION, question_id, sketch)
+            for question_id, sketch in question_sketches.items()
+        ] + [
+            (SCOPE_SKILL, skill, sketch)
+            for skill, sketch in skill_sketches.items()
+        ]
+        SketchService.replace_all(db, READING_TIME_METRIC, sketches)
+
+        return {
+            "attempts": attempts,
+            "questions": len(question_sketches),
+            "skills": len(skill_sketches),
+        }
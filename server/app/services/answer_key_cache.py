@@ -0,0 +1,129 @@
+"""
+In-process answer-key cache for reading questions
+Question content is effectively immutable, so keys are bulk-loaded at
+warm-up and grading rarely has to read reading_questions. Imports in other
+processes are picked up by comparing the catalog version every
+VERSION_CHECK_SECONDS (and dropping keys older than the catalog index age)
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.reading import ReadingQuestion
+from app.services.catalog_cache import CATALOG_INDEX_MAX_AGE_SECONDS, catalog_version
+
+WARM_BATCH_SIZE = 5000
+VERSION_CHECK_SECONDS = 30
+
+
+class AnswerKey(NamedTuple):
+    question_id: int
+    reading_item_id: int
+    correct_answer: str
+    skill_category: Optional[str]
+    explanation: Optional[str]
+
+
+_answer_keys: Dict[int, AnswerKey] = {}
+_answer_keys_lock = threading.Lock()
+_catalog_version: Optional[Tuple] = None
+_loaded_at = 0.0
+_checked_at = 0.0
+
+_ANSWER_KEY_COLUMNS = (
+    ReadingQuestion.id,
+    ReadingQuestion.reading_item_id,
+    ReadingQuestion.correct_answer,
+    ReadingQuestion.skill_category,
+    ReadingQuestion.explanation,
+)
+
+
+def _to_answer_key(row) -> AnswerKey:
+    return AnswerKey(
+        question_id=row[0],
+        reading_item_id=row[1],
+        correct_answer=(row[2] or "").upper(),
+        skill_category=row[3],
+        explanation=row[4]
+    )
+
+
+class AnswerKeyCache:
+    @staticmethod
+    def warm(db: Session) -> int:
+        """Bulk-load every answer key; returns the number cached"""
+        global _catalog_version, _loaded_at, _checked_at
+        version = catalog_version(db)
+        keys = {
+            key.question_id: key
+            for key in (
+                _to_answer_key(row)
+                for row in db.query(*_ANSWER_KEY_COLUMNS).yield_per(WARM_BATCH_SIZE)
+            )
+        }
+        with _answer_keys_lock:
+            _answer_keys.clear()
+            _answer_keys.update(keys)
+            _catalog_version = version
+            _loaded_at = _checked_at = time.monotonic()
+        return len(keys)
+
+    @staticmethod
+    def get(db: Session, question_id: int) -> Optional[AnswerKey]:
+        """Get an answer key, loading it once if it arrived after warm-up"""
+        AnswerKeyCache._check_version(db)
+        key = _answer_keys.get(question_id)
+        if key is not None:
+            return key
+
+        row = db.query(*_ANSWER_KEY_COLUMNS).filter(ReadingQuestion.id == question_id).first()
+        if row is None:
+            return None
+
+        key = _to_answer_key(row)
+        with _answer_keys_lock:
+            _answer_keys[question_id] = key
+        return key
+
+    @staticmethod
+    def existing(db: Session, question_ids: Iterable[int]) -> Set[int]:
+        """Which questions still exist, dropping cached keys for the rest"""
+        question_ids = set(question_ids)
+        if not question_ids:
+            return set()
+        found = {
+            question_id
+            for (question_id,) in db.query(ReadingQuestion.id).filter(ReadingQuestion.id.in_(question_ids))
+        }
+        AnswerKeyCache.invalidate(question_ids - found)
+        return found
+
+    @staticmethod
+    def _check_version(db: Session):
+        """Drop every key when the catalog changed, checking at most every VERSION_CHECK_SECONDS"""
+        global _catalog_version, _loaded_at, _checked_at
+        now = time.monotonic()
+        if now - _checked_at < VERSION_CHECK_SECONDS:
+            return
+        _checked_at = now
+
+        version = catalog_version(db)
+        with _answer_keys_lock:
+            if version != _catalog_version or now - _loaded_at > CATALOG_INDEX_MAX_AGE_SECONDS:
+                _answer_keys.clear()
+                _catalog_version = version
+                _loaded_at = now
+
+    @staticmethod
+    def invalidate(question_ids: Optional[Iterable[int]] = None):
+        """Drop cached keys (all of them when no ids are given)"""
+        with _answer_keys_lock:
+            if question_ids is None:
+                _answer_keys.clear()
+                return
+            for question_id in question_ids:
+                _answer_keys.pop(question_id, None)
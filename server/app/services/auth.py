@@ -74,3 +74,12 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+    admin_emails = {
+        email.strip().lower() for email in settings.admin_emails.split(",") if email.strip()
+    }
+    if current_user.email.lower() not in admin_emails:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
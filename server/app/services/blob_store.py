@@ -0,0 +1,366 @@
+"""
+Content-addressed, zstd-compressed blob store
+Blobs are keyed by the SHA-256 of their uncompressed bytes, so identical
+essays and feedback are stored once. Rows keep a short reference
+(blob:sha256:<hex>) instead of the body. The database backend (the
+default) keeps blobs in essay_blobs, so Postgres stays the store of
+record and every replica sees the same blobs. The filesystem backend is
+only for a single instance with a persistent volume, and the app refuses
+to start on a store that would not survive a redeploy.
+
+Blobs are written in their own transaction when a row is flushed, so an
+essay transaction that rolls back leaves its blobs behind. Nothing
+deletes unreferenced blobs yet; deduplication keeps such leftovers small.
+
+Loading a row resolves its blobs one at a time. Code that reads many
+rows selects stored_value(column) instead and resolves the references
+with BlobStore.load_texts, one query per batch on its own connection
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import zstandard
+from sqlalchemy import JSON, Text, type_coerce
+from sqlalchemy.orm import Session
+from sqlalchemy.types import TypeDecorator
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+
+BLOB_REF_PREFIX = "blob:sha256:"
+
+# Decompressed blobs kept per process; blobs never change once written
+READ_CACHE_SIZE = 512
+
+# Keys per query when resolving many references at once
+GET_MANY_BATCH_SIZE = 500
+
+
+def blob_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_blob_ref(value) -> bool:
+    return isinstance(value, str) and value.startswith(BLOB_REF_PREFIX)
+
+
+def stored_value(column):
+    """A blob column as stored (a reference, or legacy inline text), without loading the blob"""
+    return type_coerce(column, column.type.impl).label(column.key)
+
+
+class DatabaseBlobBackend:
+    """Rows in essay_blobs, shared by every API and worker process"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def durability_problem(self) -> Optional[str]:
+        return None
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str], db: Optional[Session] = None) -> Dict[str, bytes]:
+        """Blobs for several keys, one query per batch on db's connection when given"""
+        session = db or SessionLocal()
+        try:
+            blobs = {}
+            for start in range(0, len(keys), GET_MANY_BATCH_SIZE):
+                rows = (
+                    session.query(self.model.key, self.model.data)
+                    .filter(self.model.key.in_(keys[start:start + GET_MANY_BATCH_SIZE]))
+                    .all()
+                )
+                blobs.update((key, bytes(data)) for key, data in rows)
+            return blobs
+        finally:
+            if db is None:
+                session.close()
+
+    def put(self, key: str, data: bytes):
+        # One insert that ignores an existing blob, rather than a lookup first
+        db = SessionLocal()
+        try:
+            if db.bind.dialect.name == "postgresql":
+                db.execute(
+                    postgresql.insert(self.model).values(key=key, data=data).on_conflict_do_nothing()
+                )
+            else:
+                db.merge(self.model(key=key, data=data))
+            db.commit()
+        except IntegrityError:
+            # Another worker stored the same blob first
+            db.rollback()
+        finally:
+            db.close()
+
+
+class FilesystemBlobBackend:
+    """Compressed blobs under root/ab/cd/<key>.zst"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def durability_problem(self) -> Optional[str]:
+        if not str(self.root) or not self.root.is_absolute():
+            return "BLOB_STORE_PATH must be an absolute path on a persistent volume"
+        if not self.root.is_dir():
+            return f"{self.root} does not exist; mount a persistent volume there"
+        # Railway replaces the container filesystem on every deploy; only its volume persists
+        volume = os.getenv("RAILWAY_VOLUME_MOUNT_PATH")
+        if os.getenv("RAILWAY_ENVIRONMENT") and not (
+            volume and os.path.commonpath([str(self.root), volume]) == os.path.normpath(volume)
+        ):
+            return f"{self.root} is not on the service's Railway volume"
+        if not os.access(self.root, os.W_OK):
+            return f"{self.root} is not writable"
+        return None
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / f"{key}.zst"
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def get_many(self, keys: List[str], db: Optional[Session] = None) -> Dict[str, bytes]:
+        blobs = {key: self.get(key) for key in keys}
+        return {key: data for key, data in blobs.items() if data is not None}
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so concurrent writers and readers never see a partial blob
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+
+class MemoryBlobBackend:
+    """Per-process blobs, for tests and local development"""
+
+    def __init__(self):
+        self._blobs: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def durability_problem(self) -> Optional[str]:
+        return "the memory backend loses every blob when the process exits"
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._blobs.get(key)
+
+    def get_many(self, keys: List[str], db: Optional[Session] = None) -> Dict[str, bytes]:
+        return {key: self._blobs[key] for key in keys if key in self._blobs}
+
+    def put(self, key: str, data: bytes):
+        with self._lock:
+            self._blobs.setdefault(key, data)
+
+
+def _make_backend():
+    if settings.blob_store_backend == "database":
+        # Imported here: app.models.writing imports this module for its column types
+        from app.models.writing import EssayBlob
+        return DatabaseBlobBackend(EssayBlob)
+    if settings.blob_store_backend == "memory":
+        return MemoryBlobBackend()
+    if settings.blob_store_backend == "filesystem":
+        return FilesystemBlobBackend(settings.blob_store_path)
+    raise ValueError(f"Unknown blob store backend: {settings.blob_store_backend}")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_cache_lock = threading.Lock()
+_local = threading.local()  # zstd contexts are not thread-safe
+
+
+def _get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _make_backend()
+    return _backend
+
+
+def _compressor() -> zstandard.ZstdCompressor:
+    if not hasattr(_local, "compressor"):
+        _local.compressor = zstandard.ZstdCompressor(level=settings.blob_store_compression_level)
+    return _local.compressor
+
+
+def _decompressor() -> zstandard.ZstdDecompressor:
+    if not hasattr(_local, "decompressor"):
+        _local.decompressor = zstandard.ZstdDecompressor()
+    return _local.decompressor
+
+
+class BlobStore:
+    @staticmethod
+    def put(data: bytes) -> str:
+        """Store bytes (once per distinct content) and return their reference"""
+        key = blob_key(data)
+        with _cache_lock:
+            # Cached blobs were already stored or read back from the store
+            stored = key in _cache
+        if not stored:
+            _get_backend().put(key, _compressor().compress(data))
+        BlobStore._remember(key, data)
+        return BLOB_REF_PREFIX + key
+
+    @staticmethod
+    def get(ref: str) -> bytes:
+        """Bytes for a reference returned by put; raises KeyError if the blob is missing"""
+        key = ref[len(BLOB_REF_PREFIX):]
+        with _cache_lock:
+            data = _cache.get(key)
+            if data is not None:
+                _cache.move_to_end(key)
+                return data
+
+        compressed = _get_backend().get(key)
+        if compressed is None:
+            raise KeyError(f"Blob {key} not found")
+        data = _decompressor().decompress(compressed)
+        BlobStore._remember(key, data)
+        return data
+
+    @staticmethod
+    def get_many(refs: Iterable[str], db: Optional[Session] = None) -> Dict[str, bytes]:
+        """
+        Bytes for several references, fetching uncached blobs in batches
+        Uses db's connection when given. Raises KeyError if a blob is missing.
+        """
+        found, missing = {}, {}
+        with _cache_lock:
+            for ref in set(refs):
+                key = ref[len(BLOB_REF_PREFIX):]
+                data = _cache.get(key)
+                if data is not None:
+                    found[ref] = data
+                else:
+                    missing[key] = ref
+
+        if missing:
+            blobs = _get_backend().get_many(list(missing), db)
+            for key, ref in missing.items():
+                if key not in blobs:
+                    raise KeyError(f"Blob {key} not found")
+                found[ref] = _decompressor().decompress(blobs[key])
+        return found
+
+    @staticmethod
+    def prefetch(db: Session, values: Iterable):
+        """Load the blobs behind stored column values into the read cache, before loading their rows"""
+        blobs = BlobStore.get_many([value for value in values if is_blob_ref(value)], db)
+        for ref, data in blobs.items():
+            BlobStore._remember(ref[len(BLOB_REF_PREFIX):], data)
+
+    @staticmethod
+    def load_texts(db: Session, values: List[Optional[str]]) -> List[Optional[str]]:
+        """Text for stored BlobText values (see stored_value), resolved in batches"""
+        blobs = BlobStore.get_many([value for value in values if is_blob_ref(value)], db)
+        return [blobs[value].decode("utf-8") if is_blob_ref(value) else value for value in values]
+
+    @staticmethod
+    def check_durable():
+        """Raise RuntimeError unless stored blobs outlive this process and the next deploy"""
+        problem = _get_backend().durability_problem()
+        if problem:
+            raise RuntimeError(f"Blob store ({settings.blob_store_backend}) is not durable: {problem}")
+
+    @staticmethod
+    def put_text(text: str) -> str:
+        return BlobStore.put(text.encode("utf-8"))
+
+    @staticmethod
+    def get_text(ref: str) -> str:
+        return BlobStore.get(ref).decode("utf-8")
+
+    @staticmethod
+    def _remember(key: str, data: bytes):
+        with _cache_lock:
+            _cache[key] = data
+            _cache.move_to_end(key)
+            while len(_cache) > READ_CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    @staticmethod
+    def reset():
+        """Drop the backend and read cache (after changing settings, or in tests)"""
+        global _backend
+        with _backend_lock:
+            _backend = None
+        with _cache_lock:
+            _cache.clear()
+
+
+class BlobText(TypeDecorator):
+    """
+    Text column holding a blob reference
+    Values are written to the blob store on bind and read back on load;
+    rows written before the store existed still hold their text inline
+    and are returned as is.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        # Always store, so text that merely looks like a reference is never trusted as one
+        if value is None:
+            return value
+        return BlobStore.put_text(value)
+
+    def process_result_value(self, value, dialect):
+        if is_blob_ref(value):
+            return BlobStore.get_text(value)
+        return value
+
+    def coerce_compared_value(self, op, value):
+        # Comparisons are against the stored text, not new blobs
+        return Text()
+
+
+class BlobJSON(TypeDecorator):
+    """JSON column holding a blob reference to the serialized document, as BlobText"""
+
+    impl = JSON
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return value
+        # Canonical form, so equal documents share a blob
+        return BlobStore.put(json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+
+    def process_result_value(self, value, dialect):
+        if is_blob_ref(value):
+            return json.loads(BlobStore.get(value))
+        return value
+
+    def coerce_compared_value(self, op, value):
+        return JSON()
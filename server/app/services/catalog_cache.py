@@ -0,0 +1,70 @@
+"""
+In-process caches derived from the reading catalog
+Every API process builds its own copy, so invalidation by the importer
+only reaches one of them. Caches here compare a cheap catalog fingerprint
+with the one they were built from instead, and rebuild when it changes
+"""
+
+import threading
+import time
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.reading import ReadingItem, ReadingQuestion
+
+# Rebuilt at least this often, to pick up in-place edits the version cannot see
+CATALOG_INDEX_MAX_AGE_SECONDS = 300
+
+T = TypeVar("T")
+
+
+def catalog_version(db: Session) -> Tuple:
+    """Fingerprint of the reading catalog: rows added or removed, features recomputed"""
+    return tuple(db.execute(select(
+        select(func.count(ReadingItem.id)).scalar_subquery(),
+        select(func.max(ReadingItem.id)).scalar_subquery(),
+        select(func.max(ReadingItem.features_updated_at)).scalar_subquery(),
+        select(func.count(ReadingQuestion.id)).scalar_subquery(),
+        select(func.max(ReadingQuestion.id)).scalar_subquery(),
+    )).one())
+
+
+class CatalogIndexCache(Generic[T]):
+    """One index built from the catalog, rebuilt when the catalog version changes or it ages out"""
+
+    def __init__(self, build: Callable[[Session], T]):
+        self._build = build
+        self._cached: Optional[Tuple[Tuple, float, T]] = None  # (catalog version, built at, index)
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def get(self, db: Session) -> T:
+        version = catalog_version(db)
+        index = self._current(version)
+        if index is not None:
+            return index
+
+        # One builder at a time; readers of a current index never wait on it
+        with self._build_lock:
+            index = self._current(version)
+            if index is None:
+                index = self._build(db)
+                with self._lock:
+                    self._cached = (version, time.monotonic(), index)
+            return index
+
+    def invalidate(self):
+        with self._lock:
+            self._cached = None
+
+    def _current(self, version: Tuple) -> Optional[T]:
+        with self._lock:
+            cached = self._cached
+        if cached is None:
+            return None
+        cached_version, built_at, index = cached
+        if cached_version != version or time.monotonic() - built_at > CATALOG_INDEX_MAX_AGE_SECONDS:
+            return None
+        return index
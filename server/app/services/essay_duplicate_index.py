@@ -0,0 +1,216 @@
+"""
+Near-duplicate index for essays
+Each essay gets a MinHash signature of its word 5-gram shingles, split
+into LSH bands. Essays sharing a band bucket are candidates, and the
+share of equal signature slots estimates their Jaccard similarity, so a
+lookup touches a few index rows instead of comparing every essay
+"""
+
+import hashlib
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import func, insert
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.models.writing import Essay, EssayMinHash, EssayLshBucket
+from app.services.blob_store import BlobStore, stored_value
+from app.services.text_features import WORD_PATTERN
+
+NUM_PERMUTATIONS = 128
+BANDS = 32
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS  # candidate threshold ~ (1 / BANDS) ** (1 / ROWS_PER_BAND) = 0.42
+SHINGLE_SIZE = 5
+
+# Candidates below this estimated similarity are dropped
+SIMILARITY_THRESHOLD = 0.5
+
+MAX_CANDIDATES = 10
+REBUILD_BATCH_SIZE = 1000
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed seed: signatures must be comparable across processes and runs
+_rng = np.random.default_rng(20240611)
+_A = _rng.integers(1, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingle_hashes(content: str) -> np.ndarray:
+    """32-bit hashes of the essay's lowercase word 5-grams"""
+    words = [word.lower() for word in WORD_PATTERN.findall(content or "")]
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    size = min(SHINGLE_SIZE, len(words))
+    shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+
+
+def minhash_signature(content: str) -> np.ndarray:
+    """NUM_PERMUTATIONS minimum hashes under (a * x + b) mod p"""
+    hashes = shingle_hashes(content)
+    if hashes.size == 0:
+        return np.full(NUM_PERMUTATIONS, _MAX_HASH, dtype=np.uint32)
+    permuted = (np.outer(hashes, _A) + _B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_buckets(signature: np.ndarray) -> List[int]:
+    """One signed 64-bit bucket key per band"""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(band.to_bytes(2, "little") + rows.tobytes(), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+def estimate_similarity(signature: np.ndarray, other: np.ndarray) -> float:
+    return float(np.mean(signature == other))
+
+
+class EssayDuplicateIndex:
+    @staticmethod
+    def index_essay(db: Session, essay: Essay, signature: Optional[np.ndarray] = None):
+        """Add a flushed essay to the index (does not commit)"""
+        if signature is None:
+            signature = minhash_signature(essay.content)
+        db.add(EssayMinHash(essay_id=essay.id, user_id=essay.user_id, signature=signature.tobytes()))
+        db.bulk_insert_mappings(
+            EssayLshBucket,
+            [{"bucket": bucket, "essay_id": essay.id} for bucket in band_buckets(signature)]
+        )
+
+    @staticmethod
+    def find_candidates(
+        db: Session,
+        signature: np.ndarray,
+        exclude_essay_ids: Iterable[int] = (),
+        exclude_root_id: Optional[int] = None,
+        limit: int = MAX_CANDIDATES
+    ) -> List[Dict[str, Any]]:
+        """
+        Indexed essays similar to a signature, most similar first
+        exclude_root_id skips every essay in that revision chain, since
+        revisions are expected to resemble each other.
+        """
+        bucket_matches = (
+            db.query(EssayLshBucket.essay_id)
+            .filter(EssayLshBucket.bucket.in_(band_buckets(signature)))
+            .distinct()
+            .subquery()
+        )
+        query = (
+            db.query(
+                EssayMinHash.essay_id,
+                EssayMinHash.user_id,
+                EssayMinHash.signature,
+                Essay.prompt_id,
+                func.coalesce(Essay.root_essay_id, Essay.id).label("root_id")
+            )
+            .join(bucket_matches, bucket_matches.c.essay_id == EssayMinHash.essay_id)
+            .join(Essay, Essay.id == EssayMinHash.essay_id)
+        )
+        exclude_essay_ids = list(exclude_essay_ids)
+        if exclude_essay_ids:
+            query = query.filter(EssayMinHash.essay_id.notin_(exclude_essay_ids))
+
+        candidates = []
+        for row in query.all():
+            if exclude_root_id is not None and row.root_id == exclude_root_id:
+                continue
+            similarity = estimate_similarity(signature, np.frombuffer(row.signature, dtype=np.uint32))
+            if similarity >= SIMILARITY_THRESHOLD:
+                candidates.append({
+                    "essay_id": row.essay_id,
+                    "user_id": row.user_id,
+                    "prompt_id": row.prompt_id,
+                    "similarity": round(similarity, 3),
+                })
+        candidates.sort(key=lambda candidate: (-candidate["similarity"], candidate["essay_id"]))
+        return candidates[:limit]
+
+    @staticmethod
+    def check_and_index(db: Session, essay: Essay) -> List[Dict[str, Any]]:
+        """
+        Find near-duplicates of a newly flushed essay, record the closest on
+        it and add it to the index (does not commit)
+        """
+        if not WORD_PATTERN.search(essay.content or ""):
+            return []
+        signature = minhash_signature(essay.content)
+        candidates = EssayDuplicateIndex.find_candidates(
+            db,
+            signature,
+            exclude_essay_ids=[essay.id],
+            exclude_root_id=essay.root_essay_id or essay.id
+        )
+        if candidates:
+            essay.duplicate_of_essay_id = candidates[0]["essay_id"]
+            essay.duplicate_similarity = candidates[0]["similarity"]
+        EssayDuplicateIndex.index_essay(db, essay, signature)
+        return candidates
+
+    @staticmethod
+    def _insert_missing(db: Session, model, rows: List[Dict[str, Any]]):
+        """Insert index rows, skipping any a concurrent submission already wrote"""
+        if not rows:
+            return
+        if db.bind.dialect.name == "postgresql":
+            db.execute(postgresql.insert(model).on_conflict_do_nothing(), rows)
+        else:
+            db.execute(insert(model), rows)
+
+    @staticmethod
+    def rebuild(db: Session, batch_size: int = REBUILD_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Re-index every essay stored when the rebuild starts
+
+        Each batch replaces its essays' index rows in one transaction, so
+        the live index keeps answering lookups throughout. Essays submitted
+        during the rebuild are indexed by check_and_index and lie past the
+        starting max id.
+        """
+        max_id = db.query(func.max(Essay.id)).scalar() or 0
+        db.commit()
+
+        last_id, essays = 0, 0
+        while last_id < max_id:
+            rows = (
+                db.query(Essay.id, Essay.user_id, stored_value(Essay.content))
+                .filter(Essay.id > last_id, Essay.id <= max_id)
+                .order_by(Essay.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            signatures, buckets = [], []
+            contents = BlobStore.load_texts(db, [row.content for row in rows])
+            for row, content in zip(rows, contents):
+                if not WORD_PATTERN.search(content or ""):
+                    continue
+                signature = minhash_signature(content)
+                signatures.append({"essay_id": row.id, "user_id": row.user_id, "signature": signature.tobytes()})
+                buckets.extend({"bucket": bucket, "essay_id": row.id} for bucket in band_buckets(signature))
+
+            essay_ids = [row.id for row in rows]
+            db.query(EssayLshBucket).filter(EssayLshBucket.essay_id.in_(essay_ids)).delete(synchronize_session=False)
+            db.query(EssayMinHash).filter(EssayMinHash.essay_id.in_(essay_ids)).delete(synchronize_session=False)
+            EssayDuplicateIndex._insert_missing(db, EssayMinHash, signatures)
+            EssayDuplicateIndex._insert_missing(db, EssayLshBucket, buckets)
+            db.commit()
+
+            essays += len(signatures)
+            last_id = rows[-1].id
+
+        buckets = db.query(func.count(EssayLshBucket.bucket)).scalar() or 0
+        return {"essays": essays, "buckets": buckets}
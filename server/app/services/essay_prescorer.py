@@ -0,0 +1,367 @@
+"""
+Local feature-based essay pre-scorer
+Estimates the four rubric scores from surface features in milliseconds,
+so learners get a provisional band while the LLM result is pending. A
+linear model maps features to scores; it ships with hand-set weights and
+is recalibrated against historical Gemini scores with ridge regression
+"""
+
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.writing import Essay, EssayPrompt, EssayScorerModel
+from app.services.blob_store import BlobStore, stored_value
+from app.services.text_features import (
+    COMMON_WORDS, FUNCTION_WORDS, WORD_PATTERN, split_paragraphs, split_sentences
+)
+
+MODEL_NAME = "prescorer"
+PRESCORER = "prescorer"
+
+CRITERIA = (
+    "task_response_score",
+    "coherence_cohesion_score",
+    "lexical_resource_score",
+    "grammatical_range_score",
+)
+
+FEATURE_NAMES = (
+    "length_fit",  # words relative to the prompt minimum, capped at 1
+    "length_overshoot",  # words beyond 1.5x the prompt maximum, as a fraction of it
+    "lexical_diversity",  # Guiraud index (types / sqrt(tokens)) / 10
+    "rare_word_ratio",
+    "avg_word_length",  # characters / 10
+    "avg_sentence_length",  # words / 30, capped at 1
+    "sentence_length_cv",  # std / mean of sentence lengths
+    "cohesion_density",  # cohesion markers per sentence, capped at 1
+    "paragraphing",  # paragraphs / 5, capped at 1
+    "prompt_overlap",  # share of prompt keywords used
+)
+
+# Hand-set starting weights (rows follow CRITERIA, columns FEATURE_NAMES)
+DEFAULT_INTERCEPTS = [3.0, 3.0, 2.5, 3.0]
+DEFAULT_WEIGHTS = [
+    [2.5, -1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.5, 0.5, 2.5],
+    [1.5, -0.5, 0.0, 0.0, 0.0, 0.0, 0.5, 2.0, 1.5, 0.0],
+    [1.0, 0.0, 2.0, 2.0, 1.5, 0.0, 0.0, 0.0, 0.0, 0.0],
+    [1.5, 0.0, 0.0, 0.0, 0.5, 2.0, 1.5, 0.5, 0.0, 0.0],
+]
+
+RIDGE_ALPHA = 1.0
+HOLDOUT_FRACTION = 0.2
+CALIBRATION_BATCH_SIZE = 2000
+
+DEFAULT_WORD_COUNT_MIN = 200
+DEFAULT_WORD_COUNT_MAX = 300
+
+# Single-word and phrase discourse markers counted for cohesion
+COHESION_MARKERS = frozenset("""
+however moreover furthermore additionally consequently therefore thus hence nevertheless
+nonetheless meanwhile similarly likewise conversely instead firstly secondly thirdly finally
+lastly overall although though whereas while besides otherwise subsequently accordingly
+""".split())
+COHESION_PHRASES = (
+    "in addition", "on the other hand", "for example", "for instance", "as a result",
+    "in conclusion", "to conclude", "in contrast", "in particular", "on the contrary",
+    "in other words", "to sum up", "as well as", "due to", "because of", "first of all",
+)
+_COHESION_PHRASE_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(phrase) for phrase in COHESION_PHRASES) + r")\b"
+)
+
+
+def _prompt_keywords(prompt_text: str) -> frozenset:
+    return frozenset(
+        word.rstrip("s")
+        for word in (token.lower() for token in WORD_PATTERN.findall(prompt_text or ""))
+        if len(word) > 3 and word not in FUNCTION_WORDS
+    )
+
+
+def extract_essay_features(
+    essays: Sequence[str],
+    prompts: Sequence[str],
+    word_ranges: Optional[Sequence[Tuple[int, int]]] = None
+) -> np.ndarray:
+    """
+    Feature matrix (len(essays) x len(FEATURE_NAMES)) for a batch of essays
+    Tokenization is one pass per essay; the metrics are array math.
+    """
+    count = len(essays)
+    words = np.zeros(count)
+    types = np.zeros(count)
+    characters = np.zeros(count)
+    content_words = np.zeros(count)
+    rare_words = np.zeros(count)
+    markers = np.zeros(count)
+    paragraphs = np.zeros(count)
+    overlap = np.zeros(count)
+    sentence_owner: List[int] = []
+    sentence_lengths: List[int] = []
+    keyword_cache: Dict[str, frozenset] = {}
+
+    for position, (essay, prompt_text) in enumerate(zip(essays, prompts)):
+        essay = essay or ""
+        tokens = [token.lower() for token in WORD_PATTERN.findall(essay)]
+        for sentence in split_sentences(essay):
+            length = len(WORD_PATTERN.findall(sentence))
+            if length:
+                sentence_owner.append(position)
+                sentence_lengths.append(length)
+
+        vocabulary = set(tokens)
+        content = [token for token in tokens if token not in FUNCTION_WORDS]
+        words[position] = len(tokens)
+        types[position] = len(vocabulary)
+        characters[position] = sum(len(token) for token in tokens)
+        content_words[position] = len(content)
+        rare_words[position] = sum(
+            1 for token in content if token not in COMMON_WORDS and token.rstrip("s") not in COMMON_WORDS
+        )
+        markers[position] = (
+            sum(1 for token in tokens if token in COHESION_MARKERS)
+            + len(_COHESION_PHRASE_PATTERN.findall(essay.lower()))
+        )
+        paragraphs[position] = max(len(split_paragraphs(essay)), 1)
+
+        keywords = keyword_cache.get(prompt_text)
+        if keywords is None:
+            keywords = keyword_cache[prompt_text] = _prompt_keywords(prompt_text)
+        if keywords:
+            used = {token.rstrip("s") for token in vocabulary}
+            overlap[position] = len(keywords & used) / len(keywords)
+
+    owners = np.array(sentence_owner, dtype=np.int64)
+    lengths = np.array(sentence_lengths, dtype=np.float64)
+    sentences = np.bincount(owners, minlength=count).astype(np.float64)
+    length_sum = np.bincount(owners, weights=lengths, minlength=count)
+    length_sq_sum = np.bincount(owners, weights=lengths * lengths, minlength=count)
+
+    safe_sentences = np.maximum(sentences, 1)
+    safe_words = np.maximum(words, 1)
+    mean_length = length_sum / safe_sentences
+    std_length = np.sqrt(np.maximum(length_sq_sum / safe_sentences - mean_length ** 2, 0))
+
+    if word_ranges is None:
+        word_ranges = [(DEFAULT_WORD_COUNT_MIN, DEFAULT_WORD_COUNT_MAX)] * count
+    ranges = np.array(word_ranges, dtype=np.float64).reshape(count, 2)
+    minimum = np.maximum(ranges[:, 0], 1)
+    ceiling = np.maximum(ranges[:, 1], minimum) * 1.5
+
+    return np.column_stack([
+        np.minimum(words / minimum, 1.0),
+        np.maximum(words - ceiling, 0) / ceiling,
+        types / np.sqrt(safe_words) / 10,
+        rare_words / np.maximum(content_words, 1),
+        characters / safe_words / 10,
+        np.minimum(mean_length / 30, 1.0),
+        std_length / np.maximum(mean_length, 1),
+        np.minimum(markers / safe_sentences, 1.0),
+        np.minimum(paragraphs / 5, 1.0),
+        overlap,
+    ])
+
+
+def round_band(scores: np.ndarray) -> np.ndarray:
+    """Clip to 0-9 and round to IELTS half bands"""
+    return np.round(np.clip(scores, 0, 9) * 2) / 2
+
+
+class EssayPreScoreModel:
+    """Linear map from essay features to rubric scores"""
+
+    def __init__(self, intercepts: Sequence[float], weights: Sequence[Sequence[float]]):
+        self.intercepts = np.array(intercepts, dtype=np.float64)
+        self.weights = np.array(weights, dtype=np.float64)
+
+    @classmethod
+    def default(cls) -> "EssayPreScoreModel":
+        return cls(DEFAULT_INTERCEPTS, DEFAULT_WEIGHTS)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EssayPreScoreModel":
+        if list(data.get("features", [])) != list(FEATURE_NAMES):
+            # Stored for an older feature set; not usable
+            return cls.default()
+        return cls(data["intercepts"], data["weights"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "features": list(FEATURE_NAMES),
+            "criteria": list(CRITERIA),
+            "intercepts": self.intercepts.round(4).tolist(),
+            "weights": self.weights.round(4).tolist(),
+        }
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Raw (unrounded) criterion scores, one row per essay"""
+        return features @ self.weights.T + self.intercepts
+
+    @classmethod
+    def fit(cls, features: np.ndarray, targets: np.ndarray, alpha: float = RIDGE_ALPHA) -> "EssayPreScoreModel":
+        """Ridge regression on standardized features, stored in raw feature units"""
+        mean = features.mean(axis=0)
+        std = features.std(axis=0)
+        std[std == 0] = 1.0
+        standardized = (features - mean) / std
+        target_mean = targets.mean(axis=0)
+
+        gram = standardized.T @ standardized + alpha * np.eye(features.shape[1])
+        coefficients = np.linalg.solve(gram, standardized.T @ (targets - target_mean))
+
+        weights = (coefficients / std[:, None]).T
+        intercepts = target_mean - weights @ mean
+        return cls(intercepts, weights)
+
+
+_model: Optional[EssayPreScoreModel] = None
+_model_lock = threading.Lock()
+
+
+class EssayPreScorer:
+    @staticmethod
+    def get_model() -> EssayPreScoreModel:
+        """The loaded model, or the default weights before load_model runs"""
+        return _model or EssayPreScoreModel.default()
+
+    @staticmethod
+    def load_model(db: Session, force: bool = False) -> EssayPreScoreModel:
+        """Load the calibrated model once per process"""
+        global _model
+        with _model_lock:
+            if _model is None or force:
+                row = db.query(EssayScorerModel).filter(EssayScorerModel.name == MODEL_NAME).first()
+                _model = EssayPreScoreModel.from_dict(row.model) if row else EssayPreScoreModel.default()
+            return _model
+
+    @staticmethod
+    def score_batch(
+        essays: Sequence[str],
+        prompts: Sequence[str],
+        word_ranges: Optional[Sequence[Tuple[int, int]]] = None,
+        model: Optional[EssayPreScoreModel] = None
+    ) -> List[Dict[str, float]]:
+        """Rubric estimates (half bands) for many essays at once"""
+        if not essays:
+            return []
+        model = model or EssayPreScorer.get_model()
+        criteria = round_band(model.predict(extract_essay_features(essays, prompts, word_ranges)))
+        overall = np.round(criteria.mean(axis=1) * 2) / 2
+        return [
+            {
+                **{criterion: float(value) for criterion, value in zip(CRITERIA, row)},
+                "overall_score": float(total),
+            }
+            for row, total in zip(criteria, overall)
+        ]
+
+    @staticmethod
+    def score(
+        content: str,
+        prompt_text: str,
+        word_count_min: Optional[int] = None,
+        word_count_max: Optional[int] = None
+    ) -> Dict[str, float]:
+        """Rubric estimate for one essay"""
+        word_range = (
+            word_count_min or DEFAULT_WORD_COUNT_MIN,
+            word_count_max or DEFAULT_WORD_COUNT_MAX
+        )
+        return EssayPreScorer.score_batch([content], [prompt_text], [word_range])[0]
+
+    @staticmethod
+    def calibrate(db: Session, limit: int = 50000, alpha: float = RIDGE_ALPHA) -> Dict[str, Any]:
+        """
+        Fit the model to the most recent LLM-scored essays and store it
+        Reports holdout mean absolute error for the fitted and default models.
+        """
+        rows = (
+            db.query(
+                stored_value(Essay.content),
+                EssayPrompt.prompt_text,
+                EssayPrompt.word_count_min,
+                EssayPrompt.word_count_max,
+                *[getattr(Essay, criterion) for criterion in CRITERIA]
+            )
+            .outerjoin(EssayPrompt, EssayPrompt.id == Essay.prompt_id)
+            .filter(
+                Essay.overall_score.isnot(None),
+                # Legacy rows predate the scorer column; placeholder scores never train the model
+                (Essay.scorer.is_(None)) | (Essay.scorer.notin_(["mock", PRESCORER]))
+            )
+            .order_by(Essay.id.desc())
+            .limit(limit)
+            .yield_per(CALIBRATION_BATCH_SIZE)
+        )
+
+        feature_batches, target_batches = [], []
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= CALIBRATION_BATCH_SIZE:
+                feature_batches.append(EssayPreScorer._batch_features(db, batch))
+                target_batches.append(EssayPreScorer._batch_targets(batch))
+                batch = []
+        if batch:
+            feature_batches.append(EssayPreScorer._batch_features(db, batch))
+            target_batches.append(EssayPreScorer._batch_targets(batch))
+
+        if not feature_batches:
+            raise ValueError("No scored essays to calibrate against")
+
+        features = np.vstack(feature_batches)
+        targets = np.vstack(target_batches)
+        sample_size = len(features)
+        if sample_size < 2 * len(FEATURE_NAMES):
+            raise ValueError(f"Need at least {2 * len(FEATURE_NAMES)} scored essays, found {sample_size}")
+
+        order = np.random.default_rng(0).permutation(sample_size)
+        holdout = order[:max(1, int(sample_size * HOLDOUT_FRACTION))]
+        train = order[len(holdout):]
+
+        fitted = EssayPreScoreModel.fit(features[train], targets[train], alpha)
+        metrics = {
+            "sample_size": sample_size,
+            "holdout_size": len(holdout),
+            "holdout_mae": EssayPreScorer._mae(fitted, features[holdout], targets[holdout]),
+            "default_holdout_mae": EssayPreScorer._mae(
+                EssayPreScoreModel.default(), features[holdout], targets[holdout]
+            ),
+        }
+
+        # Refit on everything for the stored model
+        model = EssayPreScoreModel.fit(features, targets, alpha)
+        row = db.query(EssayScorerModel).filter(EssayScorerModel.name == MODEL_NAME).first()
+        if row is None:
+            row = EssayScorerModel(name=MODEL_NAME)
+            db.add(row)
+        row.model = model.to_dict()
+        row.metrics = metrics
+        row.sample_size = sample_size
+        row.trained_at = datetime.utcnow()
+        db.commit()
+
+        EssayPreScorer.load_model(db, force=True)
+        return metrics
+
+    @staticmethod
+    def _batch_features(db: Session, rows) -> np.ndarray:
+        return extract_essay_features(
+            BlobStore.load_texts(db, [row[0] for row in rows]),
+            [row[1] or "" for row in rows],
+            [(row[2] or DEFAULT_WORD_COUNT_MIN, row[3] or DEFAULT_WORD_COUNT_MAX) for row in rows]
+        )
+
+    @staticmethod
+    def _batch_targets(rows) -> np.ndarray:
+        return np.array([[float(value) for value in row[4:]] for row in rows], dtype=np.float64)
+
+    @staticmethod
+    def _mae(model: EssayPreScoreModel, features: np.ndarray, targets: np.ndarray) -> Dict[str, float]:
+        errors = np.abs(round_band(model.predict(features)) - targets).mean(axis=0)
+        return {criterion: round(float(error), 3) for criterion, error in zip(CRITERIA, errors)}
@@ -0,0 +1,232 @@
+"""
+Bulk re-scoring of stored essays
+Walks essays in keyset-paginated batches, scores each batch concurrently
+through the shared rate-limited Gemini client, writes the batch back in
+one statement and checkpoints the last finished essay id so an
+interrupted run resumes where it stopped. Checkpoints are kept per
+scorer version, so a prompt or model bump starts again from the first
+essay
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.models.analytics import JobWatermark
+from app.models.writing import Essay, EssayPrompt
+from app.services.blob_store import BlobStore, stored_value
+from app.services.essay_score_cache import EssayScoreCache
+from app.services.gemini_client import ScoringUnavailableError
+from app.services.gemini_service import GeminiService, SCORER_VERSION
+from app.services.percentile_service import PercentileService
+from app.services.sketch_service import SketchService
+from app.services.writing_stats_service import WritingStatsService
+
+JOB_NAME = "essay_rescore"
+
+DEFAULT_BATCH_SIZE = 200
+
+# Score changes at least this large count as "changed" in the report
+SCORE_CHANGE_THRESHOLDS = (0.5, 1.0)
+
+
+def _distribution(scores: np.ndarray) -> Optional[Dict[str, float]]:
+    if scores.size == 0:
+        return None
+    p10, p50, p90 = np.percentile(scores, [10, 50, 90])
+    return {
+        "mean": round(float(scores.mean()), 3),
+        "p10": round(float(p10), 2),
+        "p50": round(float(p50), 2),
+        "p90": round(float(p90), 2),
+    }
+
+
+def compare_scores(old_scores: List[float], new_scores: List[float]) -> Dict[str, Any]:
+    """Old vs new overall score distributions for essays that had an old score"""
+    old = np.asarray(old_scores, dtype=np.float64)
+    new = np.asarray(new_scores, dtype=np.float64)
+    diff = np.abs(new - old)
+    return {
+        "compared": int(old.size),
+        "old": _distribution(old),
+        "new": _distribution(new),
+        "mean_shift": round(float((new - old).mean()), 3) if old.size else None,
+        "mean_abs_diff": round(float(diff.mean()), 3) if old.size else None,
+        "changed_share": {
+            str(threshold): round(float((diff >= threshold).mean()), 4) if old.size else None
+            for threshold in SCORE_CHANGE_THRESHOLDS
+        },
+    }
+
+
+class EssayRescoringService:
+    @staticmethod
+    def checkpoint_name(job_name: str = JOB_NAME) -> str:
+        """Watermark row for a job under the current scorer version"""
+        return f"{job_name}:{SCORER_VERSION}"
+
+    @staticmethod
+    def get_watermark(db: Session, job_name: str = JOB_NAME) -> JobWatermark:
+        name = EssayRescoringService.checkpoint_name(job_name)
+        watermark = db.query(JobWatermark).filter(JobWatermark.job_name == name).first()
+        if watermark is None:
+            watermark = JobWatermark(job_name=name, last_id=0)
+            db.add(watermark)
+        return watermark
+
+    @staticmethod
+    def fetch_batch(db: Session, after_id: int, batch_size: int, only_stale: bool) -> List[Any]:
+        """
+        Next batch of essays after an id, projected to the columns scoring needs
+        content is the stored value; resolve it with BlobStore.load_texts.
+        """
+        query = (
+            db.query(
+                Essay.id,
+                Essay.user_id,
+                stored_value(Essay.content),
+                Essay.word_count,
+                Essay.overall_score,
+                Essay.prompt_id,
+                EssayPrompt.essay_type,
+                EssayPrompt.prompt_text
+            )
+            .outerjoin(EssayPrompt, Essay.prompt_id == EssayPrompt.id)
+            .filter(Essay.id > after_id)
+        )
+        if only_stale:
+            query = query.filter(or_(Essay.scorer.is_(None), Essay.scorer != SCORER_VERSION))
+        return query.order_by(Essay.id).limit(batch_size).all()
+
+    @staticmethod
+    def run(
+        db: Session,
+        job_name: str = JOB_NAME,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: Optional[int] = None,
+        dry_run: bool = False,
+        limit: Optional[int] = None,
+        only_stale: bool = True,
+        restart: bool = False,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Re-score essays from the job's checkpoint onwards
+
+        Failed essays hold the checkpoint back so a resumed run retries
+        them; with only_stale the essays already rescored past them are
+        skipped cheaply. A scorer outage stops the run. restart ignores the
+        checkpoint. Dry runs score without writing anything or moving the
+        checkpoint.
+        """
+        if not dry_run and not settings.gemini_api_key:
+            raise ValueError("GEMINI_API_KEY is not set; refusing to overwrite scores with placeholders")
+
+        concurrency = concurrency or settings.gemini_max_concurrency
+        watermark = EssayRescoringService.get_watermark(db, job_name)
+        start_id = 0 if restart else (watermark.last_id or 0)
+        db.commit()
+
+        cursor = start_id
+        checkpoint = start_id
+        blocked = False  # a failure is holding the checkpoint back
+        totals = {"scanned": 0, "rescored": 0, "failed": 0}
+        old_scores: List[float] = []
+        new_scores: List[float] = []
+        errors: Dict[int, str] = {}
+        aborted: Optional[str] = None
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="rescore") as executor:
+            while aborted is None:
+                size = batch_size if limit is None else min(batch_size, limit - totals["scanned"])
+                if size <= 0:
+                    break
+                rows = EssayRescoringService.fetch_batch(db, cursor, size, only_stale)
+                if not rows:
+                    break
+
+                contents = BlobStore.load_texts(db, [row.content for row in rows])
+                outcomes = list(executor.map(EssayRescoringService._score_row, rows, contents))
+                updates = []
+                essay_ids = set()
+                for row, (result, error) in zip(rows, outcomes):
+                    if error is None:
+                        essay_ids.add(row.id)
+                        updates.append(EssayRescoringService._update_mapping(row.id, result))
+                        if row.overall_score is not None:
+                            old_scores.append(float(row.overall_score))
+                            new_scores.append(float(result["overall_score"]))
+                        if not blocked:
+                            checkpoint = row.id
+                        continue
+
+                    blocked = True
+                    totals["failed"] += 1
+                    errors[row.id] = str(error)
+                    if isinstance(error, ScoringUnavailableError) and aborted is None:
+                        aborted = str(error)
+
+                totals["scanned"] += len(rows)
+                totals["rescored"] += len(updates)
+                cursor = rows[-1].id
+
+                if not dry_run:
+                    if updates:
+                        db.bulk_update_mappings(Essay, updates)
+                        WritingStatsService.refresh(
+                            db, {row.user_id for row in rows if row.id in essay_ids}
+                        )
+                    watermark.last_id = checkpoint
+                    db.commit()
+
+                    for row, (result, error) in zip(rows, outcomes):
+                        if error is None:
+                            PercentileService.record_essay_score(
+                                row.prompt_id, row.essay_type, result["overall_score"], row.overall_score
+                            )
+                    SketchService.flush(db)
+
+                if progress is not None:
+                    progress({**totals, "last_id": cursor, "checkpoint": checkpoint})
+
+        return {
+            **totals,
+            "start_id": start_id,
+            "checkpoint": start_id if dry_run else checkpoint,
+            "dry_run": dry_run,
+            "aborted": aborted,
+            "errors": errors,
+            "comparison": compare_scores(old_scores, new_scores),
+        }
+
+    @staticmethod
+    def _score_row(row: Any, content: str):
+        prompt_text = row.prompt_text or ""
+        try:
+            result = EssayScoreCache.get_or_score(
+                content,
+                prompt_text,
+                lambda: GeminiService.score_essay(content, prompt_text, row.word_count)
+            )
+            return result, None
+        except Exception as e:
+            return None, e
+
+    @staticmethod
+    def _update_mapping(essay_id: int, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": essay_id,
+            "task_response_score": Decimal(str(result["task_response_score"])),
+            "coherence_cohesion_score": Decimal(str(result["coherence_cohesion_score"])),
+            "lexical_resource_score": Decimal(str(result["lexical_resource_score"])),
+            "grammatical_range_score": Decimal(str(result["grammatical_range_score"])),
+            "overall_score": Decimal(str(result["overall_score"])),
+            "ai_feedback": result["feedback"],
+            "scorer": result.get("scorer"),
+        }
@@ -0,0 +1,330 @@
+"""
+Content-addressed cache for essay scores
+Resubmitting the same essay for the same prompt reuses the stored result
+instead of paying for another LLM call, and identical submissions that
+arrive together share a single in-flight call
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.models.writing import EssayScoreCache as EssayScoreCacheRow
+from app.services.gemini_service import MOCK_SCORER, SCORER_VERSION
+
+MEMORY_CACHE_SIZE = 1024
+
+# The database backend deletes expired and surplus rows every this many writes
+PRUNE_EVERY_WRITES = 500
+
+# Followers give up on a coalesced call after this long and score on their own
+COALESCE_TIMEOUT_SECONDS = 120
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize Unicode and whitespace so trivial edits hash identically"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+def essay_cache_key(content: str, prompt_text: str, scorer_version: str = SCORER_VERSION) -> str:
+    """Hash of the scorer version, prompt and essay"""
+    digest = hashlib.sha256()
+    for part in (scorer_version, normalize_text(prompt_text), normalize_text(content)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class MemoryScoreCacheBackend:
+    """Per-process LRU with expiry"""
+
+    def __init__(self, max_entries: int = MEMORY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[datetime, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if expires_at <= _utcnow():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def set(self, key: str, result: Dict[str, Any], ttl: timedelta):
+        with self._lock:
+            self._entries[key] = (_utcnow() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DatabaseScoreCacheBackend:
+    """Rows in essay_score_cache, shared by every API and worker process"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            row = (
+                db.query(EssayScoreCacheRow.result)
+                .filter(
+                    EssayScoreCacheRow.cache_key == key,
+                    EssayScoreCacheRow.expires_at > _utcnow()
+                )
+                .first()
+            )
+            return row[0] if row else None
+        finally:
+            db.close()
+
+    def set(self, key: str, result: Dict[str, Any], ttl: timedelta):
+        values = {
+            "cache_key": key,
+            "scorer_version": result.get("scorer", SCORER_VERSION),
+            "result": result,
+            "expires_at": _utcnow() + ttl,
+        }
+        db = SessionLocal()
+        try:
+            if db.bind.dialect.name == "postgresql":
+                statement = postgresql.insert(EssayScoreCacheRow).values(values)
+                db.execute(statement.on_conflict_do_update(
+                    index_elements=["cache_key"],
+                    set_={
+                        "scorer_version": statement.excluded.scorer_version,
+                        "result": statement.excluded.result,
+                        "expires_at": statement.excluded.expires_at,
+                    }
+                ))
+            else:
+                db.merge(EssayScoreCacheRow(**values))
+            db.commit()
+        except IntegrityError:
+            # Another worker stored the same key first
+            db.rollback()
+        finally:
+            db.close()
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % PRUNE_EVERY_WRITES == 0
+        if prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """Delete expired rows, then the oldest rows beyond max_entries"""
+        db = SessionLocal()
+        try:
+            deleted = (
+                db.query(EssayScoreCacheRow)
+                .filter(EssayScoreCacheRow.expires_at <= _utcnow())
+                .delete(synchronize_session=False)
+            )
+            surplus = db.query(EssayScoreCacheRow).count() - self.max_entries
+            if surplus > 0:
+                oldest = (
+                    db.query(EssayScoreCacheRow.cache_key)
+                    .order_by(EssayScoreCacheRow.created_at)
+                    .limit(surplus)
+                    .subquery()
+                )
+                deleted += (
+                    db.query(EssayScoreCacheRow)
+                    .filter(EssayScoreCacheRow.cache_key.in_(select(oldest.c.cache_key)))
+                    .delete(synchronize_session=False)
+                )
+            db.commit()
+            return deleted
+        except Exception as e:
+            db.rollback()
+            print(f"Error pruning essay score cache: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def clear(self):
+        db = SessionLocal()
+        try:
+            db.query(EssayScoreCacheRow).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+class TieredScoreCacheBackend:
+    """Process-local LRU in front of a shared backend"""
+
+    def __init__(self, local: MemoryScoreCacheBackend, shared):
+        self.local = local
+        self.shared = shared
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        result = self.local.get(key)
+        if result is None:
+            result = self.shared.get(key)
+            if result is not None:
+                # The shared row owns the real expiry; keep local copies short-lived
+                self.local.set(key, result, timedelta(minutes=10))
+        return result
+
+    def set(self, key: str, result: Dict[str, Any], ttl: timedelta):
+        self.shared.set(key, result, ttl)
+        self.local.set(key, result, ttl)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+
+def _build_backend(name: str):
+    if name == "none":
+        return None
+    if name == "memory":
+        return MemoryScoreCacheBackend()
+    if name == "database":
+        return TieredScoreCacheBackend(
+            MemoryScoreCacheBackend(),
+            DatabaseScoreCacheBackend(settings.essay_score_cache_max_entries)
+        )
+    raise ValueError(f"Unknown essay score cache backend: {name}")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_in_flight: Dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
+
+
+class EssayScoreCache:
+    @staticmethod
+    def get_backend():
+        """Get the configured backend, building it on first use"""
+        global _backend
+        with _backend_lock:
+            if _backend is None:
+                _backend = _build_backend(settings.essay_score_cache_backend)
+            return _backend
+
+    @staticmethod
+    def set_backend(backend):
+        """Swap the backend (None disables caching)"""
+        global _backend
+        with _backend_lock:
+            _backend = backend
+
+    @staticmethod
+    def get_or_score(
+        content: str,
+        prompt_text: str,
+        score: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Return a cached score or run the scorer once per distinct essay
+        Concurrent callers with the same key wait for the first caller's
+        result. Placeholder (mock) results are never cached.
+        """
+        backend = EssayScoreCache.get_backend()
+        if backend is None:
+            return score()
+
+        key = essay_cache_key(content, prompt_text)
+        cached = EssayScoreCache._read(backend, key)
+        if cached is not None:
+            return cached
+
+        with _in_flight_lock:
+            future = _in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = _in_flight[key] = Future()
+
+        if not leader:
+            try:
+                return future.result(timeout=COALESCE_TIMEOUT_SECONDS)
+            except FutureTimeoutError:
+                return score()
+
+        try:
+            result = score()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with _in_flight_lock:
+                _in_flight.pop(key, None)
+
+        EssayScoreCache._write(backend, key, result)
+        return result
+
+    @staticmethod
+    def lookup(
+        content: str, prompt_text: str, scorer_version: str = SCORER_VERSION
+    ) -> Optional[Dict[str, Any]]:
+        """Get a cached score without scoring on a miss"""
+        backend = EssayScoreCache.get_backend()
+        if backend is None:
+            return None
+        return EssayScoreCache._read(backend, essay_cache_key(content, prompt_text, scorer_version))
+
+    @staticmethod
+    def store(
+        content: str, prompt_text: str, result: Dict[str, Any], scorer_version: str = SCORER_VERSION
+    ):
+        """
+        Cache a score produced outside get_or_score (e.g. a streamed one)
+        A different scorer_version keeps other analyses of a text (such as
+        per-paragraph ones) apart from whole-essay scores.
+        """
+        backend = EssayScoreCache.get_backend()
+        if backend is not None:
+            EssayScoreCache._write(backend, essay_cache_key(content, prompt_text, scorer_version), result)
+
+    @staticmethod
+    def _read(backend, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return backend.get(key)
+        except Exception as e:
+            print(f"Error reading essay score cache: {e}")
+            return None
+
+    @staticmethod
+    def _write(backend, key: str, result: Dict[str, Any]):
+        # Placeholder scores must never be served as real ones
+        if result.get("scorer") == MOCK_SCORER:
+            return
+        try:
+            backend.set(key, result, timedelta(seconds=settings.essay_score_cache_ttl_seconds))
+        except Exception as e:
+            print(f"Error writing essay score cache: {e}")
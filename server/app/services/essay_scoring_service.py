@@ -0,0 +1,474 @@
+"""
+Asynchronous essay scoring
+Essays are stored on submit and scored later by background workers that
+claim rows from essay_scoring_jobs, so a slow LLM round trip never holds
+an API worker
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import case
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.quest import UserBadge
+from app.models.writing import Essay, EssayScoringJob
+from app.services.badge_service import BadgeService
+from app.services.essay_score_cache import EssayScoreCache
+from app.services.feedback_parser import result_sections
+from app.services.gemini_client import ScoringUnavailableError
+from app.services.gemini_service import GeminiService
+from app.services.percentile_service import PercentileService
+from app.services.quest_service import QuestService
+from app.services.revision_feedback_service import RevisionFeedbackService
+from app.services.sketch_service import SketchService
+from app.services.writing_stats_service import WritingStatsService, score_snapshot
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+TERMINAL_STATUSES = {JOB_COMPLETED, JOB_FAILED}
+
+MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = timedelta(seconds=30)
+
+# A job submitted for streaming waits this long for its stream to connect
+# before the worker pool scores it instead
+STREAM_CLAIM_GRACE = timedelta(seconds=15)
+
+# Floor on how long a job waits when the scorer is unavailable
+MIN_UNAVAILABLE_DELAY = timedelta(seconds=5)
+
+# Queued jobs older than this are claimed ahead of every priority class,
+# so boss and quest traffic cannot starve practice and duplicate essays
+PRIORITY_AGING = timedelta(minutes=10)
+
+# Running jobs older than this are assumed to belong to a crashed worker
+STALE_JOB_TIMEOUT = timedelta(minutes=10)
+
+# Set whenever a job is queued in this process so idle workers wake early
+_work_available = threading.Event()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _badge_payload(user_badge: UserBadge) -> Dict[str, Any]:
+    return {
+        "id": user_badge.badge.id,
+        "name": user_badge.badge.name,
+        "description": user_badge.badge.description,
+        "badge_type": user_badge.badge.badge_type,
+        "icon_url": user_badge.badge.icon_url,
+    }
+
+
+class EssayScoringService:
+    @staticmethod
+    def enqueue(
+        db: Session,
+        essay: Essay,
+        stream: bool = False,
+        provisional_scores: Optional[Dict[str, float]] = None,
+        near_duplicates: Optional[List[Dict[str, Any]]] = None,
+        priority: int = 2,
+        fair_rank: int = 0
+    ) -> EssayScoringJob:
+        """Queue scoring for an essay (does not commit); see ScoringScheduler for priority and fair_rank"""
+        available_at = _utcnow()
+        if stream:
+            available_at += STREAM_CLAIM_GRACE
+        job = EssayScoringJob(
+            essay=essay,
+            user_id=essay.user_id,
+            status=JOB_QUEUED,
+            priority=priority,
+            fair_rank=fair_rank,
+            attempts=0,
+            available_at=available_at,
+            provisional_scores=provisional_scores,
+            near_duplicates=near_duplicates or None
+        )
+        db.add(job)
+        return job
+
+    @staticmethod
+    def notify_workers():
+        """Wake idle workers in this process after a commit"""
+        _work_available.set()
+
+    @staticmethod
+    def wait_for_work(timeout: float) -> bool:
+        """Block until work is queued in this process or the timeout passes"""
+        woken = _work_available.wait(timeout)
+        _work_available.clear()
+        return woken
+
+    @staticmethod
+    def get_job(db: Session, job_id: int, user_id: int) -> Optional[EssayScoringJob]:
+        """Get a scoring job owned by a user"""
+        return (
+            db.query(EssayScoringJob)
+            .filter(EssayScoringJob.id == job_id, EssayScoringJob.user_id == user_id)
+            .first()
+        )
+
+    @staticmethod
+    def claim_next_job(db: Session) -> Optional[EssayScoringJob]:
+        """
+        Claim the next runnable job by priority, then fair-share rank, then age
+        Jobs queued for longer than PRIORITY_AGING go ahead of every
+        priority. SKIP LOCKED lets several workers (and processes) poll the
+        same table without handing out a job twice.
+        """
+        now = _utcnow()
+        effective_priority = case(
+            (EssayScoringJob.created_at <= now - PRIORITY_AGING, -1),
+            else_=EssayScoringJob.priority
+        )
+        job = (
+            db.query(EssayScoringJob)
+            .filter(
+                EssayScoringJob.status == JOB_QUEUED,
+                EssayScoringJob.available_at <= now
+            )
+            .order_by(effective_priority, EssayScoringJob.fair_rank, EssayScoringJob.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            db.commit()
+            return None
+
+        job.status = JOB_RUNNING
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = now
+        db.commit()
+        return job
+
+    @staticmethod
+    def apply_scores(db: Session, essay: Essay, ai_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Copy a scorer result onto an essay and the user's stats (does not commit)
+        Returns the scores it replaced, for record_percentiles once committed.
+        """
+        previous = score_snapshot(essay)
+        essay.task_response_score = Decimal(str(ai_result["task_response_score"]))
+        essay.coherence_cohesion_score = Decimal(str(ai_result["coherence_cohesion_score"]))
+        essay.lexical_resource_score = Decimal(str(ai_result["lexical_resource_score"]))
+        essay.grammatical_range_score = Decimal(str(ai_result["grammatical_range_score"]))
+        essay.overall_score = Decimal(str(ai_result["overall_score"]))
+        essay.ai_feedback = ai_result["feedback"]
+        essay.scorer = ai_result.get("scorer")
+        WritingStatsService.record_scores(db, essay, previous)
+        return previous
+
+    @staticmethod
+    def record_percentiles(essay: Essay, previous: Dict[str, Any]):
+        """Move a committed essay's score in the percentile sketches"""
+        PercentileService.record_essay_score(
+            essay.prompt_id,
+            essay.prompt.essay_type if essay.prompt else None,
+            essay.overall_score,
+            previous.get("overall_score")
+        )
+
+    @staticmethod
+    def claim_job(db: Session, job_id: int, user_id: int) -> Optional[EssayScoringJob]:
+        """Claim one specific queued job (used by streaming requests)"""
+        job = (
+            db.query(EssayScoringJob)
+            .filter(
+                EssayScoringJob.id == job_id,
+                EssayScoringJob.user_id == user_id,
+                EssayScoringJob.status == JOB_QUEUED
+            )
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            db.commit()
+            return None
+
+        job.status = JOB_RUNNING
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = _utcnow()
+        db.commit()
+        return job
+
+    @staticmethod
+    def run_job(db: Session, job: EssayScoringJob):
+        """Score a claimed job's essay, then award quest progress and badges"""
+        essay = EssayScoringService._load_essay(db, job)
+        if essay is None:
+            return
+
+        try:
+            prompt_text = essay.prompt.prompt_text if essay.prompt else ""
+            ai_result = EssayScoringService._score(db, essay, prompt_text)
+            previous = EssayScoringService.apply_scores(db, essay, ai_result)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            EssayScoringService._retry_or_fail(db, job, e)
+            return
+
+        EssayScoringService.record_percentiles(essay, previous)
+        EssayScoringService._complete(db, job, essay)
+
+    @staticmethod
+    def _score(db: Session, essay: Essay, prompt_text: str) -> Dict[str, Any]:
+        """
+        Score a revision from its parent's feedback when possible, else the whole essay
+        A cached full score wins over incremental scoring. Incremental
+        results are approximations, so they stay out of the full-essay cache.
+        """
+        cached = EssayScoreCache.lookup(essay.content, prompt_text)
+        if cached is not None:
+            return cached
+
+        parent = None
+        if essay.parent_essay_id:
+            parent = db.query(Essay).filter(Essay.id == essay.parent_essay_id).first()
+        if parent is not None and parent.overall_score is not None and parent.ai_feedback:
+            try:
+                ai_result = RevisionFeedbackService.score_revision(
+                    essay.content,
+                    prompt_text,
+                    essay.word_count,
+                    parent.content,
+                    {**EssayScoringService.essay_result(parent), "scorer": parent.scorer}
+                )
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"Incremental revision scoring failed for essay {essay.id}, scoring in full: {e}")
+                ai_result = None
+            if ai_result is not None:
+                return ai_result
+
+        return EssayScoreCache.get_or_score(
+            essay.content,
+            prompt_text,
+            lambda: GeminiService.score_essay(essay.content, prompt_text, essay.word_count)
+        )
+
+    @staticmethod
+    def stream_job(db: Session, job: EssayScoringJob) -> Iterator[Tuple[str, Any]]:
+        """
+        Score a claimed job with the streaming API
+        Yields (section, payload) as feedback arrives and ("complete", job
+        result) once the scores are stored. On failure the job is requeued
+        or failed as in run_job and ("error", details) is yielded. If the
+        consumer stops reading before the scores are stored, the job goes
+        back to the queue for the worker pool.
+        """
+        essay = EssayScoringService._load_essay(db, job)
+        if essay is None:
+            yield "error", {"status": job.status, "error": job.last_error}
+            return
+
+        job_id, claimed_at = job.id, job.started_at
+        prompt_text = essay.prompt.prompt_text if essay.prompt else ""
+        settled = False
+        try:
+            ai_result = EssayScoreCache.lookup(essay.content, prompt_text)
+            if ai_result is not None:
+                yield from result_sections(ai_result)
+            else:
+                for section, payload in GeminiService.stream_score_essay(
+                    essay.content, prompt_text, essay.word_count
+                ):
+                    if section == "result":
+                        ai_result = payload
+                    else:
+                        yield section, payload
+                EssayScoreCache.store(essay.content, prompt_text, ai_result)
+
+            previous = EssayScoringService.apply_scores(db, essay, ai_result)
+            db.commit()
+            settled = True
+        except Exception as e:
+            db.rollback()
+            EssayScoringService._retry_or_fail(db, job, e)
+            settled = True
+            yield "error", {"status": job.status, "error": str(e)}
+            return
+        finally:
+            if not settled:
+                try:
+                    EssayScoringService.release_job(db, job_id, claimed_at)
+                except Exception as e:
+                    print(f"Error releasing essay scoring job {job_id}: {e}")
+
+        EssayScoringService.record_percentiles(essay, previous)
+        EssayScoringService._complete(db, job, essay)
+        yield "complete", {"essay_id": essay.id, **(job.result or {})}
+
+    @staticmethod
+    def follow_job(
+        db: Session, job: EssayScoringJob, timeout: float, poll_interval: float
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Report on a job another worker is scoring
+        Yields ("status", ...) on changes, (None, None) as a keep-alive
+        while waiting, and the stored sections plus ("complete", ...) if the
+        job finishes within timeout.
+        """
+        deadline = time.monotonic() + timeout
+        last_status = None
+        while True:
+            if job.status != last_status:
+                last_status = job.status
+                yield "status", {"status": job.status}
+            if job.status in TERMINAL_STATUSES or time.monotonic() >= deadline:
+                break
+            time.sleep(poll_interval)
+            db.refresh(job)
+            yield None, None
+
+        if job.status == JOB_COMPLETED:
+            essay = job.essay
+            db.refresh(essay)
+            yield from result_sections(EssayScoringService.essay_result(essay))
+            yield "complete", {"essay_id": essay.id, **(job.result or {})}
+        elif job.status == JOB_FAILED:
+            yield "error", {"status": job.status, "error": job.last_error}
+
+    @staticmethod
+    def essay_result(essay: Essay) -> Dict[str, Any]:
+        """Stored scores and feedback in the scorer result format"""
+        return {
+            "task_response_score": float(essay.task_response_score),
+            "coherence_cohesion_score": float(essay.coherence_cohesion_score),
+            "lexical_resource_score": float(essay.lexical_resource_score),
+            "grammatical_range_score": float(essay.grammatical_range_score),
+            "overall_score": float(essay.overall_score),
+            "feedback": essay.ai_feedback or {},
+        }
+
+    @staticmethod
+    def _load_essay(db: Session, job: EssayScoringJob) -> Optional[Essay]:
+        essay = (
+            db.query(Essay)
+            .options(selectinload(Essay.prompt))
+            .filter(Essay.id == job.essay_id)
+            .first()
+        )
+        if essay is None:
+            EssayScoringService._finish(db, job, JOB_FAILED, error="Essay not found")
+        return essay
+
+    @staticmethod
+    def _complete(db: Session, job: EssayScoringJob, essay: Essay):
+        """Award quest progress and badges for a scored essay and close the job"""
+        newly_earned_badges = []
+        try:
+            QuestService.update_quest_progress(
+                db,
+                job.user_id,
+                "essay_complete",
+                {"overall_score": float(essay.overall_score)}
+            )
+            newly_earned_badges = BadgeService.check_and_award_badges(db, job.user_id)
+        except Exception as e:
+            db.rollback()
+            print(f"Error awarding essay rewards for job {job.id}: {e}")
+
+        EssayScoringService._finish(
+            db,
+            job,
+            JOB_COMPLETED,
+            result={"newly_earned_badges": [_badge_payload(ub) for ub in newly_earned_badges]}
+        )
+
+        if SketchService.should_flush():
+            try:
+                SketchService.flush(db)
+            except Exception as e:
+                print(f"Error flushing score sketches: {e}")
+
+    @staticmethod
+    def release_job(db: Session, job_id: int, claimed_at: datetime) -> bool:
+        """
+        Return an abandoned claim to the queue without using up an attempt
+        Only the claim made at claimed_at is released, so a job another
+        worker has claimed since is left alone.
+        """
+        db.rollback()
+        released = (
+            db.query(EssayScoringJob)
+            .filter(
+                EssayScoringJob.id == job_id,
+                EssayScoringJob.status == JOB_RUNNING,
+                EssayScoringJob.started_at == claimed_at
+            )
+            .update(
+                {
+                    EssayScoringJob.status: JOB_QUEUED,
+                    EssayScoringJob.attempts: EssayScoringJob.attempts - 1,
+                    EssayScoringJob.available_at: _utcnow(),
+                },
+                synchronize_session=False
+            )
+        )
+        db.commit()
+        if released:
+            EssayScoringService.notify_workers()
+        return bool(released)
+
+    @staticmethod
+    def requeue_stale_jobs(db: Session) -> int:
+        """Return jobs stranded in 'running' by a crashed worker to the queue"""
+        requeued = (
+            db.query(EssayScoringJob)
+            .filter(
+                EssayScoringJob.status == JOB_RUNNING,
+                EssayScoringJob.started_at < _utcnow() - STALE_JOB_TIMEOUT
+            )
+            .update(
+                {EssayScoringJob.status: JOB_QUEUED, EssayScoringJob.available_at: _utcnow()},
+                synchronize_session=False
+            )
+        )
+        db.commit()
+        return requeued
+
+    @staticmethod
+    def _retry_or_fail(db: Session, job: EssayScoringJob, error: Exception):
+        if isinstance(error, ScoringUnavailableError):
+            # An outage is not the essay's fault: wait it out without using up attempts
+            job.status = JOB_QUEUED
+            job.attempts = max(0, job.attempts - 1)
+            job.last_error = str(error)
+            job.available_at = _utcnow() + max(
+                MIN_UNAVAILABLE_DELAY, timedelta(seconds=error.retry_after)
+            )
+            db.commit()
+            return
+
+        if job.attempts >= MAX_ATTEMPTS:
+            EssayScoringService._finish(db, job, JOB_FAILED, error=str(error))
+            return
+
+        job.status = JOB_QUEUED
+        job.last_error = str(error)
+        job.available_at = _utcnow() + RETRY_BASE_DELAY * (2 ** (job.attempts - 1))
+        db.commit()
+
+    @staticmethod
+    def _finish(
+        db: Session,
+        job: EssayScoringJob,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ):
+        job.status = status
+        job.result = result
+        job.last_error = error
+        job.completed_at = _utcnow()
+        db.commit()
@@ -0,0 +1,232 @@
+"""
+Parsing for scorer responses
+Extracts the JSON document from model output, repairs truncated JSON by
+cutting back to the last complete value, tracks which feedback sections
+are complete while a response is still streaming, and validates results
+against the rubric and EssayFeedback before they are stored
+"""
+
+import json
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, get_origin
+
+import numpy as np
+
+from app.api.schemas.writing import EssayFeedback
+from app.services.essay_prescorer import round_band
+
+SCORE_FIELDS = (
+    "task_response_score",
+    "coherence_cohesion_score",
+    "lexical_resource_score",
+    "grammatical_range_score",
+    "overall_score",
+)
+
+FEEDBACK_FIELDS = tuple(EssayFeedback.model_fields)
+LIST_FEEDBACK_FIELDS = frozenset(
+    name for name, field in EssayFeedback.model_fields.items() if get_origin(field.annotation) is list
+)
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def extract_json_text(response_text: str) -> str:
+    """Strip markdown code fences and prose around the JSON object"""
+    text = response_text.strip()
+    if "```json" in text:
+        start = text.find("```json") + 7
+        end = text.find("```", start)
+        text = text[start:end if end >= 0 else len(text)].strip()
+    elif "```" in text:
+        start = text.find("```") + 3
+        end = text.find("```", start)
+        text = text[start:end if end >= 0 else len(text)].strip()
+
+    start = text.find("{")
+    return text[start:] if start >= 0 else text
+
+
+def repair_truncated_json(text: str) -> Tuple[Optional[str], bool]:
+    """
+    Make a possibly truncated JSON object parseable
+    Returns (json_text, complete). Incomplete documents are cut back to the
+    last point where every value so far had ended, then closed.
+    """
+    stack: List[str] = []
+    in_string = escaped = False
+    cut_at, cut_stack = None, None
+
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+            cut_at, cut_stack = index + 1, list(stack)
+        elif char in "}]":
+            if not stack or stack[-1] != char:
+                return None, False
+            stack.pop()
+            if not stack:
+                return text[:index + 1], True
+            cut_at, cut_stack = index + 1, list(stack)
+        elif char == "," and stack:
+            cut_at, cut_stack = index, list(stack)
+
+    if cut_at is None:
+        return None, False
+    return text[:cut_at].rstrip().rstrip(",") + "".join(reversed(cut_stack)), False
+
+
+def parse_scorer_json(response_text: str) -> Dict[str, Any]:
+    """Parse a full scorer response, tolerating fences and truncation"""
+    text = extract_json_text(response_text)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        repaired, _ = repair_truncated_json(text)
+        if repaired is None:
+            raise
+        return json.loads(repaired)
+
+
+class CheckedResult(NamedTuple):
+    result: Dict[str, Any]  # valid fields only, scores as floats
+    missing_scores: List[str]
+    missing_feedback: List[str]
+
+
+def _score(value) -> Optional[float]:
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    return score if 0 <= score <= 9 else None
+
+
+def _feedback_value(field: str, value) -> Any:
+    """The field's value in EssayFeedback form, or None if unusable"""
+    if field in LIST_FEEDBACK_FIELDS:
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            return None
+        items = [item.strip() for item in value if isinstance(item, str) and item.strip()]
+        return items or None
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    return None
+
+
+def check_scorer_result(
+    document: Dict[str, Any], score_fields: Sequence[str] = SCORE_FIELDS
+) -> CheckedResult:
+    """
+    Validate a parsed scorer result
+    Scores must be numbers from 0 to 9 (numeric strings are accepted); a
+    missing overall score is derived from the four criteria. Feedback
+    fields must match EssayFeedback; unusable ones are reported missing
+    so only they need to be asked for again.
+    """
+    if not isinstance(document, dict):
+        raise ValueError("Scorer response is not a JSON object")
+
+    result = {key: value for key, value in document.items() if key not in score_fields and key != "feedback"}
+    missing_scores = []
+    for field in score_fields:
+        score = _score(document.get(field))
+        if score is None:
+            missing_scores.append(field)
+        else:
+            result[field] = score
+
+    criteria = [field for field in SCORE_FIELDS if field != "overall_score"]
+    if missing_scores == ["overall_score"] and all(field in result for field in criteria):
+        result["overall_score"] = float(round_band(np.mean([result[field] for field in criteria])))
+        missing_scores = []
+
+    raw_feedback = document.get("feedback")
+    raw_feedback = raw_feedback if isinstance(raw_feedback, dict) else {}
+    feedback, missing_feedback = {}, []
+    for field in FEEDBACK_FIELDS:
+        value = _feedback_value(field, raw_feedback.get(field))
+        if value is None:
+            missing_feedback.append(field)
+        else:
+            feedback[field] = value
+    if not missing_feedback:
+        feedback = EssayFeedback(**feedback).model_dump()
+    result["feedback"] = feedback
+
+    return CheckedResult(result, missing_scores, missing_feedback)
+
+
+class IncrementalFeedbackParser:
+    """
+    Feed streamed text and get back sections as they complete
+    Sections are "scores" (all rubric scores at once) and each feedback
+    field. A value counts as complete once a later sibling key has
+    started or its parent object has closed.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.emitted = set()
+        self.document: Dict[str, Any] = {}
+        self.complete = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.buffer += chunk
+        text = extract_json_text(self.buffer)
+        repaired, complete = repair_truncated_json(text)
+        if repaired is None:
+            return []
+        try:
+            document = json.loads(repaired)
+        except json.JSONDecodeError:
+            return []
+        if not isinstance(document, dict):
+            return []
+
+        self.document, self.complete = document, complete
+        return self._new_sections()
+
+    def _new_sections(self) -> List[Tuple[str, Any]]:
+        sections = []
+        top_complete = _completed_keys(self.document, self.complete)
+
+        if "scores" not in self.emitted and all(field in top_complete for field in SCORE_FIELDS):
+            self.emitted.add("scores")
+            sections.append(("scores", {field: self.document[field] for field in SCORE_FIELDS}))
+
+        feedback = self.document.get("feedback")
+        if isinstance(feedback, dict):
+            for key in _completed_keys(feedback, "feedback" in top_complete):
+                if key not in self.emitted:
+                    self.emitted.add(key)
+                    sections.append((key, feedback[key]))
+        return sections
+
+
+def result_sections(result: Dict[str, Any], skip=()) -> List[Tuple[str, Any]]:
+    """Split a finished result into the same sections the streaming parser emits"""
+    sections = []
+    if "scores" not in skip and all(field in result for field in SCORE_FIELDS):
+        sections.append(("scores", {field: result[field] for field in SCORE_FIELDS}))
+    for key, value in (result.get("feedback") or {}).items():
+        if key not in skip:
+            sections.append((key, value))
+    return sections
+
+
+def _completed_keys(obj: Dict[str, Any], closed: bool) -> List[str]:
+    keys = list(obj)
+    return keys if closed else keys[:-1]
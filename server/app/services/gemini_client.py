@@ -0,0 +1,280 @@
+"""
+Shared Gemini client with concurrency, rate and failure controls
+One model instance is reused across calls. Calls are capped by a
+semaphore and a token bucket sized to our quota, time out, retry
+transient errors with jittered backoff, and trip a circuit breaker so an
+outage fails fast instead of piling up blocked workers
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Iterator, Optional
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+from app.config.settings import settings
+
+# Errors worth retrying: throttling, overload, server faults and timeouts
+TRANSIENT_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    ConnectionError,
+    TimeoutError,
+    FutureTimeoutError,
+)
+
+RETRY_BASE_DELAY_SECONDS = 1.0
+RETRY_MAX_DELAY_SECONDS = 20.0
+
+
+class ScoringUnavailableError(Exception):
+    """The LLM cannot take requests right now; retry after retry_after seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LocalCapacityError(TimeoutError):
+    """Our own rate limit or concurrency cap was saturated; Gemini itself was not called"""
+
+
+class TokenBucket:
+    """Blocking token bucket refilled continuously at rate_per_minute"""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Opens after consecutive failures; lets one probe through after reset_seconds
+    A probe that never reports back (its worker died or hung) is given up on
+    after another reset_seconds, and a new one is let through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if (
+                self.state == self.OPEN and now - self.opened_at >= self.reset_seconds
+                or self.state == self.HALF_OPEN and now - self.probe_started_at >= self.reset_seconds
+            ):
+                self.state = self.HALF_OPEN
+                self.probe_started_at = now
+                return True
+            return False
+
+    def release_probe(self):
+        """The probe never reached Gemini; let the next caller probe instead"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class GeminiClient:
+    def __init__(
+        self,
+        model: Any,
+        max_concurrency: int,
+        requests_per_minute: float,
+        timeout_seconds: float,
+        max_retries: int,
+        breaker: CircuitBreaker,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.model = model
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.breaker = breaker
+        self._sleep = sleep
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._bucket = TokenBucket(requests_per_minute, burst=max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="gemini")
+
+    def generate(self, prompt: str, **kwargs) -> Any:
+        """
+        Call model.generate_content with retries
+        Raises ScoringUnavailableError when the breaker is open or transient
+        failures outlast the retries; other API errors propagate unchanged.
+        """
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise ScoringUnavailableError(
+                    "Gemini circuit breaker is open", self.breaker.retry_after()
+                )
+
+            try:
+                response = self._call(prompt, **kwargs)
+            except TRANSIENT_ERRORS as e:
+                last_error = e
+                # Local backpressure says nothing about Gemini's health
+                if isinstance(e, LocalCapacityError):
+                    self.breaker.release_probe()
+                else:
+                    self.breaker.record_failure()
+                if attempt < self.max_retries:
+                    # Full jitter keeps retrying workers from synchronizing
+                    cap = min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * (2 ** attempt))
+                    self._sleep(random.uniform(0, cap))
+                continue
+            except Exception:
+                # Gemini answered (e.g. rejected the request), so it is up
+                self.breaker.record_success()
+                raise
+
+            self.breaker.record_success()
+            return response
+
+        raise ScoringUnavailableError(
+            f"Gemini unavailable after {self.max_retries + 1} attempts: {last_error!r}",
+            max(self.breaker.retry_after(), RETRY_MAX_DELAY_SECONDS)
+        )
+
+    def stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        """
+        Stream response text chunks from model.generate_content(stream=True)
+        Streams are not retried once started (the caller has already used
+        the partial output); failures surface as ScoringUnavailableError
+        for transient errors. Every exit reports to the breaker, including
+        a consumer closing the stream early.
+        """
+        if not self.breaker.allow():
+            raise ScoringUnavailableError("Gemini circuit breaker is open", self.breaker.retry_after())
+
+        deadline = time.monotonic() + self.timeout_seconds
+        if not self._bucket.acquire(self.timeout_seconds):
+            self.breaker.release_probe()
+            raise ScoringUnavailableError("Gemini rate limit saturated", RETRY_BASE_DELAY_SECONDS)
+        if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            self.breaker.release_probe()
+            raise ScoringUnavailableError("No free Gemini connection slot", RETRY_BASE_DELAY_SECONDS)
+
+        holds_slot = True
+        try:
+            future = self._executor.submit(self.model.generate_content, prompt, stream=True, **kwargs)
+            try:
+                # Only the time to first response is bounded; chunks then arrive as generated
+                response = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except BaseException:
+                # The call may still be running; its slot is held until it really ends, as in _call
+                holds_slot = False
+                future.add_done_callback(lambda _: self._slots.release())
+                raise
+            for chunk in response:
+                yield chunk.text
+        except GeneratorExit:
+            # The consumer stopped reading; Gemini was answering
+            self.breaker.record_success()
+            raise
+        except TRANSIENT_ERRORS as e:
+            self.breaker.record_failure()
+            raise ScoringUnavailableError(f"Gemini stream failed: {e!r}", RETRY_MAX_DELAY_SECONDS)
+        except BaseException:
+            self.breaker.record_failure()
+            raise
+        finally:
+            if holds_slot:
+                self._slots.release()
+
+        self.breaker.record_success()
+
+    def _call(self, prompt: str, **kwargs) -> Any:
+        # Waiting for a slot or a token counts against the call's timeout
+        deadline = time.monotonic() + self.timeout_seconds
+        if not self._bucket.acquire(self.timeout_seconds):
+            raise LocalCapacityError("Timed out waiting for Gemini rate limit")
+        if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            raise LocalCapacityError("Timed out waiting for a Gemini connection slot")
+
+        try:
+            future = self._executor.submit(self.model.generate_content, prompt, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the call really ends, even after we stop waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+
+
+# Singleton instance
+_gemini_client: Optional[GeminiClient] = None
+_gemini_client_lock = threading.Lock()
+
+
+def get_gemini_client() -> GeminiClient:
+    """Get the process-wide Gemini client"""
+    global _gemini_client
+    with _gemini_client_lock:
+        if _gemini_client is None:
+            _gemini_client = GeminiClient(
+                model=genai.GenerativeModel(settings.gemini_model),
+                max_concurrency=settings.gemini_max_concurrency,
+                requests_per_minute=settings.gemini_requests_per_minute,
+                timeout_seconds=settings.gemini_timeout_seconds,
+                max_retries=settings.gemini_max_retries,
+                breaker=CircuitBreaker(
+                    settings.gemini_breaker_failure_threshold,
+                    settings.gemini_breaker_reset_seconds
+                )
+            )
+        return _gemini_client
@@ -1,11 +1,90 @@
+import json
 import google.generativeai as genai
+from google.generativeai import protos
+from google.generativeai.types import generation_types
 from app.config.settings import settings
-import json
-from typing import Dict, Optional
+from app.services.gemini_client import get_gemini_client
+from app.services.essay_prescorer import EssayPreScorer
+from app.services.feedback_parser import (
+    FEEDBACK_FIELDS,
+    LIST_FEEDBACK_FIELDS,
+    SCORE_FIELDS,
+    IncrementalFeedbackParser,
+    check_scorer_result,
+    parse_scorer_json,
+    result_sections
+)
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Identifies the model and scoring prompt; bump when either changes so
+# cached scores from the old scorer are not reused
+SCORING_PROMPT_VERSION = "ielts-rubric-v1"
+SCORER_VERSION = f"{settings.gemini_model}:{SCORING_PROMPT_VERSION}"
+MOCK_SCORER = "mock"
+
+# Per-paragraph analyses used to score revisions incrementally, and the
+# approximate revision scores built from them (never cached or reused as
+# full-essay scores, so the rescoring CLI can upgrade them later)
+PARAGRAPH_SCORER_VERSION = f"{SCORER_VERSION}:paragraph-v1"
+REVISION_SCORER_VERSION = f"{SCORER_VERSION}:revision-v1"
+
+REVISION_SCORE_FIELDS = ("task_response_score", "coherence_cohesion_score")
+PARAGRAPH_SCORE_FIELDS = ("task_response_score", "lexical_resource_score", "grammatical_range_score")
+
+
+def _object_schema(properties: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+
+def feedback_schema(fields: Sequence[str] = FEEDBACK_FIELDS) -> Dict[str, Any]:
+    """Response schema for EssayFeedback fields"""
+    return _object_schema({
+        field: {"type": "array", "items": {"type": "string"}} if field in LIST_FEEDBACK_FIELDS
+        else {"type": "string"}
+        for field in fields
+    })
+
+
+def result_schema(score_fields: Sequence[str]) -> Dict[str, Any]:
+    """Response schema for rubric scores plus feedback"""
+    return _object_schema({
+        **{field: {"type": "number"} for field in score_fields},
+        "feedback": feedback_schema(),
+    })
+
 
-# Configure Gemini
+ESSAY_RESULT_SCHEMA = result_schema(SCORE_FIELDS)
+REVISION_RESULT_SCHEMA = result_schema(REVISION_SCORE_FIELDS)
+PARAGRAPH_RESULT_SCHEMA = _object_schema({
+    **{field: {"type": "number"} for field in PARAGRAPH_SCORE_FIELDS},
+    "summary": {"type": "string"},
+    "notes": {"type": "string"},
+})
+RESPONSE_SCHEMAS = {
+    "essay": ESSAY_RESULT_SCHEMA,
+    "revision": REVISION_RESULT_SCHEMA,
+    "paragraph": PARAGRAPH_RESULT_SCHEMA,
+}
+
+# Models that reject response_mime_type/response_schema (gemini-pro is 1.0 Pro)
+NO_STRUCTURED_OUTPUT_MODELS = ("gemini-pro", "gemini-1.0")
+
+
+def supports_structured_output(model: str) -> bool:
+    """JSON mode with a response schema needs Gemini 1.5 or later"""
+    return not model.split("/")[-1].startswith(NO_STRUCTURED_OUTPUT_MODELS)
+
+
+# Configure Gemini (an api endpoint override points the client at a local stub server)
 if settings.gemini_api_key:
-    genai.configure(api_key=settings.gemini_api_key)
+    if settings.gemini_api_endpoint:
+        genai.configure(
+            api_key=settings.gemini_api_key,
+            transport="rest",
+            client_options={"api_endpoint": settings.gemini_api_endpoint}
+        )
+    else:
+        genai.configure(api_key=settings.gemini_api_key)
 
 
 class GeminiService:
@@ -21,16 +100,62 @@ class GeminiService:
         - grammatical_range_score (0-9)
         - overall_score (0-9)
         - feedback (structured feedback)
+        - scorer (SCORER_VERSION, or MOCK_SCORER for placeholder scores)
+
+        Raises ScoringUnavailableError when Gemini is down or throttled and
+        ValueError for unparseable responses; callers retry rather than
+        showing placeholder scores.
         """
 
         if not settings.gemini_api_key:
             # Return mock data for development
-            return GeminiService._get_mock_feedback(word_count)
+            return GeminiService._get_mock_feedback(essay_content, prompt_text)
 
-        try:
-            model = genai.GenerativeModel('gemini-pro')
+        scoring_prompt = GeminiService.build_scoring_prompt(essay_content, prompt_text, word_count)
 
-            scoring_prompt = f"""You are an expert IELTS/TOEFL writing examiner. Score the following essay based on these criteria:
+        response = get_gemini_client().generate(
+            scoring_prompt, **GeminiService._json_output(ESSAY_RESULT_SCHEMA)
+        )
+
+        result = GeminiService.complete_result(parse_scorer_json(response.text), prompt_text)
+        result["scorer"] = SCORER_VERSION
+        return result
+
+    @staticmethod
+    def stream_score_essay(
+        essay_content: str, prompt_text: str, word_count: int
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Score an essay with the streaming API
+        Yields (section, payload) as feedback sections complete ("scores"
+        first, then each feedback field), and finally ("result", full result
+        in the score_essay format).
+        """
+        if not settings.gemini_api_key:
+            result = GeminiService._get_mock_feedback(essay_content, prompt_text)
+            yield from result_sections(result)
+            yield "result", result
+            return
+
+        scoring_prompt = GeminiService.build_scoring_prompt(essay_content, prompt_text, word_count)
+        parser = IncrementalFeedbackParser()
+        response_text = ""
+        for chunk in get_gemini_client().stream(
+            scoring_prompt, **GeminiService._json_output(ESSAY_RESULT_SCHEMA)
+        ):
+            response_text += chunk
+            yield from parser.feed(chunk)
+
+        result = GeminiService.complete_result(parse_scorer_json(response_text), prompt_text)
+        result["scorer"] = SCORER_VERSION
+        # Sections the stream never closed (e.g. a truncated tail) or that were asked for again
+        yield from result_sections(result, skip=parser.emitted)
+        yield "result", result
+
+    @staticmethod
+    def build_scoring_prompt(essay_content: str, prompt_text: str, word_count: int) -> str:
+        """Examiner prompt asking for rubric scores and feedback as JSON"""
+        return f"""You are an expert IELTS/TOEFL writing examiner. Score the following essay based on these criteria:
 
 1. Task Response (0-9): How well does the essay address the prompt?
 2. Coherence and Cohesion (0-9): How well organized and connected is the writing?
@@ -64,41 +189,180 @@ Provide your response in the following JSON format:
 
 Be specific, constructive, and encouraging. Focus on actionable improvements."""
 
-            response = model.generate_content(scoring_prompt)
+    @staticmethod
+    def analyze_paragraph(paragraph: str, prompt_text: str) -> Dict:
+        """
+        Score one paragraph's language and summarize its role
+        Returns lexical_resource_score, grammatical_range_score,
+        task_response_score, summary and notes.
+        """
+        response = get_gemini_client().generate(
+            GeminiService.build_paragraph_prompt(paragraph, prompt_text),
+            **GeminiService._json_output(PARAGRAPH_RESULT_SCHEMA)
+        )
+        result = parse_scorer_json(response.text)
+        result["scorer"] = PARAGRAPH_SCORER_VERSION
+        return result
+
+    @staticmethod
+    def score_revision_structure(
+        prompt_text: str, outline: str, previous_feedback: Dict, word_count: int
+    ) -> Dict:
+        """
+        Whole-essay pass for a revision, working from a paragraph outline
+        Returns task_response_score, coherence_cohesion_score and feedback.
+        """
+        response = get_gemini_client().generate(
+            GeminiService.build_revision_prompt(prompt_text, outline, previous_feedback, word_count),
+            **GeminiService._json_output(REVISION_RESULT_SCHEMA)
+        )
+        return GeminiService.complete_result(
+            parse_scorer_json(response.text), prompt_text, REVISION_SCORE_FIELDS
+        )
+
+    @staticmethod
+    def complete_result(
+        document: Dict[str, Any], prompt_text: str, score_fields: Sequence[str] = SCORE_FIELDS
+    ) -> Dict[str, Any]:
+        """
+        Validate a parsed result, asking again for unusable feedback fields only
+        The repair request carries the scores and the feedback already
+        given, not the essay. Raises ValueError when scores are missing or
+        the repair does not fill the gaps; callers retry the whole call.
+        """
+        checked = check_scorer_result(document, score_fields)
+        if checked.missing_scores:
+            raise ValueError(f"Scorer response missing scores: {', '.join(checked.missing_scores)}")
+        if not checked.missing_feedback:
+            return checked.result
+
+        repaired = GeminiService.request_missing_feedback(prompt_text, checked.result, checked.missing_feedback)
+        feedback = {**checked.result["feedback"], **(repaired if isinstance(repaired, dict) else {})}
+        checked = check_scorer_result({**checked.result, "feedback": feedback}, score_fields)
+        if checked.missing_feedback:
+            raise ValueError(f"Scorer response missing feedback: {', '.join(checked.missing_feedback)}")
+        return checked.result
+
+    @staticmethod
+    def request_missing_feedback(prompt_text: str, partial: Dict[str, Any], fields: List[str]) -> Dict:
+        """Ask for just the named feedback fields, given the rest of the assessment"""
+        response = get_gemini_client().generate(
+            GeminiService.build_missing_feedback_prompt(prompt_text, partial, fields),
+            **GeminiService._json_output(feedback_schema(fields))
+        )
+        return parse_scorer_json(response.text)
+
+    @staticmethod
+    def structured_output_enabled() -> bool:
+        return settings.gemini_structured_output and supports_structured_output(settings.gemini_model)
+
+    @staticmethod
+    def check_response_schemas():
+        """Raise ValueError unless the installed SDK accepts every response schema"""
+        for name, schema in RESPONSE_SCHEMAS.items():
+            try:
+                # The conversion generate_content applies before sending a request
+                protos.GenerationConfig(generation_types.to_generation_config_dict(
+                    GeminiService._generation_config(schema)
+                ))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Gemini SDK rejected the {name} response schema: {e!r}")
+
+    @staticmethod
+    def _json_output(schema: Dict[str, Any]) -> Dict[str, Any]:
+        """generate_content arguments constraining the response to a JSON schema, when the model supports it"""
+        if not GeminiService.structured_output_enabled():
+            return {}
+        return {"generation_config": GeminiService._generation_config(schema)}
+
+    @staticmethod
+    def _generation_config(schema: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "response_mime_type": "application/json",
+            "response_schema": schema,
+        }
+
+    @staticmethod
+    def build_paragraph_prompt(paragraph: str, prompt_text: str) -> str:
+        """Examiner prompt for a single paragraph"""
+        return f"""You are an expert IELTS/TOEFL writing examiner. Assess this single paragraph from an essay.
+
+Essay Prompt:
+{prompt_text}
+
+Paragraph:
+{paragraph}
+
+Provide your response in the following JSON format:
+{{
+    "task_response_score": <score 0-9 for how well this paragraph serves the prompt>,
+    "lexical_resource_score": <score 0-9>,
+    "grammatical_range_score": <score 0-9>,
+    "summary": "One sentence describing what the paragraph argues",
+    "notes": "One or two sentences on its vocabulary and grammar"
+}}"""
+
+    @staticmethod
+    def build_revision_prompt(
+        prompt_text: str, outline: str, previous_feedback: Dict, word_count: int
+    ) -> str:
+        """Examiner prompt for a revision, given paragraph summaries instead of the full text"""
+        return f"""You are an expert IELTS/TOEFL writing examiner. A student revised an essay you already assessed.
+Below is an outline of the revision: each paragraph's summary, its opening and closing sentences, and
+whether it changed. Paragraph-level language scores are already known.
+
+Essay Prompt:
+{prompt_text}
 
-            # Parse the JSON response
-            response_text = response.text.strip()
+Revision outline (Word count: {word_count}):
+{outline}
+
+Your feedback on the previous version:
+{json.dumps(previous_feedback, ensure_ascii=False)}
+
+Judge the essay as a whole and provide your response in the following JSON format:
+{{
+    "task_response_score": <score 0-9>,
+    "coherence_cohesion_score": <score 0-9>,
+    "feedback": {{
+        "strengths": ["strength 1", "strength 2", "strength 3"],
+        "weaknesses": ["weakness 1", "weakness 2", "weakness 3"],
+        "task_response": "Detailed feedback on task response",
+        "coherence_cohesion": "Detailed feedback on coherence and cohesion",
+        "lexical_resource": "Detailed feedback on vocabulary",
+        "grammatical_range": "Detailed feedback on grammar",
+        "suggestions": ["specific suggestion 1", "specific suggestion 2", "specific suggestion 3"],
+        "revised_outline": "A brief outline showing how to improve the essay structure"
+    }}
+}}
+
+Comment on what improved since the previous version. Be specific, constructive, and encouraging."""
+
+    @staticmethod
+    def build_missing_feedback_prompt(prompt_text: str, partial: Dict[str, Any], fields: List[str]) -> str:
+        """Prompt for feedback fields a previous response left out"""
+        return f"""You are an expert IELTS/TOEFL writing examiner. You assessed an essay, but your response was
+incomplete. Here is what you already wrote.
+
+Essay Prompt:
+{prompt_text}
 
-            # Extract JSON from markdown code blocks if present
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                response_text = response_text[json_start:json_end].strip()
-            elif "```" in response_text:
-                json_start = response_text.find("```") + 3
-                json_end = response_text.find("```", json_start)
-                response_text = response_text[json_start:json_end].strip()
+Your assessment so far:
+{json.dumps(partial, ensure_ascii=False)}
 
-            result = json.loads(response_text)
-            return result
+Provide only these missing feedback fields, consistent with the assessment above, as a JSON object:
+{", ".join(fields)}
 
-        except Exception as e:
-            print(f"Error scoring essay with Gemini: {e}")
-            # Return mock data as fallback
-            return GeminiService._get_mock_feedback(word_count)
+Lists should have about three specific items. Be specific, constructive, and encouraging."""
 
     @staticmethod
-    def _get_mock_feedback(word_count: int) -> Dict:
+    def _get_mock_feedback(essay_content: str, prompt_text: str) -> Dict:
         """Generate mock feedback for development/testing"""
-        # Simple scoring based on word count
-        length_score = 7.0 if 200 <= word_count <= 300 else 5.5
+        # Scores come from the local pre-scorer; the feedback text is canned
+        scores = EssayPreScorer.score(essay_content, prompt_text)
 
         return {
-            "task_response_score": length_score,
-            "coherence_cohesion_score": 6.5,
-            "lexical_resource_score": 6.0,
-            "grammatical_range_score": 6.5,
-            "overall_score": 6.5,
+            **scores,
             "feedback": {
                 "strengths": [
                     "Clear thesis statement",
@@ -121,5 +385,6 @@ Be specific, constructive, and encouraging. Focus on actionable improvements."""
                     "Include counterarguments to strengthen your position"
                 ],
                 "revised_outline": "Introduction with clear thesis → Body paragraph 1 with specific example → Body paragraph 2 with data/statistics → Counterargument and rebuttal → Conclusion restating position"
-            }
+            },
+            "scorer": MOCK_SCORER
         }
@@ -0,0 +1,298 @@
+"""
+Classical item analysis for the reading question bank
+Computes difficulty (p-value), point-biserial discrimination and
+distractor selection rates with vectorized NumPy passes over an
+export of user_reading_attempts
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func, Integer
+from sqlalchemy.orm import Session
+
+from app.models.analytics import JobWatermark
+from app.models.reading import ReadingQuestion, ReadingQuestionStats, UserReadingAttempt
+
+JOB_NAME = "reading_item_analysis"
+
+OPTION_LETTERS = ["A", "B", "C", "D"]
+OPTION_CODES = {letter: code for code, letter in enumerate(OPTION_LETTERS)}
+
+# Flag thresholds (common classical test theory rules of thumb)
+MIN_RESPONSES = 30
+TOO_EASY_P = 0.95
+TOO_HARD_P = 0.20
+LOW_DISCRIMINATION = 0.15
+NON_FUNCTIONING_DISTRACTOR = 0.05
+
+EXPORT_BATCH_SIZE = 10000
+QUESTION_CHUNK_SIZE = 1000
+
+
+def compute_item_statistics(
+    question_index: np.ndarray,
+    user_index: np.ndarray,
+    correct: np.ndarray,
+    answer_codes: np.ndarray,
+    user_attempts: np.ndarray,
+    user_correct: np.ndarray,
+    num_questions: int,
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized item statistics for one attempts export.
+
+    question_index/user_index map each attempt to dense 0-based ids;
+    user_attempts/user_correct are each user's totals over the whole bank.
+    The point-biserial uses the rest score (the user's accuracy on all
+    other questions), so an item is not correlated with itself.
+    """
+    correct = correct.astype(np.float64)
+    attempts = np.bincount(question_index, minlength=num_questions).astype(np.float64)
+    correct_sum = np.bincount(question_index, weights=correct, minlength=num_questions)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_value = np.where(attempts > 0, correct_sum / attempts, np.nan)
+
+    # Each user's attempts and correct answers on this item, per attempt row
+    num_users = len(user_attempts) or 1
+    pair_key = question_index.astype(np.int64) * num_users + user_index
+    _, pair_inverse, pair_counts = np.unique(pair_key, return_inverse=True, return_counts=True)
+    pair_correct = np.bincount(pair_inverse, weights=correct)
+    item_attempts = pair_counts[pair_inverse]
+    item_correct = pair_correct[pair_inverse]
+
+    rest_attempts = user_attempts[user_index] - item_attempts
+    rest_correct = user_correct[user_index] - item_correct
+    valid = rest_attempts > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rest_score = np.where(valid, rest_correct / np.maximum(rest_attempts, 1), 0.0)
+
+    weights = valid.astype(np.float64)
+    n = np.bincount(question_index, weights=weights, minlength=num_questions)
+    sx = np.bincount(question_index, weights=correct * weights, minlength=num_questions)
+    sy = np.bincount(question_index, weights=rest_score * weights, minlength=num_questions)
+    sxy = np.bincount(question_index, weights=correct * rest_score * weights, minlength=num_questions)
+    syy = np.bincount(question_index, weights=rest_score * rest_score * weights, minlength=num_questions)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy / n - (sx / n) * (sy / n)
+        var_x = sx / n - (sx / n) ** 2
+        var_y = syy / n - (sy / n) ** 2
+        point_biserial = cov / np.sqrt(var_x * var_y)
+    point_biserial[~np.isfinite(point_biserial)] = np.nan
+
+    # Option selection counts; unknown answers fall outside the A-D columns
+    known = answer_codes >= 0
+    option_counts = np.bincount(
+        question_index[known] * len(OPTION_LETTERS) + answer_codes[known],
+        minlength=num_questions * len(OPTION_LETTERS),
+    ).reshape(num_questions, len(OPTION_LETTERS))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        option_rates = np.where(attempts[:, None] > 0, option_counts / attempts[:, None], 0.0)
+
+    # Distinct users per item, counted from the first row of each (item, user) pair
+    _, first_rows = np.unique(pair_key, return_index=True)
+    respondents = np.bincount(question_index[first_rows], minlength=num_questions)
+
+    return {
+        "attempts": attempts.astype(np.int64),
+        "respondents": respondents,
+        "p_value": p_value,
+        "point_biserial": point_biserial,
+        "option_rates": option_rates,
+    }
+
+
+def flag_item(
+    attempts: int,
+    p_value: Optional[float],
+    point_biserial: Optional[float],
+    option_rates: Dict[str, float],
+    correct_answer: str,
+) -> List[str]:
+    """Quality flags for one item"""
+    if attempts < MIN_RESPONSES:
+        return ["insufficient_data"]
+
+    flags = []
+    if p_value is not None:
+        if p_value > TOO_EASY_P:
+            flags.append("too_easy")
+        elif p_value < TOO_HARD_P:
+            flags.append("too_hard")
+
+    if point_biserial is not None:
+        if point_biserial < 0:
+            flags.append("negative_discrimination")
+        elif point_biserial < LOW_DISCRIMINATION:
+            flags.append("low_discrimination")
+
+    key_rate = option_rates.get(correct_answer, 0.0)
+    distractors = {letter: rate for letter, rate in option_rates.items() if letter != correct_answer}
+    if any(rate > key_rate for rate in distractors.values()):
+        flags.append("key_check")
+    if any(rate < NON_FUNCTIONING_DISTRACTOR for rate in distractors.values()):
+        flags.append("non_functioning_distractor")
+
+    return flags
+
+
+def _to_float(value) -> Optional[float]:
+    return None if value is None or np.isnan(value) else round(float(value), 4)
+
+
+class ItemAnalysisService:
+    @staticmethod
+    def get_watermark(db: Session) -> JobWatermark:
+        watermark = db.query(JobWatermark).filter(JobWatermark.job_name == JOB_NAME).first()
+        if watermark is None:
+            watermark = JobWatermark(job_name=JOB_NAME, last_id=0)
+            db.add(watermark)
+        return watermark
+
+    @staticmethod
+    def run(db: Session, full: bool = False) -> Dict[str, int]:
+        """
+        Refresh item statistics.
+
+        Incremental runs only recompute questions with attempts newer than
+        the watermark; user totals always cover the whole attempts table.
+        """
+        watermark = ItemAnalysisService.get_watermark(db)
+        since_id = 0 if full else (watermark.last_id or 0)
+        max_id = db.query(func.max(UserReadingAttempt.id)).scalar() or 0
+
+        if max_id <= since_id:
+            db.commit()
+            return {"questions": 0, "attempts": 0, "watermark": since_id}
+
+        if full:
+            question_ids = [row[0] for row in db.query(ReadingQuestion.id).all()]
+        else:
+            question_ids = [
+                row[0]
+                for row in db.query(UserReadingAttempt.question_id)
+                .filter(UserReadingAttempt.id > since_id, UserReadingAttempt.id <= max_id)
+                .distinct()
+                .all()
+            ]
+
+        # User totals via one aggregate, capped at the watermark for consistency
+        user_rows = (
+            db.query(
+                UserReadingAttempt.user_id,
+                func.count(UserReadingAttempt.id),
+                func.sum(func.cast(UserReadingAttempt.is_correct, Integer))
+            )
+            .filter(UserReadingAttempt.id <= max_id)
+            .group_by(UserReadingAttempt.user_id)
+            .all()
+        )
+        user_positions = {user_id: position for position, (user_id, _, _) in enumerate(user_rows)}
+        user_attempts = np.array([row[1] for row in user_rows], dtype=np.float64)
+        user_correct = np.array([row[2] or 0 for row in user_rows], dtype=np.float64)
+
+        exported = ItemAnalysisService._export_attempts(db, question_ids, max_id, user_positions)
+        stats = compute_item_statistics(
+            exported["question_index"],
+            exported["user_index"],
+            exported["correct"],
+            exported["answer_codes"],
+            user_attempts,
+            user_correct,
+            len(question_ids),
+        )
+
+        ItemAnalysisService._store(db, question_ids, stats)
+
+        watermark.last_id = max_id
+        db.commit()
+
+        return {
+            "questions": len(question_ids),
+            "attempts": int(len(exported["correct"])),
+            "watermark": max_id,
+        }
+
+    @staticmethod
+    def _export_attempts(
+        db: Session, question_ids: Sequence[int], max_id: int, user_positions: Dict[int, int]
+    ) -> Dict[str, np.ndarray]:
+        """Stream attempts for the given questions into dense NumPy columns"""
+        question_positions = {question_id: position for position, question_id in enumerate(question_ids)}
+        columns = {"question_index": [], "user_index": [], "correct": [], "answer_codes": []}
+
+        for start in range(0, len(question_ids), QUESTION_CHUNK_SIZE):
+            chunk = question_ids[start:start + QUESTION_CHUNK_SIZE]
+            rows = (
+                db.query(
+                    UserReadingAttempt.question_id,
+                    UserReadingAttempt.user_id,
+                    UserReadingAttempt.is_correct,
+                    UserReadingAttempt.user_answer
+                )
+                .filter(UserReadingAttempt.question_id.in_(chunk), UserReadingAttempt.id <= max_id)
+                .yield_per(EXPORT_BATCH_SIZE)
+            )
+            for question_id, user_id, is_correct, user_answer in rows:
+                columns["question_index"].append(question_positions[question_id])
+                columns["user_index"].append(user_positions[user_id])
+                columns["correct"].append(is_correct)
+                columns["answer_codes"].append(OPTION_CODES.get((user_answer or "").upper(), -1))
+
+        return {
+            "question_index": np.array(columns["question_index"], dtype=np.int64),
+            "user_index": np.array(columns["user_index"], dtype=np.int64),
+            "correct": np.array(columns["correct"], dtype=bool),
+            "answer_codes": np.array(columns["answer_codes"], dtype=np.int64),
+        }
+
+    @staticmethod
+    def _store(db: Session, question_ids: Sequence[int], stats: Dict[str, np.ndarray]):
+        """Upsert stats rows for the analysed questions"""
+        correct_answers = {}
+        existing = {}
+        for start in range(0, len(question_ids), QUESTION_CHUNK_SIZE):
+            chunk = question_ids[start:start + QUESTION_CHUNK_SIZE]
+            correct_answers.update(
+                db.query(ReadingQuestion.id, ReadingQuestion.correct_answer)
+                .filter(ReadingQuestion.id.in_(chunk))
+                .all()
+            )
+            existing.update({
+                row.question_id: row
+                for row in db.query(ReadingQuestionStats)
+                .filter(ReadingQuestionStats.question_id.in_(chunk))
+                .all()
+            })
+
+        for position, question_id in enumerate(question_ids):
+            if question_id not in correct_answers:
+                continue
+
+            attempts = int(stats["attempts"][position])
+            p_value = _to_float(stats["p_value"][position])
+            point_biserial = _to_float(stats["point_biserial"][position])
+            option_rates = {
+                letter: round(float(stats["option_rates"][position][code]), 4)
+                for code, letter in enumerate(OPTION_LETTERS)
+            }
+            flags = flag_item(
+                attempts,
+                p_value,
+                point_biserial,
+                option_rates,
+                (correct_answers[question_id] or "").upper()
+            )
+
+            row = existing.get(question_id)
+            if row is None:
+                row = ReadingQuestionStats(question_id=question_id)
+                db.add(row)
+            row.attempts = attempts
+            row.respondents = int(stats["respondents"][position])
+            row.p_value = p_value
+            row.point_biserial = point_biserial
+            row.distractor_rates = option_rates
+            row.flags = flags
@@ -0,0 +1,342 @@
+"""
+Mock reading test assembly
+Picks passages from an in-memory skill/difficulty index of the question
+bank to satisfy a skill mix, difficulty target and time limit, and
+caches frozen test forms so a cohort can share one form
+"""
+
+import random
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.reading import MockTestForm, ReadingItem, ReadingQuestion, UserReadingAttempt
+from app.services.catalog_cache import CatalogIndexCache
+
+EXAM_PRESETS = {
+    "ielts": {"name": "IELTS Academic Reading", "passages": 3, "time_limit_minutes": 60},
+    "toefl": {"name": "TOEFL Reading", "passages": 2, "time_limit_minutes": 35},
+}
+
+DIFFICULTY_LEVELS = {"easy": 0, "medium": 1, "hard": 2}
+
+# Time estimates used when budgeting a test
+READING_WORDS_PER_MINUTE = 200
+MINUTES_PER_QUESTION = 1.25
+DEFAULT_PASSAGE_WORDS = 500
+
+# Selection weights: skill coverage dominates, difficulty fit breaks ties
+OVERFLOW_PENALTY = 0.25
+DIFFICULTY_PENALTY = 1.5
+DIFFICULTY_SCORE_PENALTY = 0.5
+
+FORM_CACHE_SIZE = 128
+
+
+class _IndexedItem:
+    __slots__ = ("id", "difficulty", "difficulty_score", "minutes", "skill_counts", "question_ids")
+
+    def __init__(self, item_id, difficulty, difficulty_score, word_count):
+        self.id = item_id
+        self.difficulty = difficulty
+        self.difficulty_score = difficulty_score
+        self.minutes = (word_count or DEFAULT_PASSAGE_WORDS) / READING_WORDS_PER_MINUTE
+        self.skill_counts: Counter = Counter()
+        self.question_ids: List[int] = []
+
+
+class QuestionBankIndex:
+    """Skill and difficulty summary of every passage, without passage text"""
+
+    def __init__(self, items: List[_IndexedItem]):
+        self.items = items
+        self.question_item = {
+            question_id: item.id for item in items for question_id in item.question_ids
+        }
+
+    @classmethod
+    def build(cls, db: Session) -> "QuestionBankIndex":
+        indexed = {
+            row.id: _IndexedItem(row.id, row.difficulty, row.difficulty_score, row.word_count)
+            for row in db.query(
+                ReadingItem.id,
+                ReadingItem.difficulty,
+                ReadingItem.difficulty_score,
+                ReadingItem.word_count
+            ).all()
+        }
+
+        for question_id, item_id, skill in db.query(
+            ReadingQuestion.id, ReadingQuestion.reading_item_id, ReadingQuestion.skill_category
+        ).order_by(ReadingQuestion.id):
+            item = indexed.get(item_id)
+            if item is None:
+                continue
+            item.question_ids.append(question_id)
+            item.skill_counts[skill or "other"] += 1
+            item.minutes += MINUTES_PER_QUESTION
+
+        return cls([item for item in indexed.values() if item.question_ids])
+
+
+_bank_index = CatalogIndexCache(QuestionBankIndex.build)
+_form_cache: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _difficulty_distance(
+    item: _IndexedItem, difficulty: Optional[str], target_score: Optional[float]
+) -> float:
+    distance = 0.0
+    if difficulty:
+        level = DIFFICULTY_LEVELS.get(item.difficulty, 1)
+        distance += DIFFICULTY_PENALTY * abs(level - DIFFICULTY_LEVELS[difficulty])
+    if target_score is not None and item.difficulty_score is not None:
+        distance += DIFFICULTY_SCORE_PENALTY * abs(item.difficulty_score - target_score)
+    return distance
+
+
+def select_items(
+    candidates: List[_IndexedItem],
+    skill_mix: Dict[str, int],
+    passages: int,
+    time_limit_minutes: float,
+    difficulty: Optional[str] = None,
+    target_score: Optional[float] = None,
+) -> List[_IndexedItem]:
+    """Greedily choose passages covering the skill mix within the time limit"""
+    remaining = Counter({skill: count for skill, count in skill_mix.items() if count > 0})
+    budget = time_limit_minutes
+    pool = list(candidates)
+    chosen: List[_IndexedItem] = []
+
+    while pool and len(chosen) < passages:
+        best, best_gain = None, None
+        for item in pool:
+            if item.minutes > budget:
+                continue
+            covered = sum(min(item.skill_counts[skill], need) for skill, need in remaining.items())
+            overflow = len(item.question_ids) - covered if remaining else 0
+            gain = covered - OVERFLOW_PENALTY * overflow - _difficulty_distance(item, difficulty, target_score)
+            if best_gain is None or gain > best_gain:
+                best, best_gain = item, gain
+
+        if best is None:
+            break
+
+        chosen.append(best)
+        pool.remove(best)
+        budget -= best.minutes
+        for skill in list(remaining):
+            remaining[skill] -= min(best.skill_counts[skill], remaining[skill])
+            if remaining[skill] <= 0:
+                del remaining[skill]
+
+    return chosen
+
+
+class MockTestService:
+    @staticmethod
+    def get_bank_index(db: Session) -> QuestionBankIndex:
+        """Get the question bank index, rebuilding it when the catalog has changed"""
+        return _bank_index.get(db)
+
+    @staticmethod
+    def invalidate_bank_index():
+        """Drop the bank index so this process rebuilds it right after content imports"""
+        _bank_index.invalidate()
+
+    @staticmethod
+    def get_attempted_item_ids(db: Session, user_id: int, index: QuestionBankIndex) -> Set[int]:
+        attempted_questions = (
+            db.query(UserReadingAttempt.question_id)
+            .filter(UserReadingAttempt.user_id == user_id)
+            .distinct()
+            .all()
+        )
+        return {
+            index.question_item[question_id]
+            for (question_id,) in attempted_questions
+            if question_id in index.question_item
+        }
+
+    @staticmethod
+    def assemble(
+        db: Session,
+        user_id: int,
+        exam_type: str = "ielts",
+        skill_mix: Optional[Dict[str, int]] = None,
+        difficulty: Optional[str] = None,
+        target_difficulty_score: Optional[float] = None,
+        time_limit_minutes: Optional[int] = None,
+        passages: Optional[int] = None,
+        freeze: bool = False,
+        name: Optional[str] = None,
+        seed: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Assemble a mock test for a user, optionally freezing it as a shared form"""
+        preset = EXAM_PRESETS[exam_type]
+        time_limit_minutes = time_limit_minutes or preset["time_limit_minutes"]
+        passages = passages or preset["passages"]
+        skill_mix = skill_mix or {}
+
+        index = MockTestService.get_bank_index(db)
+        attempted = MockTestService.get_attempted_item_ids(db, user_id, index)
+        candidates = [item for item in index.items if item.id not in attempted]
+        # Shuffle so equally good passages vary between learners
+        random.Random(seed).shuffle(candidates)
+
+        chosen = select_items(
+            candidates,
+            skill_mix,
+            passages,
+            time_limit_minutes,
+            difficulty,
+            target_difficulty_score
+        )
+        if not chosen:
+            raise ValueError("Not enough unseen passages to assemble a test")
+
+        constraints = {
+            "skill_mix": skill_mix,
+            "difficulty": difficulty,
+            "target_difficulty_score": target_difficulty_score,
+            "passages": passages,
+        }
+        item_ids = [item.id for item in chosen]
+        question_ids = [question_id for item in chosen for question_id in item.question_ids]
+        estimated_minutes = round(sum(item.minutes for item in chosen), 1)
+
+        form_id = None
+        if freeze:
+            form = MockTestForm(
+                name=name or preset["name"],
+                exam_type=exam_type,
+                constraints=constraints,
+                reading_item_ids=item_ids,
+                question_ids=question_ids,
+                time_limit_minutes=time_limit_minutes,
+                estimated_minutes=estimated_minutes,
+                created_by=user_id
+            )
+            db.add(form)
+            db.commit()
+            form_id = form.id
+
+        payload = MockTestService._build_payload(
+            db,
+            form_id=form_id,
+            name=name or preset["name"],
+            exam_type=exam_type,
+            item_ids=item_ids,
+            question_ids=question_ids,
+            time_limit_minutes=time_limit_minutes,
+            estimated_minutes=estimated_minutes,
+            skill_mix=skill_mix
+        )
+        if form_id is not None:
+            MockTestService._cache_form(form_id, payload)
+        return payload
+
+    @staticmethod
+    def get_form(db: Session, form_id: int) -> Optional[Dict[str, Any]]:
+        """Get a frozen form, served from cache after the first load"""
+        with _cache_lock:
+            cached = _form_cache.get(form_id)
+            if cached is not None:
+                _form_cache.move_to_end(form_id)
+                return cached
+
+        form = db.query(MockTestForm).filter(MockTestForm.id == form_id).first()
+        if not form:
+            return None
+
+        payload = MockTestService._build_payload(
+            db,
+            form_id=form.id,
+            name=form.name,
+            exam_type=form.exam_type,
+            item_ids=form.reading_item_ids,
+            question_ids=form.question_ids,
+            time_limit_minutes=form.time_limit_minutes,
+            estimated_minutes=form.estimated_minutes,
+            skill_mix=(form.constraints or {}).get("skill_mix", {})
+        )
+        MockTestService._cache_form(form.id, payload)
+        return payload
+
+    @staticmethod
+    def _cache_form(form_id: int, payload: Dict[str, Any]):
+        with _cache_lock:
+            _form_cache[form_id] = payload
+            _form_cache.move_to_end(form_id)
+            while len(_form_cache) > FORM_CACHE_SIZE:
+                _form_cache.popitem(last=False)
+
+    @staticmethod
+    def _build_payload(
+        db: Session,
+        form_id: Optional[int],
+        name: str,
+        exam_type: str,
+        item_ids: List[int],
+        question_ids: List[int],
+        time_limit_minutes: int,
+        estimated_minutes: Optional[float],
+        skill_mix: Dict[str, int],
+    ) -> Dict[str, Any]:
+        """Load passages and questions for a form (answers are never included)"""
+        items = {
+            item.id: item
+            for item in db.query(ReadingItem)
+            .options(selectinload(ReadingItem.questions))
+            .filter(ReadingItem.id.in_(item_ids))
+            .all()
+        }
+        included = set(question_ids)
+        skill_counts: Counter = Counter()
+        passages = []
+
+        for item_id in item_ids:
+            item = items.get(item_id)
+            if item is None:
+                continue
+            questions = [question for question in item.questions if question.id in included]
+            skill_counts.update(question.skill_category or "other" for question in questions)
+            passages.append({
+                "id": item.id,
+                "title": item.title,
+                "passage": item.passage,
+                "difficulty": item.difficulty,
+                "skill_tags": item.skill_tags or [],
+                "created_at": item.created_at,
+                "questions": [
+                    {
+                        "id": question.id,
+                        "question": question.question,
+                        "options": question.options,
+                        "skill_category": question.skill_category,
+                    }
+                    for question in questions
+                ],
+            })
+
+        shortfall = {
+            skill: count - skill_counts.get(skill, 0)
+            for skill, count in skill_mix.items()
+            if skill_counts.get(skill, 0) < count
+        }
+
+        return {
+            "form_id": form_id,
+            "name": name,
+            "exam_type": exam_type,
+            "time_limit_minutes": time_limit_minutes,
+            "estimated_minutes": estimated_minutes,
+            "question_count": sum(len(passage["questions"]) for passage in passages),
+            "skill_counts": dict(skill_counts),
+            "skill_shortfall": shortfall,
+            "passages": passages,
+        }
@@ -0,0 +1,66 @@
+"""
+Paragraph-level diff between an essay and its revision
+Paragraphs are compared by a hash of their normalized text, so
+re-wrapping or whitespace edits do not count as changes
+"""
+
+import difflib
+import hashlib
+from typing import List, NamedTuple, Optional
+
+from app.services.essay_score_cache import normalize_text
+from app.services.text_features import split_paragraphs
+
+UNCHANGED = "unchanged"
+CHANGED = "changed"
+ADDED = "added"
+
+
+class ParagraphChange(NamedTuple):
+    index: int  # position in the revision
+    parent_index: Optional[int]  # aligned paragraph in the parent, if any
+    status: str  # unchanged, changed, added
+    text: str
+    digest: str
+
+
+def paragraph_digest(paragraph: str) -> str:
+    return hashlib.sha256(normalize_text(paragraph).encode("utf-8")).hexdigest()
+
+
+def align_paragraphs(parent_content: str, revision_content: str) -> List[ParagraphChange]:
+    """
+    Align a revision's paragraphs with its parent's
+    Identical paragraphs are matched in order; a replaced block pairs its
+    paragraphs with the parent's by position (as edits), and any extra
+    revision paragraphs count as added. Removed parent paragraphs are not
+    listed.
+    """
+    parent = split_paragraphs(parent_content)
+    revision = split_paragraphs(revision_content)
+    parent_digests = [paragraph_digest(paragraph) for paragraph in parent]
+    revision_digests = [paragraph_digest(paragraph) for paragraph in revision]
+
+    changes: List[ParagraphChange] = []
+    matcher = difflib.SequenceMatcher(a=parent_digests, b=revision_digests, autojunk=False)
+    for tag, a_start, a_end, b_start, b_end in matcher.get_opcodes():
+        for offset, index in enumerate(range(b_start, b_end)):
+            if tag == "equal":
+                parent_index, status = a_start + offset, UNCHANGED
+            elif tag == "replace" and a_start + offset < a_end:
+                parent_index, status = a_start + offset, CHANGED
+            else:
+                parent_index, status = None, ADDED
+            changes.append(
+                ParagraphChange(index, parent_index, status, revision[index], revision_digests[index])
+            )
+    return changes
+
+
+def changed_share(changes: List[ParagraphChange]) -> float:
+    """Share of the revision's words that sit in changed or added paragraphs"""
+    total = sum(len(change.text.split()) for change in changes)
+    if total == 0:
+        return 1.0
+    changed = sum(len(change.text.split()) for change in changes if change.status != UNCHANGED)
+    return changed / total
@@ -0,0 +1,202 @@
+"""
+Percentile ranks for essay and reading scores
+Essay overall scores are kept in quantile sketches per prompt and per
+essay type, and learners' reading accuracy in one sketch per skill. The
+sketches are updated as submissions are scored (re-scores retract the old
+value), so "better than 72% of Task 2 essays" is a sketch lookup rather
+than a sort over every essay or attempt
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Integer, func
+from sqlalchemy.orm import Session
+
+from app.models.reading import ReadingQuestion, UserReadingAttempt
+from app.models.writing import Essay, EssayPrompt
+from app.services.sketch_service import SketchService
+from app.services.sketches import DDSketch
+
+ESSAY_SCORE_METRIC = "essay_overall_score"
+READING_ACCURACY_METRIC = "reading_skill_accuracy"
+SCOPE_PROMPT = "prompt"
+SCOPE_ESSAY_TYPE = "essay_type"
+SCOPE_SKILL = "skill"
+
+# Learners need this many attempts on a skill before their accuracy counts
+MIN_SKILL_ATTEMPTS = 5
+
+# Percentiles against fewer scores than this are not reported
+MIN_SAMPLE_SIZE = 10
+
+SkillCounts = Tuple[int, int]  # (correct, total)
+
+
+def skill_accuracy(counts: SkillCounts) -> Optional[float]:
+    """Accuracy in percent, or None below MIN_SKILL_ATTEMPTS"""
+    correct, total = counts
+    if total < MIN_SKILL_ATTEMPTS:
+        return None
+    return round(correct / total * 100, 2)
+
+
+def _percentile(scope: str, key: str, value: float, sketch: Optional[DDSketch]) -> Optional[Dict[str, Any]]:
+    if sketch is None or sketch.count < MIN_SAMPLE_SIZE:
+        return None
+    return {
+        "scope": scope,
+        "key": str(key),
+        "value": round(float(value), 2),
+        "percentile": round(sketch.rank(value) * 100, 1),
+        "sample_size": sketch.count,
+    }
+
+
+class PercentileService:
+    @staticmethod
+    def record_essay_score(
+        prompt_id: Optional[int], essay_type: Optional[str], score, previous_score=None
+    ):
+        """Buffer a newly stored overall score, retracting the one it replaced"""
+        keys = [(SCOPE_PROMPT, prompt_id), (SCOPE_ESSAY_TYPE, essay_type)]
+        for scope, key in keys:
+            if key is None:
+                continue
+            if previous_score is not None:
+                SketchService.record(ESSAY_SCORE_METRIC, scope, key, float(previous_score), weight=-1)
+            if score is not None:
+                SketchService.record(ESSAY_SCORE_METRIC, scope, key, float(score))
+
+    @staticmethod
+    def record_reading_accuracy(skill: Optional[str], before: SkillCounts, after: SkillCounts):
+        """Move a learner's accuracy on a skill from its value at before to after"""
+        if not skill:
+            return
+        old, new = skill_accuracy(before), skill_accuracy(after)
+        if old == new:
+            return
+        if old is not None:
+            SketchService.record(READING_ACCURACY_METRIC, SCOPE_SKILL, skill, old, weight=-1)
+        if new is not None:
+            SketchService.record(READING_ACCURACY_METRIC, SCOPE_SKILL, skill, new)
+
+    @staticmethod
+    def skill_counts(db: Session, user_id: int, skills: Iterable[str]) -> Dict[str, SkillCounts]:
+        """A learner's committed (correct, total) attempts per skill"""
+        skills = [skill for skill in set(skills) if skill]
+        if not skills:
+            return {}
+        rows = (
+            db.query(
+                ReadingQuestion.skill_category,
+                func.count(UserReadingAttempt.id),
+                func.sum(func.cast(UserReadingAttempt.is_correct, Integer))
+            )
+            .join(UserReadingAttempt)
+            .filter(UserReadingAttempt.user_id == user_id, ReadingQuestion.skill_category.in_(skills))
+            .group_by(ReadingQuestion.skill_category)
+            .all()
+        )
+        counts = {skill: (0, 0) for skill in skills}
+        counts.update({skill: (correct or 0, total) for skill, total, correct in rows})
+        return counts
+
+    @staticmethod
+    def essay_percentiles(db: Session, user_id: int) -> List[Dict[str, Any]]:
+        """Where the learner's best essay on each prompt and essay type ranks"""
+        rows = (
+            db.query(Essay.prompt_id, EssayPrompt.essay_type, func.max(Essay.overall_score))
+            .join(EssayPrompt, EssayPrompt.id == Essay.prompt_id)
+            .filter(Essay.user_id == user_id, Essay.overall_score.isnot(None))
+            .group_by(Essay.prompt_id, EssayPrompt.essay_type)
+            .all()
+        )
+        if not rows:
+            return []
+
+        best_by_type: Dict[str, float] = {}
+        for _, essay_type, best in rows:
+            best_by_type[essay_type] = max(best_by_type.get(essay_type, 0.0), float(best))
+
+        type_sketches = dict(
+            SketchService.get_sketches(db, ESSAY_SCORE_METRIC, SCOPE_ESSAY_TYPE, best_by_type)
+        )
+        prompt_sketches = dict(
+            SketchService.get_sketches(db, ESSAY_SCORE_METRIC, SCOPE_PROMPT, [row[0] for row in rows])
+        )
+        percentiles = [
+            _percentile(SCOPE_ESSAY_TYPE, essay_type, best, type_sketches.get(essay_type))
+            for essay_type, best in sorted(best_by_type.items())
+        ] + [
+            _percentile(SCOPE_PROMPT, prompt_id, float(best), prompt_sketches.get(str(prompt_id)))
+            for prompt_id, _, best in sorted(rows)
+        ]
+        return [percentile for percentile in percentiles if percentile is not None]
+
+    @staticmethod
+    def reading_percentiles(db: Session, counts: Dict[str, SkillCounts]) -> List[Dict[str, Any]]:
+        """Where the learner's accuracy on each skill ranks among other learners"""
+        accuracies = {skill: skill_accuracy(skill_counts) for skill, skill_counts in counts.items()}
+        accuracies = {skill: accuracy for skill, accuracy in accuracies.items() if accuracy is not None}
+        if not accuracies:
+            return []
+
+        sketches = dict(SketchService.get_sketches(db, READING_ACCURACY_METRIC, SCOPE_SKILL, accuracies))
+        percentiles = [
+            _percentile(SCOPE_SKILL, skill, accuracy, sketches.get(skill))
+            for skill, accuracy in sorted(accuracies.items())
+        ]
+        return [percentile for percentile in percentiles if percentile is not None]
+
+    @staticmethod
+    def rebuild(db: Session, batch_size: int = 5000) -> Dict[str, int]:
+        """Rebuild the essay score and reading accuracy sketches from their tables"""
+        prompt_sketches: Dict[int, DDSketch] = defaultdict(DDSketch)
+        type_sketches: Dict[str, DDSketch] = defaultdict(DDSketch)
+        essays = 0
+        rows = (
+            db.query(Essay.prompt_id, EssayPrompt.essay_type, Essay.overall_score)
+            .join(EssayPrompt, EssayPrompt.id == Essay.prompt_id)
+            .filter(Essay.overall_score.isnot(None))
+            .yield_per(batch_size)
+        )
+        for prompt_id, essay_type, score in rows:
+            prompt_sketches[prompt_id].add(float(score))
+            type_sketches[essay_type].add(float(score))
+            essays += 1
+        SketchService.replace_all(db, ESSAY_SCORE_METRIC, [
+            (SCOPE_PROMPT, prompt_id, sketch) for prompt_id, sketch in prompt_sketches.items()
+        ] + [
+            (SCOPE_ESSAY_TYPE, essay_type, sketch) for essay_type, sketch in type_sketches.items()
+        ])
+
+        skill_sketches: Dict[str, DDSketch] = defaultdict(DDSketch)
+        learners = 0
+        rows = (
+            db.query(
+                ReadingQuestion.skill_category,
+                func.count(UserReadingAttempt.id),
+                func.sum(func.cast(UserReadingAttempt.is_correct, Integer))
+            )
+            .join(UserReadingAttempt)
+            .filter(ReadingQuestion.skill_category.isnot(None))
+            .group_by(UserReadingAttempt.user_id, ReadingQuestion.skill_category)
+            .yield_per(batch_size)
+        )
+        for skill, total, correct in rows:
+            accuracy = skill_accuracy((correct or 0, total))
+            if accuracy is not None:
+                skill_sketches[skill].add(accuracy)
+                learners += 1
+        SketchService.replace_all(db, READING_ACCURACY_METRIC, [
+            (SCOPE_SKILL, skill, sketch) for skill, sketch in skill_sketches.items()
+        ])
+
+        return {
+            "essays": essays,
+            "prompts": len(prompt_sketches),
+            "essay_types": len(type_sketches),
+            "skill_accuracies": learners,
+            "skills": len(skill_sketches),
+        }
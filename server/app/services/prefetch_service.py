@@ -0,0 +1,110 @@
+"""
+Background prefetch of upcoming reading items
+Keeps a short per-user queue of precomputed recommendations so
+/reading/next can skip the recommendation query and hint the client
+about the passage after it
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config.database import SessionLocal
+from app.models.reading import ReadingItem
+from app.services.reading_service import ReadingService
+
+# Items kept ready per user: the one served next plus one to hint
+PREFETCH_DEPTH = 2
+MAX_PREFETCH_USERS = 10000
+
+
+class PrefetchEntry(NamedTuple):
+    difficulty: str
+    item_ids: List[int]
+
+
+_entries: "OrderedDict[int, PrefetchEntry]" = OrderedDict()
+_entries_lock = threading.Lock()
+
+
+class PrefetchService:
+    @staticmethod
+    def get_next_item(
+        db: Session, user_id: int, difficulty: Optional[str] = None
+    ) -> Tuple[Optional[ReadingItem], str, Optional[int]]:
+        """
+        Get the next reading item, preferring a prefetched one
+        Returns (item, difficulty used, id of the item expected after it)
+        """
+        if not difficulty:
+            difficulty = ReadingService.get_recommended_difficulty(db, user_id)
+
+        item_id = hint_id = None
+        with _entries_lock:
+            entry = _entries.get(user_id)
+            if entry and entry.difficulty == difficulty and entry.item_ids:
+                item_id = entry.item_ids.pop(0)
+                hint_id = entry.item_ids[0] if entry.item_ids else None
+                _entries.move_to_end(user_id)
+
+        if item_id is not None:
+            item = ReadingService.get_item_with_questions(db, item_id)
+            if item is not None:
+                return item, difficulty, hint_id
+            PrefetchService.invalidate(user_id)
+
+        item = ReadingService.get_next_reading_item(db, user_id, difficulty)
+        return item, difficulty, None
+
+    @staticmethod
+    def refill(user_id: int, difficulty: str, served_item_id: Optional[int]):
+        """Top up the user's prefetch queue (run as a background task)"""
+        db = SessionLocal()
+        try:
+            with _entries_lock:
+                entry = _entries.get(user_id)
+                queued = list(entry.item_ids) if entry and entry.difficulty == difficulty else []
+
+            exclude = [served_item_id] + queued
+            while len(queued) < PREFETCH_DEPTH:
+                item = ReadingService.get_next_reading_item(db, user_id, difficulty, exclude)
+                if item is None or item.id in exclude:
+                    break
+                queued.append(item.id)
+                exclude.append(item.id)
+
+            with _entries_lock:
+                current = _entries.get(user_id)
+                # An answer may have shifted the difficulty while we were computing
+                if current is not None and current.difficulty != difficulty:
+                    return
+                _entries[user_id] = PrefetchEntry(difficulty, queued)
+                _entries.move_to_end(user_id)
+                while len(_entries) > MAX_PREFETCH_USERS:
+                    _entries.popitem(last=False)
+        except Exception as e:
+            print(f"Error prefetching reading items for user {user_id}: {e}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def on_answer(db: Session, user_id: int):
+        """Drop the user's queue if their answers changed the recommended difficulty"""
+        with _entries_lock:
+            entry = _entries.get(user_id)
+        if entry is None:
+            return
+
+        if ReadingService.get_recommended_difficulty(db, user_id) != entry.difficulty:
+            PrefetchService.invalidate(user_id)
+
+    @staticmethod
+    def invalidate(user_id: Optional[int] = None):
+        """Forget prefetched items for one user, or everyone"""
+        with _entries_lock:
+            if user_id is None:
+                _entries.clear()
+            else:
+                _entries.pop(user_id, None)
@@ -69,11 +69,13 @@ class QuestService:
         user_id: int,
         activity_type: str,
         activity_data: Dict[str, Any] = None,
+        count: int = 1,
     ) -> List[UserQuest]:
         """
         Update quest progress based on user activity
         activity_type: 'reading_complete', 'essay_complete', 'boss_challenge_complete'
         activity_data: additional data like scores, skill categories, etc.
+        count: number of activities to apply at once (e.g. a synced batch)
         """
         updated_quests = []
 
@@ -89,12 +91,12 @@ class QuestService:
             if activity_type == "reading_complete":
                 if "reading_items" in requirements:
                     current = progress.get("reading_items", 0)
-                    progress["reading_items"] = current + 1
+                    progress["reading_items"] = current + count
 
             elif activity_type == "essay_complete":
                 if "essays" in requirements:
                     current = progress.get("essays", 0)
-                    progress["essays"] = current + 1
+                    progress["essays"] = current + count
 
                 # Check minimum score if required
                 if "min_score" in requirements and activity_data:
@@ -106,7 +108,7 @@ class QuestService:
             elif activity_type == "boss_challenge_complete":
                 if "boss_challenges" in requirements:
                     current = progress.get("boss_challenges", 0)
-                    progress["boss_challenges"] = current + 1
+                    progress["boss_challenges"] = current + count
 
             # Update the progress
             user_quest.progress = progress
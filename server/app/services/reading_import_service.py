@@ -0,0 +1,134 @@
+"""
+Reading content import and feature pipeline
+Bulk-imports passage packs, computes readability features for the
+catalog and auto-labels difficulty for unlabelled passages
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.models.reading import ReadingItem, ReadingQuestion
+from app.services.answer_key_cache import AnswerKeyCache
+from app.services.mock_test_service import MockTestService
+from app.services.reading_search_service import ReadingSearchService
+from app.services.text_features import extract_passage_features, label_difficulty
+from app.services.vocabulary_service import VocabularyService
+
+FEATURE_COLUMNS = [
+    "word_count",
+    "sentence_count",
+    "avg_sentence_length",
+    "sentence_length_std",
+    "avg_syllables_per_word",
+    "flesch_reading_ease",
+    "flesch_kincaid_grade",
+    "lexical_density",
+    "rare_word_ratio",
+    "difficulty_score",
+]
+
+FEATURE_BATCH_SIZE = 500
+
+
+class ReadingImportService:
+    @staticmethod
+    def apply_features(item: ReadingItem, features: Dict[str, float]):
+        """Copy computed features onto a reading item"""
+        for column in FEATURE_COLUMNS:
+            setattr(item, column, features[column])
+        item.features_updated_at = datetime.utcnow()
+
+    @staticmethod
+    def import_items(
+        db: Session, payloads: List[Dict[str, Any]], auto_label: bool = True
+    ) -> List[ReadingItem]:
+        """
+        Import a pack of reading items with their questions
+
+        Each payload has title, passage, optional difficulty and skill_tags,
+        and a list of questions. Items without a difficulty are labelled
+        from their readability features when auto_label is set.
+        """
+        features = extract_passage_features([payload["passage"] for payload in payloads])
+
+        items = []
+        for payload, item_features in zip(payloads, features):
+            difficulty = payload.get("difficulty")
+            if not difficulty:
+                if not auto_label:
+                    raise ValueError(f"Missing difficulty for '{payload.get('title')}'")
+                difficulty = label_difficulty(item_features["difficulty_score"])
+
+            item = ReadingItem(
+                title=payload["title"],
+                passage=payload["passage"],
+                difficulty=difficulty,
+                skill_tags=payload.get("skill_tags") or []
+            )
+            ReadingImportService.apply_features(item, item_features)
+            item.questions = [
+                ReadingQuestion(
+                    question=question["question"],
+                    options=question["options"],
+                    correct_answer=question["correct_answer"].upper(),
+                    explanation=question.get("explanation"),
+                    skill_category=question.get("skill_category")
+                )
+                for question in payload.get("questions", [])
+            ]
+            items.append(item)
+
+        db.add_all(items)
+        db.commit()
+
+        ReadingImportService.after_import(db, items)
+        return items
+
+    @staticmethod
+    def after_import(db: Session, items: List[ReadingItem]):
+        """Refresh derived content indexes after new items land"""
+        VocabularyService.index_items(db, items)
+        AnswerKeyCache.invalidate(question.id for item in items for question in item.questions)
+        ReadingSearchService.invalidate()
+        MockTestService.invalidate_bank_index()
+
+    @staticmethod
+    def compute_catalog_features(
+        db: Session, only_missing: bool = False, relabel: bool = False
+    ) -> Dict[str, int]:
+        """
+        Compute readability features for the whole catalog in batches
+
+        relabel overwrites hand-set difficulty labels with computed ones.
+        """
+        query = db.query(ReadingItem.id).order_by(ReadingItem.id)
+        if only_missing:
+            query = query.filter(ReadingItem.features_updated_at.is_(None))
+        item_ids = [row[0] for row in query.all()]
+
+        updated = relabelled = 0
+        for start in range(0, len(item_ids), FEATURE_BATCH_SIZE):
+            batch_ids = item_ids[start:start + FEATURE_BATCH_SIZE]
+            items = (
+                db.query(ReadingItem)
+                .filter(ReadingItem.id.in_(batch_ids))
+                .order_by(ReadingItem.id)
+                .all()
+            )
+            features = extract_passage_features([item.passage for item in items])
+
+            for item, item_features in zip(items, features):
+                ReadingImportService.apply_features(item, item_features)
+                if relabel:
+                    label = label_difficulty(item_features["difficulty_score"])
+                    if label != item.difficulty:
+                        item.difficulty = label
+                        relabelled += 1
+                updated += 1
+
+            db.commit()
+            db.expunge_all()
+
+        return {"updated": updated, "relabelled": relabelled}
@@ -0,0 +1,227 @@
+"""
+Reading catalog search
+Uses Postgres full-text search when available, with an in-process
+inverted index fallback for other databases
+"""
+
+import math
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+from sqlalchemy import func, literal_column, select
+
+from app.models.reading import ReadingItem, ReadingQuestion, READING_SEARCH_DOCUMENT
+from app.services.catalog_cache import CatalogIndexCache
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in",
+    "is", "it", "its", "of", "on", "or", "that", "the", "to", "was", "were", "with",
+}
+
+# BM25 parameters and title boost for the fallback index
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 3
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into search terms, dropping stop words"""
+    return [
+        token.strip("'")
+        for token in TOKEN_PATTERN.findall((text or "").lower())
+        if token.strip("'") and token.strip("'") not in STOP_WORDS
+    ]
+
+
+class InvertedIndex:
+    """In-memory BM25 inverted index over reading item titles and passages"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.doc_lengths: Dict[int, int] = {}
+        self.docs: Dict[int, Dict] = {}
+        self.tag_index: Dict[str, set] = defaultdict(set)
+
+    def add(self, item_id: int, title: str, passage: str, summary: Dict):
+        """Index one reading item; summary is returned verbatim in results"""
+        term_counts: Dict[str, int] = defaultdict(int)
+        for token in tokenize(title):
+            term_counts[token] += TITLE_WEIGHT
+        for token in tokenize(passage):
+            term_counts[token] += 1
+
+        for term, count in term_counts.items():
+            self.postings[term][item_id] = count
+
+        self.doc_lengths[item_id] = sum(term_counts.values())
+        self.docs[item_id] = summary
+        for tag in summary.get("skill_tags") or []:
+            self.tag_index[tag].add(item_id)
+
+    def search(
+        self,
+        query: Optional[str],
+        tags: Optional[List[str]] = None,
+        difficulty: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[Dict]:
+        """Rank documents for a query, restricted to items carrying all tags"""
+        candidates: Optional[set] = None
+        for tag in tags or []:
+            tagged = self.tag_index.get(tag, set())
+            candidates = tagged if candidates is None else candidates & tagged
+
+        terms = tokenize(query) if query else []
+        scores: Dict[int, float] = defaultdict(float)
+
+        if terms:
+            total_docs = len(self.doc_lengths) or 1
+            avg_length = (sum(self.doc_lengths.values()) / total_docs) or 1
+            for term in set(terms):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for item_id, tf in postings.items():
+                    if candidates is not None and item_id not in candidates:
+                        continue
+                    norm = 1 - BM25_B + BM25_B * self.doc_lengths[item_id] / avg_length
+                    scores[item_id] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+            ranked = sorted(scores.items(), key=lambda pair: (-pair[1], pair[0]))
+        else:
+            pool = candidates if candidates is not None else self.docs.keys()
+            ranked = [(item_id, 0.0) for item_id in sorted(pool)]
+
+        if difficulty:
+            ranked = [pair for pair in ranked if self.docs[pair[0]]["difficulty"] == difficulty]
+
+        return [
+            {**self.docs[item_id], "rank": round(score, 4)}
+            for item_id, score in ranked[offset:offset + limit]
+        ]
+
+
+_fallback_index = CatalogIndexCache(lambda db: ReadingSearchService.build_fallback_index(db))
+
+
+class ReadingSearchService:
+    @staticmethod
+    def search(
+        db: Session,
+        query: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        difficulty: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[Dict]:
+        """Search reading items by text and skill tags, best matches first"""
+        if db.bind.dialect.name == "postgresql":
+            return ReadingSearchService._search_postgres(db, query, tags, difficulty, limit, offset)
+
+        index = ReadingSearchService.get_fallback_index(db)
+        return index.search(query, tags, difficulty, limit, offset)
+
+    @staticmethod
+    def _search_postgres(
+        db: Session,
+        query: Optional[str],
+        tags: Optional[List[str]],
+        difficulty: Optional[str],
+        limit: int,
+        offset: int,
+    ) -> List[Dict]:
+        """Ranked tsvector search backed by the GIN indexes on reading_items"""
+        document = literal_column(f"({READING_SEARCH_DOCUMENT})")
+        question_count = (
+            select(func.count(ReadingQuestion.id))
+            .where(ReadingQuestion.reading_item_id == ReadingItem.id)
+            .correlate(ReadingItem)
+            .scalar_subquery()
+        )
+
+        if query:
+            ts_query = func.websearch_to_tsquery(literal_column("'english'"), query)
+            rank = func.ts_rank_cd(document, ts_query)
+        else:
+            ts_query = None
+            rank = literal_column("0.0")
+
+        statement = db.query(
+            ReadingItem.id,
+            ReadingItem.title,
+            ReadingItem.difficulty,
+            ReadingItem.skill_tags,
+            question_count.label("question_count"),
+            rank.label("rank"),
+        )
+
+        if ts_query is not None:
+            statement = statement.filter(document.op("@@")(ts_query))
+        if tags:
+            statement = statement.filter(ReadingItem.skill_tags.contains(tags))
+        if difficulty:
+            statement = statement.filter(ReadingItem.difficulty == difficulty)
+
+        rows = (
+            statement
+            .order_by(rank.desc(), ReadingItem.id)
+            .offset(offset)
+            .limit(limit)
+            .all()
+        )
+
+        return [
+            {
+                "id": row.id,
+                "title": row.title,
+                "difficulty": row.difficulty,
+                "question_count": row.question_count,
+                "skill_tags": row.skill_tags or [],
+                "rank": round(float(row.rank or 0), 4),
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def get_fallback_index(db: Session) -> InvertedIndex:
+        """Get the in-process inverted index, rebuilding it when the catalog has changed"""
+        return _fallback_index.get(db)
+
+    @staticmethod
+    def build_fallback_index(db: Session) -> InvertedIndex:
+        """Build an inverted index over the whole reading catalog"""
+        question_counts = dict(
+            db.query(ReadingQuestion.reading_item_id, func.count(ReadingQuestion.id))
+            .group_by(ReadingQuestion.reading_item_id)
+            .all()
+        )
+
+        index = InvertedIndex()
+        rows = db.query(
+            ReadingItem.id,
+            ReadingItem.title,
+            ReadingItem.passage,
+            ReadingItem.difficulty,
+            ReadingItem.skill_tags,
+        ).yield_per(500)
+
+        for row in rows:
+            index.add(row.id, row.title, row.passage, {
+                "id": row.id,
+                "title": row.title,
+                "difficulty": row.difficulty,
+                "question_count": question_counts.get(row.id, 0),
+                "skill_tags": row.skill_tags or [],
+            })
+
+        return index
+
+    @staticmethod
+    def invalidate():
+        """Drop the fallback index so this process rebuilds it right after content imports"""
+        _fallback_index.invalidate()
@@ -1,10 +1,17 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, Integer
-from typing import Optional, Dict, List, Tuple
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, and_, Integer, insert, text
+from sqlalchemy.dialects import postgresql
+from typing import Optional, Dict, List, Tuple, Any
+from datetime import datetime, timezone
 from app.models.reading import ReadingItem, ReadingQuestion, UserReadingAttempt
 from app.models.user import User
 from app.services.quest_service import QuestService
 from app.services.badge_service import BadgeService
+from app.services.review_service import ReviewService
+from app.services.analytics_service import AnalyticsService
+from app.services.percentile_service import PercentileService
+from app.services.sketch_service import SketchService
+from app.services.answer_key_cache import AnswerKeyCache, AnswerKey
 from app.models.quest import UserBadge
 
 
@@ -41,9 +48,14 @@ class ReadingService:
 
     @staticmethod
     def get_next_reading_item(
-        db: Session, user_id: int, difficulty: Optional[str] = None
+        db: Session,
+        user_id: int,
+        difficulty: Optional[str] = None,
+        exclude_ids: Optional[List[int]] = None
     ) -> Optional[ReadingItem]:
         """Get next reading item for user with adaptive difficulty"""
+        exclude_ids = [item_id for item_id in (exclude_ids or []) if item_id is not None]
+
         if not difficulty:
             difficulty = ReadingService.get_recommended_difficulty(db, user_id)
 
@@ -59,8 +71,10 @@ class ReadingService:
         # Find an item of appropriate difficulty that hasn't been completed
         reading_item = (
             db.query(ReadingItem)
+            .options(selectinload(ReadingItem.questions))
             .filter(
                 ReadingItem.difficulty == difficulty,
+                ReadingItem.id.notin_(exclude_ids),
                 ~ReadingItem.questions.any(
                     ReadingQuestion.id.in_(db.query(completed_item_ids))
                 )
@@ -72,7 +86,9 @@ class ReadingService:
         if not reading_item:
             reading_item = (
                 db.query(ReadingItem)
+                .options(selectinload(ReadingItem.questions))
                 .filter(
+                    ReadingItem.id.notin_(exclude_ids),
                     ~ReadingItem.questions.any(
                         ReadingQuestion.id.in_(db.query(completed_item_ids))
                     )
@@ -82,10 +98,91 @@ class ReadingService:
 
         # If all items completed, return any item
         if not reading_item:
-            reading_item = db.query(ReadingItem).first()
+            reading_item = (
+                db.query(ReadingItem)
+                .options(selectinload(ReadingItem.questions))
+                .first()
+            )
 
         return reading_item
 
+    @staticmethod
+    def get_upcoming_item_ids(db: Session, user_id: int, limit: int = 5) -> List[int]:
+        """Ids of the next unattempted items at the user's recommended difficulty"""
+        difficulty = ReadingService.get_recommended_difficulty(db, user_id)
+
+        attempted_question_ids = (
+            db.query(UserReadingAttempt.question_id)
+            .filter(UserReadingAttempt.user_id == user_id)
+            .distinct()
+        )
+
+        rows = (
+            db.query(ReadingItem.id)
+            .filter(
+                ReadingItem.difficulty == difficulty,
+                ~ReadingItem.questions.any(ReadingQuestion.id.in_(attempted_question_ids))
+            )
+            .order_by(ReadingItem.id)
+            .limit(limit)
+            .all()
+        )
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def get_item_with_questions(db: Session, item_id: int) -> Optional[ReadingItem]:
+        """Get a reading item with its questions loaded in one extra query"""
+        return (
+            db.query(ReadingItem)
+            .options(selectinload(ReadingItem.questions))
+            .filter(ReadingItem.id == item_id)
+            .first()
+        )
+
+    @staticmethod
+    def get_item_summaries(
+        db: Session,
+        difficulty: Optional[str] = None,
+        min_difficulty_score: Optional[float] = None,
+        max_difficulty_score: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Get lightweight reading item summaries with question counts.
+        Runs as a single aggregate query and never loads passage text.
+        """
+        query = (
+            db.query(
+                ReadingItem.id,
+                ReadingItem.title,
+                ReadingItem.difficulty,
+                ReadingItem.skill_tags,
+                ReadingItem.difficulty_score,
+                func.count(ReadingQuestion.id).label("question_count")
+            )
+            .outerjoin(ReadingQuestion, ReadingQuestion.reading_item_id == ReadingItem.id)
+            .group_by(ReadingItem.id)
+            .order_by(ReadingItem.id)
+        )
+
+        if difficulty:
+            query = query.filter(ReadingItem.difficulty == difficulty)
+        if min_difficulty_score is not None:
+            query = query.filter(ReadingItem.difficulty_score >= min_difficulty_score)
+        if max_difficulty_score is not None:
+            query = query.filter(ReadingItem.difficulty_score <= max_difficulty_score)
+
+        return [
+            {
+                "id": row.id,
+                "title": row.title,
+                "difficulty": row.difficulty,
+                "question_count": row.question_count,
+                "skill_tags": row.skill_tags or [],
+                "difficulty_score": row.difficulty_score
+            }
+            for row in query.all()
+        ]
+
     @staticmethod
     def submit_answer(
         db: Session,
@@ -93,13 +190,13 @@ class ReadingService:
         question_id: int,
         user_answer: str,
         time_spent_seconds: Optional[int] = None
-    ) -> Tuple[bool, ReadingQuestion, List[UserBadge]]:
+    ) -> Tuple[bool, AnswerKey, List[UserBadge]]:
         """Submit an answer and return feedback with any newly earned badges"""
-        question = db.query(ReadingQuestion).filter(ReadingQuestion.id == question_id).first()
+        question = AnswerKeyCache.get(db, question_id)
         if not question:
             return None
 
-        is_correct = user_answer.upper() == question.correct_answer.upper()
+        is_correct = user_answer.upper() == question.correct_answer
 
         # Record attempt
         attempt = UserReadingAttempt(
@@ -111,6 +208,9 @@ class ReadingService:
         )
         db.add(attempt)
 
+        # Schedule missed questions for spaced review
+        ReviewService.record_answer(db, user_id, question_id, is_correct, time_spent_seconds)
+
         # Update user stats
         if is_correct:
             user = db.query(User).filter(User.id == user_id).first()
@@ -119,6 +219,21 @@ class ReadingService:
 
         db.commit()
 
+        # Track solve-time and accuracy distributions; buffered locally and merged in batches
+        AnalyticsService.record_reading_time(question_id, question.skill_category, time_spent_seconds)
+        if question.skill_category:
+            correct, total = PercentileService.skill_counts(db, user_id, [question.skill_category])[
+                question.skill_category
+            ]
+            PercentileService.record_reading_accuracy(
+                question.skill_category, (correct - int(is_correct), total - 1), (correct, total)
+            )
+        if SketchService.should_flush():
+            try:
+                SketchService.flush(db)
+            except Exception as e:
+                print(f"Error flushing timing sketches: {e}")
+
         # Update quest progress
         QuestService.update_quest_progress(
             db,
@@ -132,6 +247,163 @@ class ReadingService:
 
         return is_correct, question, newly_earned_badges
 
+    @staticmethod
+    def sync_attempts(
+        db: Session, user_id: int, attempts: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Ingest a batch of offline attempts idempotently
+
+        Attempts are graded from the answer-key cache, de-duplicated by
+        idempotency key (within the batch and against earlier syncs) and
+        written with one bulk insert. Quest progress and badges are
+        evaluated once for the whole batch.
+        """
+        now = datetime.utcnow()
+        results = []
+        rejected = []
+        rows = []
+        seen_keys = set()
+
+        existing_keys = {
+            key
+            for (key,) in db.query(UserReadingAttempt.idempotency_key)
+            .filter(
+                UserReadingAttempt.user_id == user_id,
+                UserReadingAttempt.idempotency_key.in_([a["idempotency_key"] for a in attempts])
+            )
+            .all()
+        }
+
+        def attempt_time(attempt: Dict[str, Any]) -> datetime:
+            # Naive UTC, so offline and server timestamps compare; clients can't place attempts in the future
+            timestamp = attempt.get("client_timestamp") or now
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+            return min(timestamp, now)
+
+        # Questions deleted since their keys were cached are rejected per row, not by the FK
+        live_questions = AnswerKeyCache.existing(db, (attempt["question_id"] for attempt in attempts))
+
+        for attempt in sorted(attempts, key=attempt_time):
+            key = attempt["idempotency_key"]
+            if key in seen_keys or key in existing_keys:
+                results.append({"idempotency_key": key, "status": "duplicate"})
+                seen_keys.add(key)
+                continue
+            seen_keys.add(key)
+
+            answer_key = AnswerKeyCache.get(db, attempt["question_id"])
+            if answer_key is None or answer_key.question_id not in live_questions:
+                rejected.append({"idempotency_key": key, "reason": "Question not found"})
+                continue
+
+            user_answer = attempt["user_answer"].upper()
+            is_correct = user_answer == answer_key.correct_answer
+            rows.append({
+                "user_id": user_id,
+                "question_id": answer_key.question_id,
+                "user_answer": user_answer,
+                "is_correct": is_correct,
+                "time_spent_seconds": attempt.get("time_spent_seconds"),
+                "attempted_at": attempt_time(attempt),
+                "idempotency_key": key,
+                "_answer_key": answer_key
+            })
+
+        inserted_keys = ReadingService._bulk_insert_attempts(db, rows)
+
+        accepted = [row for row in rows if row["idempotency_key"] in inserted_keys]
+        reviewed_questions = set()
+        for row in accepted:
+            answer_key = row["_answer_key"]
+            if answer_key.question_id in reviewed_questions:
+                # Make the schedule created for an earlier attempt visible
+                db.flush()
+            reviewed_questions.add(answer_key.question_id)
+            ReviewService.record_answer(
+                db,
+                user_id,
+                answer_key.question_id,
+                row["is_correct"],
+                row["time_spent_seconds"],
+                answered_at=row["attempted_at"]
+            )
+            AnalyticsService.record_reading_time(
+                answer_key.question_id, answer_key.skill_category, row["time_spent_seconds"]
+            )
+            results.append({
+                "idempotency_key": row["idempotency_key"],
+                "status": "accepted",
+                "question_id": answer_key.question_id,
+                "is_correct": row["is_correct"],
+                "correct_answer": answer_key.correct_answer,
+                "explanation": answer_key.explanation
+            })
+
+        for row in rows:
+            if row["idempotency_key"] not in inserted_keys:
+                # Lost a race with a concurrent sync of the same attempt
+                results.append({"idempotency_key": row["idempotency_key"], "status": "duplicate"})
+
+        correct_count = sum(1 for row in accepted if row["is_correct"])
+        if correct_count:
+            user = db.query(User).filter(User.id == user_id).first()
+            if user:
+                user.reading_items_completed = (user.reading_items_completed or 0) + correct_count
+
+        db.commit()
+
+        newly_earned_badges = []
+        if accepted:
+            skill_counts = PercentileService.skill_counts(
+                db, user_id, [row["_answer_key"].skill_category for row in accepted]
+            )
+            for skill, (correct, total) in skill_counts.items():
+                added = [row for row in accepted if row["_answer_key"].skill_category == skill]
+                before = (correct - sum(1 for row in added if row["is_correct"]), total - len(added))
+                PercentileService.record_reading_accuracy(skill, before, (correct, total))
+            if SketchService.should_flush():
+                try:
+                    SketchService.flush(db)
+                except Exception as e:
+                    print(f"Error flushing timing sketches: {e}")
+
+            QuestService.update_quest_progress(db, user_id, "reading_complete", {}, count=len(accepted))
+            newly_earned_badges = BadgeService.check_and_award_badges(db, user_id)
+
+        return {
+            "accepted": len(accepted),
+            "duplicates": sum(1 for result in results if result["status"] == "duplicate"),
+            "rejected": rejected,
+            "results": results,
+            "stats": ReadingService.get_user_stats(db, user_id),
+            "newly_earned_badges": newly_earned_badges
+        }
+
+    @staticmethod
+    def _bulk_insert_attempts(db: Session, rows: List[Dict[str, Any]]) -> set:
+        """Insert attempts in one statement; returns the idempotency keys written"""
+        if not rows:
+            return set()
+
+        values = [{k: v for k, v in row.items() if not k.startswith("_")} for row in rows]
+
+        if db.bind.dialect.name == "postgresql":
+            statement = (
+                postgresql.insert(UserReadingAttempt)
+                .values(values)
+                .on_conflict_do_nothing(
+                    index_elements=["user_id", "idempotency_key"],
+                    index_where=text("idempotency_key IS NOT NULL")
+                )
+                .returning(UserReadingAttempt.idempotency_key)
+            )
+            return {key for (key,) in db.execute(statement)}
+
+        db.execute(insert(UserReadingAttempt), values)
+        return {row["idempotency_key"] for row in rows}
+
     @staticmethod
     def get_user_stats(db: Session, user_id: int) -> Dict:
         """Get detailed reading statistics for user"""
@@ -191,11 +463,16 @@ class ReadingService:
         recent_difficulty = recent_attempts[0] if recent_attempts else "medium"
         recommended_difficulty = ReadingService.get_recommended_difficulty(db, user_id)
 
+        percentiles = PercentileService.reading_percentiles(
+            db, {skill: (row["correct"], row["total"]) for skill, row in skill_breakdown.items()}
+        )
+
         return {
             "total_attempts": total_attempts,
             "correct_answers": correct_answers,
             "accuracy": round(accuracy, 2),
             "skill_breakdown": skill_breakdown,
+            "percentiles": percentiles,
             "recent_difficulty": recent_difficulty,
             "recommended_difficulty": recommended_difficulty
         }
@@ -203,4 +480,4 @@ class ReadingService:
     @staticmethod
     def get_available_items(db: Session) -> List[ReadingItem]:
         """Get all available reading items"""
-        return db.query(ReadingItem).all()
+        return db.query(ReadingItem).options(selectinload(ReadingItem.questions)).all()
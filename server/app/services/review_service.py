@@ -0,0 +1,136 @@
+"""
+Spaced-repetition review scheduling for missed reading questions
+Implements an SM-2 style scheduler over reading_review_schedule
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.reading import ReadingItem, ReadingQuestion, ReadingReviewSchedule
+
+MIN_EASINESS = 1.3
+DEFAULT_EASINESS = 2.5
+
+# SM-2 quality grades (0-5) derived from a single multiple-choice answer
+QUALITY_CORRECT_FAST = 5
+QUALITY_CORRECT = 4
+QUALITY_INCORRECT = 1
+
+# Correct answers faster than this count as effortless recall
+FAST_ANSWER_SECONDS = 20
+
+# A missed question comes back after this delay, before the SM-2 intervals start
+RELEARN_DELAY = timedelta(minutes=10)
+
+
+class ReviewService:
+    @staticmethod
+    def answer_quality(is_correct: bool, time_spent_seconds: Optional[int] = None) -> int:
+        """Map an answer to an SM-2 quality grade"""
+        if not is_correct:
+            return QUALITY_INCORRECT
+        if time_spent_seconds is not None and time_spent_seconds <= FAST_ANSWER_SECONDS:
+            return QUALITY_CORRECT_FAST
+        return QUALITY_CORRECT
+
+    @staticmethod
+    def apply_sm2(schedule: ReadingReviewSchedule, quality: int, now: datetime):
+        """Update a schedule in place using the SM-2 recurrence"""
+        easiness = schedule.easiness or DEFAULT_EASINESS
+        easiness += 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+        schedule.easiness = max(MIN_EASINESS, easiness)
+
+        if quality < 3:
+            schedule.repetitions = 0
+            schedule.lapses = (schedule.lapses or 0) + 1
+            schedule.interval_days = 0
+            schedule.due_at = now + RELEARN_DELAY
+        else:
+            repetitions = (schedule.repetitions or 0) + 1
+            if repetitions == 1:
+                interval = 1.0
+            elif repetitions == 2:
+                interval = 6.0
+            else:
+                interval = (schedule.interval_days or 6.0) * schedule.easiness
+            schedule.repetitions = repetitions
+            schedule.interval_days = interval
+            schedule.due_at = now + timedelta(days=interval)
+
+        schedule.last_reviewed_at = now
+
+    @staticmethod
+    def record_answer(
+        db: Session,
+        user_id: int,
+        question_id: int,
+        is_correct: bool,
+        time_spent_seconds: Optional[int] = None,
+        answered_at: Optional[datetime] = None
+    ) -> Optional[ReadingReviewSchedule]:
+        """
+        Update the review schedule for an answered question
+        Missed questions enter the queue; questions already in it are rescheduled.
+        Does not commit, so it shares the caller's transaction.
+        """
+        schedule = (
+            db.query(ReadingReviewSchedule)
+            .filter(
+                ReadingReviewSchedule.user_id == user_id,
+                ReadingReviewSchedule.question_id == question_id
+            )
+            .first()
+        )
+
+        if schedule is None:
+            if is_correct:
+                return None
+            schedule = ReadingReviewSchedule(
+                user_id=user_id,
+                question_id=question_id,
+                easiness=DEFAULT_EASINESS,
+                interval_days=0,
+                repetitions=0,
+                lapses=0
+            )
+            db.add(schedule)
+
+        if answered_at is not None and answered_at.tzinfo is None:
+            # Synced attempts carry naive UTC timestamps
+            answered_at = answered_at.replace(tzinfo=timezone.utc)
+        quality = ReviewService.answer_quality(is_correct, time_spent_seconds)
+        ReviewService.apply_sm2(schedule, quality, answered_at or datetime.now(timezone.utc))
+        return schedule
+
+    @staticmethod
+    def get_due_reviews(db: Session, user_id: int, limit: int = 20) -> List[Dict]:
+        """Get questions due for review, oldest due first"""
+        rows = (
+            db.query(ReadingReviewSchedule, ReadingQuestion, ReadingItem.title)
+            .join(ReadingQuestion, ReadingQuestion.id == ReadingReviewSchedule.question_id)
+            .join(ReadingItem, ReadingItem.id == ReadingQuestion.reading_item_id)
+            .filter(
+                ReadingReviewSchedule.user_id == user_id,
+                ReadingReviewSchedule.due_at <= datetime.now(timezone.utc)
+            )
+            .order_by(ReadingReviewSchedule.due_at)
+            .limit(limit)
+            .all()
+        )
+
+        return [
+            {
+                "question_id": question.id,
+                "reading_item_id": question.reading_item_id,
+                "reading_item_title": item_title,
+                "question": question.question,
+                "options": question.options,
+                "skill_category": question.skill_category,
+                "due_at": schedule.due_at,
+                "repetitions": schedule.repetitions,
+                "lapses": schedule.lapses
+            }
+            for schedule, question, item_title in rows
+        ]
@@ -0,0 +1,131 @@
+"""
+Incremental scoring for essay revisions
+A revision is aligned with its parent paragraph by paragraph. Only
+changed or added paragraphs get a (small, cached) language analysis;
+unchanged ones reuse cached analyses or the parent's scores. A single
+whole-essay pass over a paragraph outline then judges task response and
+coherence and writes the feedback, so the full text is never resent
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.config.settings import settings
+from app.services.essay_prescorer import round_band
+from app.services.essay_score_cache import EssayScoreCache
+from app.services.gemini_service import (
+    GeminiService, PARAGRAPH_SCORER_VERSION, REVISION_SCORER_VERSION, SCORER_VERSION
+)
+from app.services.paragraph_diff import ParagraphChange, UNCHANGED, align_paragraphs, changed_share
+from app.services.text_features import split_sentences
+
+# Revisions changing more than this share of words are scored whole
+MAX_CHANGED_SHARE = 0.5
+
+# Essays this short are cheaper to score in one call
+MIN_PARAGRAPHS = 3
+
+LANGUAGE_SCORES = ("lexical_resource_score", "grammatical_range_score")
+
+
+def build_outline(changes: List[ParagraphChange], analyses: Dict[int, Dict[str, Any]]) -> str:
+    """Opening and closing sentences plus the analysis summary for each paragraph"""
+    lines = []
+    for change in changes:
+        sentences = split_sentences(change.text)
+        lines.append(f"Paragraph {change.index + 1} ({change.status}, {len(change.text.split())} words)")
+        if sentences:
+            lines.append(f"  Opens: {sentences[0]}")
+        if len(sentences) > 1:
+            lines.append(f"  Closes: {sentences[-1]}")
+        analysis = analyses.get(change.index)
+        if analysis and analysis.get("summary"):
+            lines.append(f"  Summary: {analysis['summary']}")
+    return "\n".join(lines)
+
+
+class RevisionFeedbackService:
+    @staticmethod
+    def can_reuse(parent_result: Optional[Dict[str, Any]]) -> bool:
+        """Only full scores from a parent are worth building on, not mock or revision ones"""
+        return (
+            bool(settings.gemini_api_key)
+            and parent_result is not None
+            and parent_result.get("scorer") == SCORER_VERSION
+        )
+
+    @staticmethod
+    def score_revision(
+        content: str,
+        prompt_text: str,
+        word_count: int,
+        parent_content: str,
+        parent_result: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Score a revision from its parent's result and the changed paragraphs
+        Returns a result in the GeminiService.score_essay format tagged with
+        REVISION_SCORER_VERSION, or None
+        when the revision should be scored whole (too short, or too much
+        changed). Raises ScoringUnavailableError like score_essay.
+        """
+        if not RevisionFeedbackService.can_reuse(parent_result):
+            return None
+
+        changes = align_paragraphs(parent_content, content)
+        if len(changes) < MIN_PARAGRAPHS or changed_share(changes) > MAX_CHANGED_SHARE:
+            return None
+
+        analyses = RevisionFeedbackService._paragraph_analyses(changes, prompt_text)
+
+        # Paragraphs without an analysis keep the parent's essay-level scores
+        weights = np.array([len(change.text.split()) for change in changes], dtype=np.float64)
+        language = {
+            field: float(round_band(np.average(
+                [float(analyses.get(change.index, parent_result)[field]) for change in changes],
+                weights=weights
+            )))
+            for field in LANGUAGE_SCORES
+        }
+
+        structure = GeminiService.score_revision_structure(
+            prompt_text, build_outline(changes, analyses), parent_result.get("feedback") or {}, word_count
+        )
+        scores = {
+            "task_response_score": float(round_band(float(structure["task_response_score"]))),
+            "coherence_cohesion_score": float(round_band(float(structure["coherence_cohesion_score"]))),
+            **language,
+        }
+        return {
+            **scores,
+            "overall_score": float(round_band(np.mean(list(scores.values())))),
+            "feedback": structure["feedback"],
+            "scorer": REVISION_SCORER_VERSION,
+        }
+
+    @staticmethod
+    def _paragraph_analyses(changes: List[ParagraphChange], prompt_text: str) -> Dict[int, Dict[str, Any]]:
+        """Cached analyses for every paragraph, fetching only changed paragraphs that miss the cache"""
+        analyses: Dict[int, Dict[str, Any]] = {}
+        pending: List[ParagraphChange] = []
+        for change in changes:
+            cached = EssayScoreCache.lookup(change.text, prompt_text, PARAGRAPH_SCORER_VERSION)
+            if cached is not None:
+                analyses[change.index] = cached
+            elif change.status != UNCHANGED:
+                pending.append(change)
+
+        if pending:
+            # Calls still queue on the shared client's concurrency and rate limits
+            with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                results = list(executor.map(
+                    lambda change: GeminiService.analyze_paragraph(change.text, prompt_text), pending
+                ))
+            for change, analysis in zip(pending, results):
+                # Malformed analyses raise here, before they are cached
+                analysis.update({field: float(analysis[field]) for field in LANGUAGE_SCORES})
+                EssayScoreCache.store(change.text, prompt_text, analysis, PARAGRAPH_SCORER_VERSION)
+                analyses[change.index] = analysis
+        return analyses
@@ -0,0 +1,170 @@
+"""
+Scheduling policy for essay scoring jobs
+Jobs get a priority class from the user's active quests (boss challenges
+first, then other quests, then practice, then suspected duplicates) and
+a fair-share rank (how many of the user's jobs were already pending), so
+workers claim in (priority, fair_rank, id) order and serve users round
+robin; jobs waiting longer than PRIORITY_AGING jump the priority classes.
+Submissions are refused with an estimated wait when a user has too much
+pending work or when practice work would wait too long
+"""
+
+import math
+from typing import Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.models.quest import Quest, UserQuest
+from app.models.user import User
+from app.models.writing import EssayScoringJob
+from app.services.essay_scoring_service import JOB_COMPLETED, JOB_QUEUED, JOB_RUNNING
+
+PRIORITY_BOSS = 0
+PRIORITY_QUEST = 1
+PRIORITY_PRACTICE = 2
+PRIORITY_LOW = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_BOSS: "boss",
+    PRIORITY_QUEST: "quest",
+    PRIORITY_PRACTICE: "practice",
+    PRIORITY_LOW: "low",
+}
+
+# Service time assumed until enough jobs have completed to measure it
+DEFAULT_JOB_SECONDS = 10.0
+
+# Completed jobs sampled for the average service time
+SERVICE_TIME_SAMPLE = 50
+
+PENDING_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+
+class ScoringBackpressure(Exception):
+    """Scoring is not accepting this submission now; retry after retry_after seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class UserQuotaExceeded(ScoringBackpressure):
+    """The user already has the maximum number of essays waiting to be scored"""
+
+
+class QueueSaturated(ScoringBackpressure):
+    """The queue is too long to accept more practice essays"""
+
+
+class ScoringScheduler:
+    @staticmethod
+    def classify(db: Session, user_id: int) -> int:
+        """Priority for a new essay, from the active quests it would advance"""
+        rows = (
+            db.query(Quest.quest_type, Quest.requirements, UserQuest.progress)
+            .join(UserQuest, UserQuest.quest_id == Quest.id)
+            .filter(UserQuest.user_id == user_id, UserQuest.status == "active")
+            .all()
+        )
+        priority = PRIORITY_PRACTICE
+        for quest_type, requirements, progress in rows:
+            requirements, progress = requirements or {}, progress or {}
+            needs_essay = (
+                progress.get("essays", 0) < requirements.get("essays", 0)
+                or ("min_score" in requirements and not progress.get("min_score_achieved", False))
+            )
+            if needs_essay:
+                priority = min(priority, PRIORITY_BOSS if quest_type == "boss" else PRIORITY_QUEST)
+        return priority
+
+    @staticmethod
+    def pending_count(db: Session, user_id: int) -> int:
+        """The user's queued and running jobs"""
+        return (
+            db.query(func.count(EssayScoringJob.id))
+            .filter(EssayScoringJob.user_id == user_id, EssayScoringJob.status.in_(PENDING_STATUSES))
+            .scalar() or 0
+        )
+
+    @staticmethod
+    def admit(db: Session, user_id: int, priority: int) -> int:
+        """
+        Check a submission against the quotas and return its fair-share rank
+        Locks the user's row until the submission commits, so concurrent
+        submissions are counted one after another. Raises UserQuotaExceeded
+        or QueueSaturated with an estimated wait.
+        """
+        db.query(User.id).filter(User.id == user_id).with_for_update().first()
+
+        pending = ScoringScheduler.pending_count(db, user_id)
+        if pending >= settings.essay_scoring_user_queue_limit:
+            # The user's oldest pending job has to finish first
+            retry_after = ScoringScheduler.average_job_seconds(db)
+            raise UserQuotaExceeded(
+                f"You already have {pending} essays waiting to be scored", retry_after
+            )
+
+        if priority >= PRIORITY_PRACTICE:
+            wait = ScoringScheduler.estimate_wait(db, priority, pending)
+            if wait > settings.essay_scoring_max_wait_seconds:
+                raise QueueSaturated(
+                    "Essay scoring is busy right now, please try again later",
+                    wait - settings.essay_scoring_max_wait_seconds
+                )
+        return pending
+
+    @staticmethod
+    def estimate_wait(
+        db: Session, priority: int, fair_rank: int, job_id: Optional[int] = None
+    ) -> float:
+        """Seconds until a job at (priority, fair_rank, job_id) finishes, at current throughput"""
+        ahead = [
+            EssayScoringJob.priority < priority,
+            and_(EssayScoringJob.priority == priority, EssayScoringJob.fair_rank < fair_rank),
+        ]
+        if job_id is not None:
+            ahead.append(and_(
+                EssayScoringJob.priority == priority,
+                EssayScoringJob.fair_rank == fair_rank,
+                EssayScoringJob.id < job_id
+            ))
+        else:
+            ahead.append(and_(EssayScoringJob.priority == priority, EssayScoringJob.fair_rank == fair_rank))
+
+        jobs_ahead = (
+            db.query(func.count(EssayScoringJob.id))
+            .filter(EssayScoringJob.status == JOB_QUEUED, or_(*ahead))
+            .scalar() or 0
+        )
+        running = (
+            db.query(func.count(EssayScoringJob.id))
+            .filter(EssayScoringJob.status == JOB_RUNNING)
+            .scalar() or 0
+        )
+        workers = max(1, settings.essay_scoring_workers)
+        # Jobs ahead plus the ones running drain `workers` at a time; then ours runs
+        rounds = math.ceil((jobs_ahead + running) / workers) + 1
+        return round(rounds * ScoringScheduler.average_job_seconds(db), 1)
+
+    @staticmethod
+    def average_job_seconds(db: Session) -> float:
+        """Mean scoring time of recently completed jobs"""
+        rows = (
+            db.query(EssayScoringJob.started_at, EssayScoringJob.completed_at)
+            .filter(
+                EssayScoringJob.status == JOB_COMPLETED,
+                EssayScoringJob.started_at.isnot(None),
+                EssayScoringJob.completed_at.isnot(None)
+            )
+            .order_by(EssayScoringJob.id.desc())
+            .limit(SERVICE_TIME_SAMPLE)
+            .all()
+        )
+        durations = [
+            (completed_at - started_at).total_seconds()
+            for started_at, completed_at in rows
+            if completed_at >= started_at
+        ]
+        return sum(durations) / len(durations) if durations else DEFAULT_JOB_SECONDS
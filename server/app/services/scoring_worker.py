@@ -0,0 +1,105 @@
+"""
+Background worker pool for essay scoring jobs
+Each worker thread owns its own database session and pulls jobs through
+EssayScoringService.claim_next_job, so pools in several API processes
+(or a dedicated worker process) can share one queue
+"""
+
+import threading
+import time
+from typing import List, Optional
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.services.essay_scoring_service import EssayScoringService
+
+# How often a pool looks for jobs stranded in 'running' by a crashed worker
+STALE_SWEEP_INTERVAL_SECONDS = 60
+
+
+class ScoringWorkerPool:
+    def __init__(self, size: int, poll_interval: float):
+        self.size = size
+        self.poll_interval = poll_interval
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._last_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+
+    def start(self):
+        """Recover stranded jobs and start the worker threads"""
+        if self._threads:
+            return
+
+        self._sweep_stale_jobs()
+        self._stopping.clear()
+        for index in range(self.size):
+            thread = threading.Thread(
+                target=self._run, name=f"essay-scoring-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """Ask workers to exit after their current job"""
+        self._stopping.set()
+        EssayScoringService.notify_workers()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _sweep_stale_jobs(self, force: bool = True):
+        """Requeue stranded jobs, at most every STALE_SWEEP_INTERVAL_SECONDS unless forced"""
+        with self._sweep_lock:
+            now = time.monotonic()
+            if not force and now - self._last_sweep < STALE_SWEEP_INTERVAL_SECONDS:
+                return
+            self._last_sweep = now
+
+        db = SessionLocal()
+        try:
+            requeued = EssayScoringService.requeue_stale_jobs(db)
+            if requeued:
+                print(f"Requeued {requeued} stale essay scoring jobs")
+                EssayScoringService.notify_workers()
+        except Exception as e:
+            db.rollback()
+            print(f"Error requeueing stale essay scoring jobs: {e}")
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            # Jobs stranded while this process keeps running are recovered too
+            self._sweep_stale_jobs(force=False)
+            claimed = False
+            db = SessionLocal()
+            try:
+                job = EssayScoringService.claim_next_job(db)
+                if job is not None:
+                    claimed = True
+                    EssayScoringService.run_job(db, job)
+            except Exception as e:
+                db.rollback()
+                print(f"Error in essay scoring worker: {e}")
+            finally:
+                db.close()
+
+            # Drain the queue back to back; only sleep when it is empty
+            if not claimed:
+                EssayScoringService.wait_for_work(self.poll_interval)
+
+
+# Singleton instance
+_scoring_worker_pool: Optional[ScoringWorkerPool] = None
+
+
+def get_scoring_worker_pool() -> ScoringWorkerPool:
+    """Get the process-wide scoring worker pool"""
+    global _scoring_worker_pool
+    if _scoring_worker_pool is None:
+        _scoring_worker_pool = ScoringWorkerPool(
+            settings.essay_scoring_workers,
+            settings.essay_scoring_poll_interval_seconds
+        )
+    return _scoring_worker_pool
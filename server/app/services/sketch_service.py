@@ -0,0 +1,197 @@
+"""
+Persistence for mergeable quantile sketches
+Each worker buffers observations in local sketches and periodically
+merges them into quantile_sketches rows under a row lock. A background
+timer flushes quiet processes, and shutdown flushes what is left.
+
+Rebuilds replace the rows from the source tables, but observations still
+buffered in other processes are merged on top afterwards and counted
+twice; that is at most sketch_flush_interval_seconds of traffic per
+process, so run rebuilds when traffic is low
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.models.analytics import QuantileSketch
+from app.services.sketches import DDSketch
+
+SketchKey = Tuple[str, str, str]  # (metric, scope, scope_key)
+
+_pending: Dict[SketchKey, DDSketch] = {}
+_pending_count = 0
+_last_flush = time.monotonic()
+_pending_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+_flusher_stopping = threading.Event()
+
+
+class SketchService:
+    @staticmethod
+    def record(metric: str, scope: str, scope_key, value: float, weight: int = 1):
+        """Buffer an observation in this worker's local sketch (weight -1 retracts one)"""
+        global _pending_count
+        key = (metric, scope, str(scope_key))
+        with _pending_lock:
+            sketch = _pending.get(key)
+            if sketch is None:
+                sketch = _pending[key] = DDSketch()
+            sketch.add(value, weight)
+            _pending_count += 1
+
+    @staticmethod
+    def should_flush() -> bool:
+        """Whether the local buffer is large or old enough to flush"""
+        with _pending_lock:
+            if not _pending:
+                return False
+            return (
+                _pending_count >= settings.sketch_flush_batch_size
+                or time.monotonic() - _last_flush >= settings.sketch_flush_interval_seconds
+            )
+
+    @staticmethod
+    def flush(db: Session) -> int:
+        """Merge buffered sketches into the database; returns rows touched"""
+        global _pending, _pending_count, _last_flush
+        with _pending_lock:
+            pending, _pending = _pending, {}
+            _pending_count = 0
+            _last_flush = time.monotonic()
+
+        if not pending:
+            return 0
+
+        try:
+            for key, sketch in sorted(pending.items()):
+                SketchService._merge_row(db, key, sketch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put the observations back so they are retried on the next flush
+            with _pending_lock:
+                for key, sketch in pending.items():
+                    if key in _pending:
+                        sketch.merge(_pending[key])
+                    _pending[key] = sketch
+            raise
+
+        return len(pending)
+
+    @staticmethod
+    def flush_now():
+        """Flush the local buffer with a session of its own, logging failures"""
+        db = SessionLocal()
+        try:
+            SketchService.flush(db)
+        except Exception as e:
+            print(f"Error flushing analytics sketches: {e}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def start_background_flush():
+        """Flush every sketch_flush_interval_seconds, so quiet processes don't hold observations"""
+        global _flusher
+        if _flusher is not None:
+            return
+
+        def run():
+            while not _flusher_stopping.wait(settings.sketch_flush_interval_seconds):
+                SketchService.flush_now()
+
+        _flusher_stopping.clear()
+        _flusher = threading.Thread(target=run, name="sketch-flush", daemon=True)
+        _flusher.start()
+
+    @staticmethod
+    def stop_background_flush(timeout: float = 5.0):
+        """Stop the timer and flush what is left (at shutdown)"""
+        global _flusher
+        _flusher_stopping.set()
+        if _flusher is not None:
+            _flusher.join(timeout)
+            _flusher = None
+        SketchService.flush_now()
+
+    @staticmethod
+    def _merge_row(db: Session, key: SketchKey, sketch: DDSketch):
+        """Merge one sketch into its row, creating the row if needed"""
+        metric, scope, scope_key = key
+        row = SketchService._get_row(db, metric, scope, scope_key, for_update=True)
+
+        if row is None:
+            try:
+                with db.begin_nested():
+                    db.add(QuantileSketch(
+                        metric=metric,
+                        scope=scope,
+                        scope_key=scope_key,
+                        sketch=sketch.to_dict(),
+                        count=sketch.count
+                    ))
+                return
+            except IntegrityError:
+                # Another worker created the row first; merge into theirs
+                row = SketchService._get_row(db, metric, scope, scope_key, for_update=True)
+
+        merged = DDSketch.from_dict(row.sketch)
+        merged.merge(sketch)
+        row.sketch = merged.to_dict()
+        row.count = merged.count
+
+    @staticmethod
+    def _get_row(
+        db: Session, metric: str, scope: str, scope_key: str, for_update: bool = False
+    ) -> Optional[QuantileSketch]:
+        query = db.query(QuantileSketch).filter(
+            QuantileSketch.metric == metric,
+            QuantileSketch.scope == scope,
+            QuantileSketch.scope_key == scope_key
+        )
+        if for_update:
+            query = query.with_for_update()
+        return query.first()
+
+    @staticmethod
+    def get_sketch(db: Session, metric: str, scope: str, scope_key) -> DDSketch:
+        """Load the merged sketch for one key (empty if nothing recorded)"""
+        row = SketchService._get_row(db, metric, scope, str(scope_key))
+        return DDSketch.from_dict(row.sketch if row else None)
+
+    @staticmethod
+    def get_sketches(
+        db: Session, metric: str, scope: str, scope_keys: Optional[Iterable] = None
+    ) -> List[Tuple[str, DDSketch]]:
+        """Load all sketches for a metric and scope, or only those for scope_keys"""
+        query = db.query(QuantileSketch.scope_key, QuantileSketch.sketch).filter(
+            QuantileSketch.metric == metric, QuantileSketch.scope == scope
+        )
+        if scope_keys is not None:
+            query = query.filter(QuantileSketch.scope_key.in_([str(key) for key in scope_keys]))
+        rows = query.order_by(QuantileSketch.scope_key).all()
+        return [(scope_key, DDSketch.from_dict(data)) for scope_key, data in rows]
+
+    @staticmethod
+    def replace_all(db: Session, metric: str, sketches: Iterable[Tuple[str, str, DDSketch]]):
+        """Replace every stored sketch for a metric (used by bulk rebuilds)"""
+        db.query(QuantileSketch).filter(QuantileSketch.metric == metric).delete(
+            synchronize_session=False
+        )
+        db.bulk_save_objects([
+            QuantileSketch(
+                metric=metric,
+                scope=scope,
+                scope_key=str(scope_key),
+                sketch=sketch.to_dict(),
+                count=sketch.count
+            )
+            for scope, scope_key, sketch in sketches
+        ])
+        db.commit()
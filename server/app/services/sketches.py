@@ -0,0 +1,163 @@
+"""
+Mergeable streaming quantile sketches
+DDSketch with relative-accuracy guarantees, serializable to JSON so
+sketches built on different workers can be merged in the database
+"""
+
+import math
+from typing import Dict, Optional
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BINS = 2048
+
+# Values at or below this are counted in the zero bucket
+MIN_INDEXABLE_VALUE = 1e-9
+
+
+class DDSketch:
+    """Log-bucketed quantile sketch (Masson et al., VLDB 2019)"""
+
+    def __init__(
+        self,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        max_bins: int = DEFAULT_MAX_BINS,
+    ):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float, weight: int = 1):
+        """
+        Add a non-negative observation
+        A negative weight retracts observations added earlier with the same
+        value (min and max are left as they were).
+        """
+        if value is None or weight == 0:
+            return
+        value = float(value)
+        if value <= MIN_INDEXABLE_VALUE:
+            self.zero_count += weight
+        else:
+            index = self._index(value)
+            count = self.bins.get(index, 0) + weight
+            if count:
+                self.bins[index] = count
+            else:
+                del self.bins[index]
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+
+        self.count += weight
+        self.sum += value * weight
+        if weight > 0:
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "DDSketch"):
+        """Merge another sketch with the same accuracy into this one"""
+        if not other.bins and not other.zero_count:
+            return
+        if not math.isclose(self.gamma, other.gamma):
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+
+        for index, count in other.bins.items():
+            count += self.bins.get(index, 0)
+            if count:
+                self.bins[index] = count
+            else:
+                self.bins.pop(index, None)
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-quantile (0 <= q <= 1)"""
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+
+        return self.max
+
+    def rank(self, value: float) -> Optional[float]:
+        """
+        Estimate the share of observations below value (0 to 1)
+        Values within the relative accuracy of each other count as ties,
+        not as below. Cost is bounded by the number of bins, not the count.
+        """
+        if self.count <= 0:
+            return None
+        value = float(value)
+        if value <= MIN_INDEXABLE_VALUE:
+            return 0.0
+        index = self._index(value)
+        below = self.zero_count + sum(count for bin_index, count in self.bins.items() if bin_index < index)
+        return min(max(below / self.count, 0.0), 1.0)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def _index(self, value: float) -> int:
+        return int(math.ceil(math.log(value) / self._log_gamma))
+
+    def _collapse(self):
+        """Fold the lowest bins together to respect max_bins"""
+        indexes = sorted(self.bins)
+        overflow = len(indexes) - self.max_bins
+        target = indexes[overflow]
+        for index in indexes[:overflow]:
+            self.bins[target] += self.bins.pop(index)
+
+    def to_dict(self) -> Dict:
+        """Serialize for JSON storage"""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": {str(index): count for index, count in self.bins.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "DDSketch":
+        """Restore a sketch produced by to_dict"""
+        if not data:
+            return cls()
+        sketch = cls(data.get("relative_accuracy", DEFAULT_RELATIVE_ACCURACY))
+        sketch.bins = {int(index): count for index, count in data.get("bins", {}).items()}
+        sketch.zero_count = data.get("zero_count", 0)
+        sketch.count = data.get("count", 0)
+        sketch.sum = data.get("sum", 0.0)
+        sketch.min = data.get("min")
+        sketch.max = data.get("max")
+        return sketch
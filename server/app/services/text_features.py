@@ -0,0 +1,181 @@
+"""
+Readability and lexical feature extraction for reading passages
+Tokenization runs once per passage; the metrics themselves are computed
+with vectorized NumPy passes over the whole batch
+"""
+
+import re
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+PARAGRAPH_SPLIT_PATTERN = re.compile(r"\n\s*\n")
+VOWEL_GROUP_PATTERN = re.compile(r"[aeiouy]+")
+
+# Closed-class words; everything else counts as a content word for lexical density
+FUNCTION_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further
+had has have having he her here hers herself him himself his how i if in into is it its itself
+just me might more most must my myself no nor not now of off on once only or other ought our
+ours ourselves out over own same shall she should so some such than that the their theirs them
+themselves then there these they this those through to too under until up upon us very was we
+were what when where which while who whom whose why will with within without would you your
+yours yourself yourselves
+""".split())
+
+# High-frequency general English vocabulary; content words outside this list count as rare
+COMMON_WORDS = FUNCTION_WORDS | frozenset("""
+able across act action add age ago agree air allow almost alone along already also although
+always among amount animal another answer anyone anything appear area arm around art ask away
+baby back bad bag ball bank base be bear beat beautiful become bed begin behind believe best
+better big bird bit black blood blue board boat body book born box boy break bring brother brown
+build building business buy call came car care carry case cat cause center century certain chair
+chance change child children choose church city class clear close cold color come common company
+complete consider continue control cost country couple course cover create cut dark data daughter
+day dead deal death decide deep describe design develop die difference different difficult dinner
+direction discover doctor dog door draw dream drink drive drop dry early earth east easy eat
+economy edge education effect effort eight either else end energy enjoy enough enter entire
+environment even evening event ever every everyone everything exactly example experience explain
+eye face fact fail fall family far farm fast father fear feel feeling field fight figure fill
+film final finally find fine finger finish fire firm first fish five floor fly follow food foot
+force forget form forward four free friend front full fun future game garden general get girl
+give glass go goal good government great green ground group grow growth guess gun hair half hand
+happen happy hard head health hear heart heat heavy help high himself history hit hold home hope
+horse hospital hot hotel hour house however huge human hundred husband idea image imagine
+important include increase indeed industry information inside instead interest international
+issue item job join keep key kid kill kind king kitchen know knowledge land language large last
+late later laugh law lay lead learn least leave left leg less let letter level lie life light
+like likely line list listen little live local long look lose loss lot love low machine main
+major make man manage many market matter may maybe mean measure meet member memory mention message
+method middle mind minute miss modern moment money month morning mother mouth move movie much
+music name nation natural nature near nearly necessary need never new news next nice night nine
+none north note nothing notice number office often oh oil ok old one open opportunity order
+others outside page pain paper parent part particular party pass past pay peace people per perhaps
+period person pick picture piece place plan plant play player point police poor popular position
+possible power practice prepare present president pretty price probably problem process produce
+product program provide public pull purpose push put quality question quickly quite race rain
+raise range rate rather reach read ready real reality really reason receive recent recently
+record red reduce region remain remember remove report rest result return rich right rise road
+rock role room rule run safe same save say scene school science sea season seat second see seek
+seem sell send sense serious serve service set seven several shake share short shot show side
+sign significant similar simple simply since sing single sister sit site situation six size skill
+skin small smile social society soldier someone something sometimes son song soon sort sound
+south space speak special spend sport spring stand standard star start state stay step still
+stop story street strong student study stuff style subject success suddenly suffer suggest summer
+sun support sure surface system table take talk task teach teacher team tell ten tend term test
+thank thing think third thousand three throughout throw thus time today together tonight top
+total toward town trade travel tree trip trouble true truth try turn two type understand unit
+usually value various view visit voice wait walk wall want war watch water way weather week
+weight well west white whole wide wife win wind window wish woman wonder word work worker world
+worry write writer wrong yard yeah year yes yet young
+""".split())
+
+# Difficulty labels from the composite difficulty score (roughly a US grade level),
+# calibrated against the hand-labelled seed catalog
+EASY_MAX_SCORE = 13.5
+MEDIUM_MAX_SCORE = 16.5
+
+# Typical rare-word ratio of catalog passages against COMMON_WORDS
+RARE_WORD_BASELINE = 0.7
+
+
+def count_syllables(word: str) -> int:
+    """Heuristic English syllable count"""
+    word = word.lower()
+    if len(word) <= 3:
+        return 1
+    if word.endswith("ed") and not word.endswith(("ted", "ded")):
+        word = word[:-2]
+    elif word.endswith("es") and not word.endswith(("ses", "zes", "xes", "ces", "ges", "ches", "shes")):
+        word = word[:-2]
+    elif word.endswith("e") and not word.endswith(("le", "ee")):
+        word = word[:-1]
+    return max(1, len(VOWEL_GROUP_PATTERN.findall(word)))
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence for sentence in SENTENCE_SPLIT_PATTERN.split((text or "").strip()) if sentence.strip()]
+
+
+def split_paragraphs(text: str) -> List[str]:
+    paragraphs = [part.strip() for part in PARAGRAPH_SPLIT_PATTERN.split(text or "") if part.strip()]
+    if len(paragraphs) <= 1:
+        # Many learners separate paragraphs with single line breaks
+        paragraphs = [line.strip() for line in (text or "").splitlines() if line.strip()]
+    return paragraphs
+
+
+def extract_passage_features(passages: Sequence[str]) -> List[Dict[str, float]]:
+    """Compute readability and lexical features for a batch of passages"""
+    num_passages = len(passages)
+    word_counts = np.zeros(num_passages)
+    syllable_counts = np.zeros(num_passages)
+    content_counts = np.zeros(num_passages)
+    rare_counts = np.zeros(num_passages)
+    sentence_counts = np.zeros(num_passages)
+    sentence_owner: List[int] = []
+    sentence_lengths: List[int] = []
+
+    # One tokenization pass per passage; everything after is array math
+    for position, passage in enumerate(passages):
+        for sentence in split_sentences(passage):
+            words = [word.lower() for word in WORD_PATTERN.findall(sentence)]
+            if not words:
+                continue
+            sentence_owner.append(position)
+            sentence_lengths.append(len(words))
+            word_counts[position] += len(words)
+            syllable_counts[position] += sum(count_syllables(word) for word in words)
+            content = [word for word in words if word not in FUNCTION_WORDS]
+            content_counts[position] += len(content)
+            rare_counts[position] += sum(
+                1 for word in content if word not in COMMON_WORDS and word.rstrip("s") not in COMMON_WORDS
+            )
+            sentence_counts[position] += 1
+
+    owners = np.array(sentence_owner, dtype=np.int64)
+    lengths = np.array(sentence_lengths, dtype=np.float64)
+    length_sum = np.bincount(owners, weights=lengths, minlength=num_passages)
+    length_sq_sum = np.bincount(owners, weights=lengths * lengths, minlength=num_passages)
+
+    safe_sentences = np.maximum(sentence_counts, 1)
+    safe_words = np.maximum(word_counts, 1)
+    avg_sentence_length = length_sum / safe_sentences
+    sentence_length_std = np.sqrt(np.maximum(length_sq_sum / safe_sentences - avg_sentence_length ** 2, 0))
+    syllables_per_word = syllable_counts / safe_words
+
+    flesch_reading_ease = 206.835 - 1.015 * avg_sentence_length - 84.6 * syllables_per_word
+    flesch_kincaid_grade = 0.39 * avg_sentence_length + 11.8 * syllables_per_word - 15.59
+    lexical_density = content_counts / safe_words
+    rare_word_ratio = rare_counts / np.maximum(content_counts, 1)
+
+    # Grade level nudged by vocabulary rarity: each +0.1 rare-word ratio adds one grade
+    difficulty_score = flesch_kincaid_grade + 10 * (rare_word_ratio - RARE_WORD_BASELINE)
+
+    return [
+        {
+            "word_count": int(word_counts[i]),
+            "sentence_count": int(sentence_counts[i]),
+            "avg_sentence_length": round(float(avg_sentence_length[i]), 2),
+            "sentence_length_std": round(float(sentence_length_std[i]), 2),
+            "avg_syllables_per_word": round(float(syllables_per_word[i]), 3),
+            "flesch_reading_ease": round(float(flesch_reading_ease[i]), 2),
+            "flesch_kincaid_grade": round(float(flesch_kincaid_grade[i]), 2),
+            "lexical_density": round(float(lexical_density[i]), 3),
+            "rare_word_ratio": round(float(rare_word_ratio[i]), 3),
+            "difficulty_score": round(float(difficulty_score[i]), 2),
+        }
+        for i in range(num_passages)
+    ]
+
+
+def label_difficulty(difficulty_score: float) -> str:
+    """Map a composite difficulty score onto the easy/medium/hard labels"""
+    if difficulty_score <= EASY_MAX_SCORE:
+        return "easy"
+    if difficulty_score <= MEDIUM_MAX_SCORE:
+        return "medium"
+    return "hard"
@@ -0,0 +1,173 @@
+"""
+Passage vocabulary index
+Maintains per-passage term counts and catalog-wide term frequencies so
+vocabulary drills never tokenize passages at request time
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.reading import ReadingItem, PassageVocabulary, VocabularyTerm
+from app.services.text_features import COMMON_WORDS, WORD_PATTERN, split_sentences
+
+MIN_TERM_LENGTH = 4
+MAX_TERM_LENGTH = 100
+MAX_EXAMPLE_LENGTH = 300
+REBUILD_BATCH_SIZE = 500
+
+
+def extract_vocabulary(passage: str) -> Dict[str, Tuple[int, str]]:
+    """Map each drill-worthy term to (occurrences, first example sentence)"""
+    counts: Counter = Counter()
+    examples: Dict[str, str] = {}
+
+    for sentence in split_sentences(passage):
+        for word in WORD_PATTERN.findall(sentence):
+            term = word.lower()
+            if (
+                len(term) < MIN_TERM_LENGTH
+                or len(term) > MAX_TERM_LENGTH
+                or term in COMMON_WORDS
+                or term.rstrip("s") in COMMON_WORDS
+            ):
+                continue
+            counts[term] += 1
+            if term not in examples:
+                examples[term] = sentence.strip()[:MAX_EXAMPLE_LENGTH]
+
+    return {term: (count, examples[term]) for term, count in counts.items()}
+
+
+class VocabularyService:
+    @staticmethod
+    def index_items(db: Session, items: Iterable[ReadingItem], commit: bool = True) -> int:
+        """(Re)index the vocabulary of the given reading items"""
+        items = list(items)
+        if not items:
+            return 0
+        item_ids = [item.id for item in items]
+
+        # Remove any previous entries and their contribution to term totals
+        previous = (
+            db.query(PassageVocabulary.term, PassageVocabulary.occurrences)
+            .filter(PassageVocabulary.reading_item_id.in_(item_ids))
+            .all()
+        )
+        deltas: Dict[str, List[int]] = {}
+        for term, occurrences in previous:
+            delta = deltas.setdefault(term, [0, 0])
+            delta[0] -= 1
+            delta[1] -= occurrences
+        db.query(PassageVocabulary).filter(
+            PassageVocabulary.reading_item_id.in_(item_ids)
+        ).delete(synchronize_session=False)
+
+        rows = []
+        for item in items:
+            for term, (occurrences, example) in extract_vocabulary(item.passage).items():
+                rows.append({
+                    "reading_item_id": item.id,
+                    "term": term,
+                    "occurrences": occurrences,
+                    "example_sentence": example
+                })
+                delta = deltas.setdefault(term, [0, 0])
+                delta[0] += 1
+                delta[1] += occurrences
+
+        if rows:
+            db.bulk_insert_mappings(PassageVocabulary, rows)
+        VocabularyService._apply_term_deltas(db, deltas)
+
+        if commit:
+            db.commit()
+        return len(rows)
+
+    @staticmethod
+    def _apply_term_deltas(db: Session, deltas: Dict[str, List[int]]):
+        """Adjust catalog-wide term totals"""
+        terms = list(deltas)
+        existing = {}
+        for start in range(0, len(terms), REBUILD_BATCH_SIZE):
+            chunk = terms[start:start + REBUILD_BATCH_SIZE]
+            existing.update({
+                row.term: row
+                for row in db.query(VocabularyTerm).filter(VocabularyTerm.term.in_(chunk)).all()
+            })
+
+        for term, (document_delta, occurrence_delta) in deltas.items():
+            row = existing.get(term)
+            if row is None:
+                if document_delta <= 0:
+                    continue
+                db.add(VocabularyTerm(
+                    term=term,
+                    document_count=document_delta,
+                    total_occurrences=occurrence_delta
+                ))
+                continue
+            row.document_count += document_delta
+            row.total_occurrences += occurrence_delta
+            if row.document_count <= 0:
+                db.delete(row)
+
+    @staticmethod
+    def rebuild(db: Session) -> Dict[str, int]:
+        """Rebuild the whole vocabulary index from the catalog"""
+        db.query(PassageVocabulary).delete(synchronize_session=False)
+        db.query(VocabularyTerm).delete(synchronize_session=False)
+        db.commit()
+
+        item_ids = [row[0] for row in db.query(ReadingItem.id).order_by(ReadingItem.id).all()]
+        entries = 0
+        for start in range(0, len(item_ids), REBUILD_BATCH_SIZE):
+            batch = (
+                db.query(ReadingItem)
+                .filter(ReadingItem.id.in_(item_ids[start:start + REBUILD_BATCH_SIZE]))
+                .all()
+            )
+            entries += VocabularyService.index_items(db, batch)
+            db.expunge_all()
+
+        terms = db.query(func.count(VocabularyTerm.term)).scalar() or 0
+        return {"passages": len(item_ids), "entries": entries, "terms": terms}
+
+    @staticmethod
+    def get_drill_words(db: Session, item_ids: List[int], limit: int = 20) -> List[Dict]:
+        """
+        Most frequent vocabulary across the given passages
+        Ties go to words that are rarer across the whole catalog.
+        """
+        if not item_ids:
+            return []
+
+        occurrences = func.sum(PassageVocabulary.occurrences).label("occurrences")
+        rows = (
+            db.query(
+                PassageVocabulary.term,
+                occurrences,
+                func.count(PassageVocabulary.reading_item_id).label("passage_count"),
+                func.min(PassageVocabulary.example_sentence).label("example_sentence"),
+                VocabularyTerm.document_count
+            )
+            .join(VocabularyTerm, VocabularyTerm.term == PassageVocabulary.term)
+            .filter(PassageVocabulary.reading_item_id.in_(item_ids))
+            .group_by(PassageVocabulary.term, VocabularyTerm.document_count)
+            .order_by(occurrences.desc(), VocabularyTerm.document_count, PassageVocabulary.term)
+            .limit(limit)
+            .all()
+        )
+
+        return [
+            {
+                "word": row.term,
+                "occurrences": row.occurrences,
+                "passage_count": row.passage_count,
+                "catalog_passage_count": row.document_count,
+                "example_sentence": row.example_sentence
+            }
+            for row in rows
+        ]
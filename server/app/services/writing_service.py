@@ -1,13 +1,24 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from typing import List, Dict, Optional, Tuple
-from app.models.writing import Essay, EssayPrompt
+from sqlalchemy.orm import Session, aliased, undefer_group
+from sqlalchemy import desc, func, select, cast, literal, null, Numeric
+from typing import Any, List, Dict, Optional, Tuple
+from app.models.writing import Essay, EssayPrompt, EssayScoringJob
 from app.models.user import User
-from app.services.gemini_service import GeminiService
-from app.services.quest_service import QuestService
-from app.services.badge_service import BadgeService
-from app.models.quest import UserBadge
-from decimal import Decimal
+from app.services.blob_store import BlobStore, stored_value
+from app.services.essay_duplicate_index import EssayDuplicateIndex
+from app.services.essay_prescorer import EssayPreScorer
+from app.services.essay_scoring_service import EssayScoringService
+from app.services.percentile_service import PercentileService
+from app.services.scoring_scheduler import ScoringScheduler, PRIORITY_LOW
+from app.services.writing_stats_service import WritingStatsService
+
+# Score columns compared between an essay and its parent in revision trees
+REVISION_SCORE_COLUMNS = (
+    "task_response_score",
+    "coherence_cohesion_score",
+    "lexical_resource_score",
+    "grammatical_range_score",
+    "overall_score",
+)
 
 
 class WritingService:
@@ -30,66 +41,88 @@ class WritingService:
         user_id: int,
         prompt_id: int,
         content: str,
-        parent_essay_id: Optional[int] = None
-    ) -> Tuple[Essay, List[UserBadge]]:
-        """Submit an essay and get AI feedback"""
+        parent_essay_id: Optional[int] = None,
+        stream: bool = False
+    ) -> Tuple[Essay, EssayScoringJob]:
+        """
+        Store an essay and queue it for AI scoring
+        With stream set, the job is held back briefly for a streaming
+        feedback request to claim. Raises ScoringBackpressure when the
+        user's quota or the queue is full.
+        """
 
         # Get the prompt
         prompt = WritingService.get_prompt_by_id(db, prompt_id)
         if not prompt:
             raise ValueError("Prompt not found")
 
+        # Refuse before storing anything if scoring is backed up
+        priority = ScoringScheduler.classify(db, user_id)
+        fair_rank = ScoringScheduler.admit(db, user_id, priority)
+
         # Count words
         word_count = len(content.split())
 
-        # Determine submission number
+        # Determine submission number and the chain this revision belongs to
         submission_number = 1
+        root_essay_id = None
         if parent_essay_id:
-            parent_essay = db.query(Essay).filter(Essay.id == parent_essay_id).first()
+            parent_essay = (
+                db.query(Essay.submission_number, Essay.root_essay_id)
+                .filter(Essay.id == parent_essay_id)
+                .first()
+            )
             if parent_essay:
                 submission_number = parent_essay.submission_number + 1
+                root_essay_id = parent_essay.root_essay_id or parent_essay_id
 
-        # Get AI feedback
-        ai_result = GeminiService.score_essay(content, prompt.prompt_text, word_count)
-
-        # Create essay record
+        # Create essay record; scores arrive when the scoring job completes
         essay = Essay(
             user_id=user_id,
             prompt_id=prompt_id,
             content=content,
             word_count=word_count,
-            task_response_score=Decimal(str(ai_result["task_response_score"])),
-            coherence_cohesion_score=Decimal(str(ai_result["coherence_cohesion_score"])),
-            lexical_resource_score=Decimal(str(ai_result["lexical_resource_score"])),
-            grammatical_range_score=Decimal(str(ai_result["grammatical_range_score"])),
-            overall_score=Decimal(str(ai_result["overall_score"])),
-            ai_feedback=ai_result["feedback"],
             submission_number=submission_number,
-            parent_essay_id=parent_essay_id
+            parent_essay_id=parent_essay_id,
+            root_essay_id=root_essay_id
         )
 
         db.add(essay)
+        db.flush()
+
+        # Earlier essays by anyone that this one closely resembles
+        near_duplicates = EssayDuplicateIndex.check_and_index(db, essay)
+
+        # Instant local estimate shown until the AI scores arrive
+        EssayPreScorer.load_model(db)
+        provisional_scores = EssayPreScorer.score(
+            content, prompt.prompt_text, prompt.word_count_min, prompt.word_count_max
+        )
+        job = EssayScoringService.enqueue(
+            db,
+            essay,
+            stream=stream,
+            provisional_scores=provisional_scores,
+            near_duplicates=near_duplicates,
+            # Suspected copies wait behind original work
+            priority=PRIORITY_LOW if near_duplicates else priority,
+            fair_rank=fair_rank
+        )
 
         # Update user stats
         user = db.query(User).filter(User.id == user_id).first()
         if user:
             user.essays_written = (user.essays_written or 0) + 1
+        WritingStatsService.record_essay(db, essay)
 
         db.commit()
         db.refresh(essay)
+        db.refresh(job)
 
-        # Update quest progress
-        QuestService.update_quest_progress(
-            db,
-            user_id,
-            "essay_complete",
-            {"overall_score": float(essay.overall_score)}
-        )
-
-        # Check and award badges
-        newly_earned_badges = BadgeService.check_and_award_badges(db, user_id)
+        if not stream:
+            EssayScoringService.notify_workers()
 
-        return essay, newly_earned_badges
+        return essay, job
 
     @staticmethod
     def get_user_essays(db: Session, user_id: int, limit: int = 10) -> List[Essay]:
@@ -112,113 +145,72 @@ class WritingService:
         )
 
     @staticmethod
-    def get_essay_revisions(db: Session, essay_id: int, user_id: int) -> List[Essay]:
-        """Get all revisions of an essay"""
-        return (
-            db.query(Essay)
-            .filter(Essay.parent_essay_id == essay_id, Essay.user_id == user_id)
-            .order_by(Essay.submission_number)
-            .all()
-        )
+    def get_essay_revisions(
+        db: Session, essay_id: int, user_id: int, with_body: bool = False
+    ) -> List[Essay]:
+        """Get all revisions of an essay; with_body loads content and feedback up front"""
+        query = db.query(Essay).filter(Essay.parent_essay_id == essay_id, Essay.user_id == user_id)
+        if with_body:
+            # Fetch the revisions' blobs in one query rather than one per column per row
+            stored = query.with_entities(stored_value(Essay.content), stored_value(Essay.ai_feedback)).all()
+            BlobStore.prefetch(db, [value for row in stored for value in row])
+            query = query.options(undefer_group("body"))
+        return query.order_by(Essay.submission_number).all()
 
     @staticmethod
     def get_user_stats(db: Session, user_id: int) -> Dict:
-        """Get writing statistics for user"""
-
-        # Total essays
-        total_essays = (
-            db.query(func.count(Essay.id))
-            .filter(Essay.user_id == user_id)
-            .scalar() or 0
-        )
-
-        if total_essays == 0:
-            return {
-                "total_essays": 0,
-                "average_score": 0,
-                "best_score": 0,
-                "total_revisions": 0,
-                "average_word_count": 0,
-                "score_trends": [],
-                "skill_averages": {}
-            }
-
-        # Average score
-        average_score = (
-            db.query(func.avg(Essay.overall_score))
-            .filter(Essay.user_id == user_id)
-            .scalar() or 0
-        )
-
-        # Best score
-        best_score = (
-            db.query(func.max(Essay.overall_score))
-            .filter(Essay.user_id == user_id)
-            .scalar() or 0
-        )
-
-        # Total revisions (essays with submission_number > 1)
-        total_revisions = (
-            db.query(func.count(Essay.id))
-            .filter(Essay.user_id == user_id, Essay.submission_number > 1)
-            .scalar() or 0
-        )
-
-        # Average word count
-        average_word_count = (
-            db.query(func.avg(Essay.word_count))
-            .filter(Essay.user_id == user_id)
-            .scalar() or 0
-        )
+        """Get writing statistics for user, with percentile ranks from the score sketches"""
+        return {
+            **WritingStatsService.get_stats(db, user_id),
+            "percentiles": PercentileService.essay_percentiles(db, user_id)
+        }
 
-        # Score trends (recent 10 essays)
-        recent_essays = (
-            db.query(Essay)
-            .filter(Essay.user_id == user_id)
-            .order_by(desc(Essay.created_at))
-            .limit(10)
-            .all()
+    @staticmethod
+    def get_revision_tree(db: Session, essay_id: int, user_id: int) -> List[Dict[str, Any]]:
+        """
+        Get every essay in the revision chain containing an essay
+        One recursive query walks down from the chain's root (found via
+        root_essay_id) and computes each essay's score change against its
+        parent. Rows come back root first, ordered by depth.
+        """
+        root_id = (
+            select(func.coalesce(Essay.root_essay_id, Essay.id))
+            .where(Essay.id == essay_id, Essay.user_id == user_id)
+            .scalar_subquery()
         )
 
-        score_trends = [
-            {
-                "date": essay.created_at.isoformat(),
-                "overall_score": float(essay.overall_score) if essay.overall_score else 0,
-                "submission_number": essay.submission_number
-            }
-            for essay in reversed(recent_essays)
-        ]
-
-        # Skill averages
-        skill_averages = {
-            "task_response": float(
-                db.query(func.avg(Essay.task_response_score))
-                .filter(Essay.user_id == user_id)
-                .scalar() or 0
-            ),
-            "coherence_cohesion": float(
-                db.query(func.avg(Essay.coherence_cohesion_score))
-                .filter(Essay.user_id == user_id)
-                .scalar() or 0
-            ),
-            "lexical_resource": float(
-                db.query(func.avg(Essay.lexical_resource_score))
-                .filter(Essay.user_id == user_id)
-                .scalar() or 0
-            ),
-            "grammatical_range": float(
-                db.query(func.avg(Essay.grammatical_range_score))
-                .filter(Essay.user_id == user_id)
-                .scalar() or 0
+        anchor = select(
+            Essay.id,
+            Essay.parent_essay_id,
+            Essay.submission_number,
+            Essay.word_count,
+            Essay.created_at,
+            *[getattr(Essay, column) for column in REVISION_SCORE_COLUMNS],
+            literal(0).label("depth"),
+            *[cast(null(), Numeric).label(f"{column}_delta") for column in REVISION_SCORE_COLUMNS]
+        ).where(Essay.id == root_id, Essay.user_id == user_id)
+        tree = anchor.cte("revision_tree", recursive=True)
+
+        child = aliased(Essay)
+        tree = tree.union_all(
+            select(
+                child.id,
+                child.parent_essay_id,
+                child.submission_number,
+                child.word_count,
+                child.created_at,
+                *[getattr(child, column) for column in REVISION_SCORE_COLUMNS],
+                (tree.c.depth + 1).label("depth"),
+                *[
+                    cast(getattr(child, column) - getattr(tree.c, column), Numeric).label(f"{column}_delta")
+                    for column in REVISION_SCORE_COLUMNS
+                ]
+            ).where(
+                child.root_essay_id == root_id,
+                child.parent_essay_id == tree.c.id,
+                child.user_id == user_id
             )
-        }
+        )
 
-        return {
-            "total_essays": total_essays,
-            "average_score": round(float(average_score), 2),
-            "best_score": round(float(best_score), 2),
-            "total_revisions": total_revisions,
-            "average_word_count": int(average_word_count),
-            "score_trends": score_trends,
-            "skill_averages": skill_averages
-        }
+        rows = db.execute(select(tree).order_by(tree.c.depth, tree.c.id)).mappings().all()
+        return [dict(row) for row in rows]
@@ -0,0 +1,260 @@
+"""
+Per-user writing statistics
+Counts, score sums and the recent score trend live in one
+user_writing_stats row per user, adjusted as essays are submitted and
+scored, so reading the stats is a primary-key lookup. Rows are built with
+a single grouped aggregate the first time a user is touched, and rebuilt
+the same way after bulk changes
+"""
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.writing import Essay, UserWritingStats
+
+RECENT_ESSAYS = 10
+
+# Essay score column -> running total column
+SCORE_TOTALS = (
+    ("task_response_score", "task_response_total"),
+    ("coherence_cohesion_score", "coherence_cohesion_total"),
+    ("lexical_resource_score", "lexical_resource_total"),
+    ("grammatical_range_score", "grammatical_range_total"),
+    ("overall_score", "overall_score_total"),
+)
+
+SKILL_TOTALS = (
+    ("task_response", "task_response_total"),
+    ("coherence_cohesion", "coherence_cohesion_total"),
+    ("lexical_resource", "lexical_resource_total"),
+    ("grammatical_range", "grammatical_range_total"),
+)
+
+
+def _trend_entry(essay_id: int, created_at: Optional[datetime], overall_score, submission_number) -> Dict[str, Any]:
+    return {
+        "essay_id": essay_id,
+        "date": (created_at or datetime.now(timezone.utc)).isoformat(),
+        "overall_score": float(overall_score) if overall_score else 0,
+        "submission_number": submission_number,
+    }
+
+
+def score_snapshot(essay: Essay) -> Dict[str, Optional[Decimal]]:
+    """An essay's current scores, taken before they are overwritten"""
+    return {column: getattr(essay, column) for column, _ in SCORE_TOTALS}
+
+
+class WritingStatsService:
+    @staticmethod
+    def aggregate(db: Session, user_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Compute stats row values for several users
+        One grouped aggregate (FILTER clauses restrict the score sums to
+        scored essays) plus one windowed query for the recent essays.
+        """
+        user_ids = list(user_ids)
+        values = {
+            user_id: {
+                "total_essays": 0,
+                "total_revisions": 0,
+                "word_count_total": 0,
+                "word_counted_essays": 0,
+                "scored_essays": 0,
+                "best_overall_score": None,
+                "recent_essays": [],
+                **{total: Decimal(0) for _, total in SCORE_TOTALS},
+            }
+            for user_id in user_ids
+        }
+        if not user_ids:
+            return values
+
+        scored = Essay.overall_score.isnot(None)
+        rows = (
+            db.query(
+                Essay.user_id,
+                func.count(Essay.id),
+                func.count(Essay.id).filter(Essay.submission_number > 1),
+                func.coalesce(func.sum(Essay.word_count), 0),
+                func.count(Essay.word_count),
+                func.count(Essay.id).filter(scored),
+                func.max(Essay.overall_score),
+                *[
+                    func.coalesce(func.sum(getattr(Essay, column)).filter(scored), 0)
+                    for column, _ in SCORE_TOTALS
+                ]
+            )
+            .filter(Essay.user_id.in_(user_ids))
+            .group_by(Essay.user_id)
+            .all()
+        )
+        for user_id, total, revisions, words, word_counted, scored_count, best, *totals in rows:
+            values[user_id].update({
+                "total_essays": total,
+                "total_revisions": revisions,
+                "word_count_total": int(words),
+                "word_counted_essays": word_counted,
+                "scored_essays": scored_count,
+                "best_overall_score": best,
+                **{name: Decimal(str(value)) for (_, name), value in zip(SCORE_TOTALS, totals)},
+            })
+
+        ranked = (
+            db.query(
+                Essay.user_id,
+                Essay.id,
+                Essay.created_at,
+                Essay.overall_score,
+                Essay.submission_number,
+                func.row_number().over(
+                    partition_by=Essay.user_id,
+                    order_by=(Essay.created_at.desc(), Essay.id.desc())
+                ).label("position")
+            )
+            .filter(Essay.user_id.in_(user_ids))
+            .subquery()
+        )
+        recent = (
+            db.query(ranked)
+            .filter(ranked.c.position <= RECENT_ESSAYS)
+            .order_by(ranked.c.user_id, ranked.c.position.desc())
+            .all()
+        )
+        for row in recent:
+            values[row.user_id]["recent_essays"].append(
+                _trend_entry(row.id, row.created_at, row.overall_score, row.submission_number)
+            )
+        return values
+
+    @staticmethod
+    def refresh(db: Session, user_ids: Iterable[int]):
+        """Rebuild stats rows after bulk changes such as re-scoring (does not commit)"""
+        for user_id, values in WritingStatsService.aggregate(db, set(user_ids)).items():
+            db.merge(UserWritingStats(user_id=user_id, **values))
+
+    @staticmethod
+    def record_essay(db: Session, essay: Essay):
+        """Count a newly added essay (does not commit)"""
+        db.flush()
+        row, created = WritingStatsService._get_row(db, essay.user_id)
+        if created:
+            return
+
+        row.total_essays += 1
+        if (essay.submission_number or 1) > 1:
+            row.total_revisions += 1
+        if essay.word_count is not None:
+            row.word_count_total += essay.word_count
+            row.word_counted_essays += 1
+        recent = list(row.recent_essays or [])
+        recent.append(_trend_entry(essay.id, essay.created_at, essay.overall_score, essay.submission_number))
+        row.recent_essays = recent[-RECENT_ESSAYS:]
+
+    @staticmethod
+    def record_scores(db: Session, essay: Essay, previous: Dict[str, Optional[Decimal]]):
+        """Fold new scores into the totals; previous is score_snapshot() from before (does not commit)"""
+        db.flush()
+        row, created = WritingStatsService._get_row(db, essay.user_id)
+        if created:
+            return
+
+        rescored = previous.get("overall_score") is not None
+        if not rescored:
+            row.scored_essays += 1
+        for column, total in SCORE_TOTALS:
+            delta = (getattr(essay, column) or 0) - ((previous.get(column) or 0) if rescored else 0)
+            setattr(row, total, getattr(row, total) + delta)
+
+        new_overall = essay.overall_score
+        if row.best_overall_score is None or new_overall >= row.best_overall_score:
+            row.best_overall_score = new_overall
+        elif rescored and previous["overall_score"] == row.best_overall_score:
+            # The best essay went down; another essay may now be best
+            row.best_overall_score = (
+                db.query(func.max(Essay.overall_score)).filter(Essay.user_id == essay.user_id).scalar()
+            )
+
+        recent = row.recent_essays or []
+        if any(entry["essay_id"] == essay.id for entry in recent):
+            row.recent_essays = [
+                {**entry, "overall_score": float(new_overall)} if entry["essay_id"] == essay.id else entry
+                for entry in recent
+            ]
+
+    @staticmethod
+    def get_stats(db: Session, user_id: int) -> Dict[str, Any]:
+        """Writing statistics in the /writing/stats format"""
+        row = db.query(UserWritingStats).filter(UserWritingStats.user_id == user_id).first()
+        if row is None:
+            row, _ = WritingStatsService._get_row(db, user_id)
+            db.commit()
+
+        if row.total_essays == 0:
+            return {
+                "total_essays": 0,
+                "average_score": 0,
+                "best_score": 0,
+                "total_revisions": 0,
+                "average_word_count": 0,
+                "score_trends": [],
+                "skill_averages": {}
+            }
+
+        scored = row.scored_essays
+
+        def average(total) -> float:
+            return float(total) / scored if scored else 0.0
+
+        return {
+            "total_essays": row.total_essays,
+            "average_score": round(average(row.overall_score_total), 2),
+            "best_score": round(float(row.best_overall_score or 0), 2),
+            "total_revisions": row.total_revisions,
+            "average_word_count": (
+                int(row.word_count_total / row.word_counted_essays) if row.word_counted_essays else 0
+            ),
+            "score_trends": [
+                {key: value for key, value in entry.items() if key != "essay_id"}
+                for entry in (row.recent_essays or [])
+            ],
+            "skill_averages": {name: average(getattr(row, total)) for name, total in SKILL_TOTALS}
+        }
+
+    @staticmethod
+    def _get_row(db: Session, user_id: int) -> Tuple[UserWritingStats, bool]:
+        """
+        Lock a user's stats row, building it from the essays table if missing
+        Returns (row, created); a created row already includes every
+        flushed essay, so callers skip their increment.
+        """
+        row = (
+            db.query(UserWritingStats)
+            .filter(UserWritingStats.user_id == user_id)
+            .with_for_update()
+            .first()
+        )
+        if row is not None:
+            return row, False
+
+        values = WritingStatsService.aggregate(db, [user_id])[user_id]
+        row = UserWritingStats(user_id=user_id, **values)
+        try:
+            with db.begin_nested():
+                db.add(row)
+        except IntegrityError:
+            # Another transaction built the row first; its totals may not
+            # include our uncommitted essay, so fall back to incrementing
+            row = (
+                db.query(UserWritingStats)
+                .filter(UserWritingStats.user_id == user_id)
+                .with_for_update()
+                .one()
+            )
+            return row, False
+        return row, True
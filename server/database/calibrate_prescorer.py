@@ -0,0 +1,31 @@
+"""
+Calibrate the local essay pre-scorer against historical AI scores
+Run with: python -m database.calibrate_prescorer [limit]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.database import SessionLocal
+from app.services.essay_prescorer import EssayPreScorer
+
+
+def calibrate_prescorer(limit: int):
+    db = SessionLocal()
+
+    try:
+        metrics = EssayPreScorer.calibrate(db, limit=limit)
+        print(f"✅ Calibrated pre-scorer on {metrics['sample_size']} essays")
+        print(f"   Holdout MAE ({metrics['holdout_size']} essays), calibrated vs default weights:")
+        for criterion, error in metrics["holdout_mae"].items():
+            print(f"   - {criterion}: {error} (default {metrics['default_holdout_mae'][criterion]})")
+
+    except Exception as e:
+        print(f"❌ Error calibrating pre-scorer: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    calibrate_prescorer(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,35 @@
+"""
+Compute readability features for every reading passage
+Run with: python -m database.compute_reading_features [--missing-only] [--relabel]
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.database import SessionLocal
+from app.services.reading_import_service import ReadingImportService
+
+
+def compute_reading_features(only_missing: bool = False, relabel: bool = False):
+    db = SessionLocal()
+
+    try:
+        result = ReadingImportService.compute_catalog_features(db, only_missing, relabel)
+        print("✅ Reading features computed")
+        print(f"   - {result['updated']} passages updated")
+        print(f"   - {result['relabelled']} difficulty labels changed")
+
+    except Exception as e:
+        print(f"❌ Error computing features: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute reading passage readability features")
+    parser.add_argument("--missing-only", action="store_true", help="Only passages without features")
+    parser.add_argument("--relabel", action="store_true", help="Overwrite difficulty labels from features")
+    args = parser.parse_args()
+    compute_reading_features(args.missing_only, args.relabel)
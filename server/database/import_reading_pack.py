@@ -0,0 +1,45 @@
+"""
+Import a pack of reading passages from a JSON file
+Run with: python -m database.import_reading_pack path/to/pack.json
+
+The file holds a list of items:
+[{"title": ..., "passage": ..., "difficulty": "easy" (optional),
+  "skill_tags": [...], "questions": [{"question": ..., "options": {...},
+  "correct_answer": "B", "explanation": ..., "skill_category": ...}]}]
+Items without a difficulty are auto-labelled from readability features.
+"""
+import sys
+import os
+import json
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.database import SessionLocal
+from app.services.reading_import_service import ReadingImportService
+
+
+def import_reading_pack(path: str, auto_label: bool = True):
+    db = SessionLocal()
+
+    try:
+        with open(path) as f:
+            payloads = json.load(f)
+
+        items = ReadingImportService.import_items(db, payloads, auto_label=auto_label)
+        question_count = sum(len(item.questions) for item in items)
+        print(f"✅ Imported {len(items)} reading passages")
+        print(f"   - {question_count} questions")
+
+    except Exception as e:
+        print(f"❌ Error importing pack: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import reading passages from JSON")
+    parser.add_argument("path", help="JSON file with a list of reading items")
+    parser.add_argument("--no-auto-label", action="store_true", help="Require a difficulty on every item")
+    args = parser.parse_args()
+    import_reading_pack(args.path, auto_label=not args.no_auto_label)
@@ -0,0 +1,14 @@
+-- Migration: Add full-text and skill tag search indexes for reading items
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/002_add_reading_search_indexes.sql
+
+-- Weighted title/passage document used by /reading/search
+-- (must match READING_SEARCH_DOCUMENT in app/models/reading.py)
+CREATE INDEX IF NOT EXISTS idx_reading_items_search ON reading_items USING GIN (
+    (setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+     setweight(to_tsvector('english', coalesce(passage, '')), 'B'))
+);
+
+-- Skill tag containment filters (skill_tags @> ARRAY[...])
+CREATE INDEX IF NOT EXISTS idx_reading_items_skill_tags ON reading_items USING GIN (skill_tags);
+
+COMMIT;
@@ -0,0 +1,21 @@
+-- Migration: Add spaced-repetition review schedule for missed reading questions
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/003_add_reading_review_schedule.sql
+
+CREATE TABLE IF NOT EXISTS reading_review_schedule (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    question_id INTEGER NOT NULL REFERENCES reading_questions(id) ON DELETE CASCADE,
+    easiness DOUBLE PRECISION NOT NULL DEFAULT 2.5,
+    interval_days DOUBLE PRECISION NOT NULL DEFAULT 0,
+    repetitions INTEGER NOT NULL DEFAULT 0,
+    lapses INTEGER NOT NULL DEFAULT 0,
+    due_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    last_reviewed_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_reading_review_user_question UNIQUE (user_id, question_id)
+);
+
+-- Due-queue lookups are a single range scan on (user_id, due_at)
+CREATE INDEX IF NOT EXISTS idx_reading_review_user_due ON reading_review_schedule(user_id, due_at);
+
+COMMIT;
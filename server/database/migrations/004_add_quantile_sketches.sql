@@ -0,0 +1,15 @@
+-- Migration: Add quantile sketch storage for streaming analytics
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/004_add_quantile_sketches.sql
+
+CREATE TABLE IF NOT EXISTS quantile_sketches (
+    id SERIAL PRIMARY KEY,
+    metric VARCHAR(100) NOT NULL,
+    scope VARCHAR(50) NOT NULL,
+    scope_key VARCHAR(255) NOT NULL,
+    sketch JSONB NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_quantile_sketch_key UNIQUE (metric, scope, scope_key)
+);
+
+COMMIT;
@@ -0,0 +1,25 @@
+-- Migration: Add item-analysis statistics for reading questions
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/005_add_reading_question_stats.sql
+
+CREATE TABLE IF NOT EXISTS reading_question_stats (
+    question_id INTEGER PRIMARY KEY REFERENCES reading_questions(id) ON DELETE CASCADE,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    respondents INTEGER NOT NULL DEFAULT 0,
+    p_value DOUBLE PRECISION,
+    point_biserial DOUBLE PRECISION,
+    distractor_rates JSONB DEFAULT '{}',
+    flags JSONB DEFAULT '[]',
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Watermarks for incremental batch jobs
+CREATE TABLE IF NOT EXISTS job_watermarks (
+    job_name VARCHAR(100) PRIMARY KEY,
+    last_id BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Per-question attempt exports
+CREATE INDEX IF NOT EXISTS ix_user_reading_attempts_question_id ON user_reading_attempts(question_id);
+
+COMMIT;
@@ -0,0 +1,19 @@
+-- Migration: Add precomputed readability features to reading items
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/006_add_reading_item_features.sql
+-- Then populate with: python -m database.compute_reading_features
+
+ALTER TABLE reading_items ADD COLUMN IF NOT EXISTS word_count INTEGER;
+ALTER TABLE reading_items ADD COLUMN IF NOT EXISTS sentence_count INTEGER;
+ALTER TABLE reading_items ADD COLUMN IF NOT EXISTS avg_sentence_length DOUBLE PRECISION;
+ALTER TABLE reading_items ADD COLUMN IF NOT EXISTS sentence_length_std DOUBLE PRECISION;
+ALTER TABLE reading_items ADD COLUMN IF NOT EXISTS avg_syllables_per_word DOUBLE PRECISION;
+ALTER TABLE reading_items ADD COLUMN IF NOT EXISTS flesch_reading_ease DOUBLE PRECISION;
+ALTER TABLE reading_items ADD COLUMN IF NOT EXISTS flesch_kincaid_grade DOUBLE PRECISION;
+ALTER TABLE reading_items ADD COLUMN IF NOT EXISTS lexical_density DOUBLE PRECISION;
+ALTER TABLE reading_items ADD COLUMN IF NOT EXISTS rare_word_ratio DOUBLE PRECISION;
+ALTER TABLE reading_items ADD COLUMN IF NOT EXISTS difficulty_score DOUBLE PRECISION;
+ALTER TABLE reading_items ADD COLUMN IF NOT EXISTS features_updated_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS ix_reading_items_difficulty_score ON reading_items(difficulty_score);
+
+COMMIT;
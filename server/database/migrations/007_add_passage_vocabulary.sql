@@ -0,0 +1,21 @@
+-- Migration: Add passage vocabulary index for vocabulary drills
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/007_add_passage_vocabulary.sql
+-- Then populate with: python -m database.rebuild_vocabulary_index
+
+CREATE TABLE IF NOT EXISTS passage_vocabulary (
+    reading_item_id INTEGER NOT NULL REFERENCES reading_items(id) ON DELETE CASCADE,
+    term VARCHAR(100) NOT NULL,
+    occurrences INTEGER NOT NULL DEFAULT 0,
+    example_sentence TEXT,
+    PRIMARY KEY (reading_item_id, term)
+);
+
+CREATE INDEX IF NOT EXISTS ix_passage_vocabulary_term ON passage_vocabulary(term);
+
+CREATE TABLE IF NOT EXISTS vocabulary_terms (
+    term VARCHAR(100) PRIMARY KEY,
+    document_count INTEGER NOT NULL DEFAULT 0,
+    total_occurrences INTEGER NOT NULL DEFAULT 0
+);
+
+COMMIT;
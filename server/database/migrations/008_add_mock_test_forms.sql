@@ -0,0 +1,17 @@
+-- Migration: Add frozen mock test forms
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/008_add_mock_test_forms.sql
+
+CREATE TABLE IF NOT EXISTS mock_test_forms (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    exam_type VARCHAR(50) NOT NULL,
+    constraints JSONB NOT NULL,
+    reading_item_ids JSONB NOT NULL,
+    question_ids JSONB NOT NULL,
+    time_limit_minutes INTEGER NOT NULL,
+    estimated_minutes DOUBLE PRECISION,
+    created_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMIT;
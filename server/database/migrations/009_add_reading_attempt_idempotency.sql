@@ -0,0 +1,10 @@
+-- Migration: Add idempotency keys for offline reading attempt sync
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/009_add_reading_attempt_idempotency.sql
+
+ALTER TABLE user_reading_attempts ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_reading_attempts_user_idempotency
+    ON user_reading_attempts(user_id, idempotency_key)
+    WHERE idempotency_key IS NOT NULL;
+
+COMMIT;
@@ -0,0 +1,22 @@
+-- Migration: Add asynchronous essay scoring jobs
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/010_add_essay_scoring_jobs.sql
+
+CREATE TABLE IF NOT EXISTS essay_scoring_jobs (
+    id SERIAL PRIMARY KEY,
+    essay_id INTEGER NOT NULL REFERENCES essays(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    result JSONB,
+    available_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    completed_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS ix_essay_scoring_jobs_essay_id ON essay_scoring_jobs(essay_id);
+CREATE INDEX IF NOT EXISTS ix_essay_scoring_jobs_user_id ON essay_scoring_jobs(user_id);
+CREATE INDEX IF NOT EXISTS idx_essay_scoring_jobs_claim ON essay_scoring_jobs(status, available_at);
+
+COMMIT;
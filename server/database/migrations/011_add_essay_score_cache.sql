@@ -0,0 +1,14 @@
+-- Migration: Add shared essay score cache
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/011_add_essay_score_cache.sql
+
+CREATE TABLE IF NOT EXISTS essay_score_cache (
+    cache_key VARCHAR(64) PRIMARY KEY,
+    scorer_version VARCHAR(100) NOT NULL,
+    result JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_essay_score_cache_expires_at ON essay_score_cache(expires_at);
+
+COMMIT;
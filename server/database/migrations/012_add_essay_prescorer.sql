@@ -0,0 +1,15 @@
+-- Migration: Add the local essay pre-scorer model and provisional scores
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/012_add_essay_prescorer.sql
+
+ALTER TABLE essays ADD COLUMN IF NOT EXISTS scorer VARCHAR(100);
+ALTER TABLE essay_scoring_jobs ADD COLUMN IF NOT EXISTS provisional_scores JSONB;
+
+CREATE TABLE IF NOT EXISTS essay_scorer_models (
+    name VARCHAR(50) PRIMARY KEY,
+    model JSONB NOT NULL,
+    metrics JSONB,
+    sample_size INTEGER,
+    trained_at TIMESTAMP WITH TIME ZONE
+);
+
+COMMIT;
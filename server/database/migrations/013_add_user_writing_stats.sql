@@ -0,0 +1,22 @@
+-- Migration: Add incrementally maintained per-user writing statistics
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/013_add_user_writing_stats.sql
+-- Rows are built from the essays table the first time each user is read or writes
+
+CREATE TABLE IF NOT EXISTS user_writing_stats (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    total_essays INTEGER NOT NULL DEFAULT 0,
+    total_revisions INTEGER NOT NULL DEFAULT 0,
+    word_count_total BIGINT NOT NULL DEFAULT 0,
+    word_counted_essays INTEGER NOT NULL DEFAULT 0,
+    scored_essays INTEGER NOT NULL DEFAULT 0,
+    overall_score_total DECIMAL(12, 1) NOT NULL DEFAULT 0,
+    best_overall_score DECIMAL(3, 1),
+    task_response_total DECIMAL(12, 1) NOT NULL DEFAULT 0,
+    coherence_cohesion_total DECIMAL(12, 1) NOT NULL DEFAULT 0,
+    lexical_resource_total DECIMAL(12, 1) NOT NULL DEFAULT 0,
+    grammatical_range_total DECIMAL(12, 1) NOT NULL DEFAULT 0,
+    recent_essays JSONB,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMIT;
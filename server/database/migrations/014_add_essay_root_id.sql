@@ -0,0 +1,22 @@
+-- Migration: Store each revision's chain root so revision trees load with one indexed query
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/014_add_essay_root_id.sql
+
+ALTER TABLE essays ADD COLUMN IF NOT EXISTS root_essay_id INTEGER REFERENCES essays(id);
+CREATE INDEX IF NOT EXISTS ix_essays_root_essay_id ON essays(root_essay_id);
+
+-- Backfill existing revisions; original essays keep a NULL root
+WITH RECURSIVE chain AS (
+    SELECT id, id AS root_id FROM essays WHERE parent_essay_id IS NULL
+    UNION ALL
+    SELECT e.id, chain.root_id
+    FROM essays e
+    JOIN chain ON e.parent_essay_id = chain.id
+)
+UPDATE essays
+SET root_essay_id = chain.root_id
+FROM chain
+WHERE essays.id = chain.id
+  AND chain.root_id <> essays.id
+  AND essays.root_essay_id IS NULL;
+
+COMMIT;
@@ -0,0 +1,24 @@
+-- Migration: Add the MinHash/LSH near-duplicate index for essays
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/015_add_essay_duplicate_index.sql
+-- Then index existing essays with: python -m database.rebuild_duplicate_index
+
+ALTER TABLE essays ADD COLUMN IF NOT EXISTS duplicate_of_essay_id INTEGER REFERENCES essays(id) ON DELETE SET NULL;
+ALTER TABLE essays ADD COLUMN IF NOT EXISTS duplicate_similarity DOUBLE PRECISION;
+ALTER TABLE essay_scoring_jobs ADD COLUMN IF NOT EXISTS near_duplicates JSONB;
+
+CREATE TABLE IF NOT EXISTS essay_minhashes (
+    essay_id INTEGER PRIMARY KEY REFERENCES essays(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    signature BYTEA NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS essay_lsh_buckets (
+    bucket BIGINT NOT NULL,
+    essay_id INTEGER NOT NULL REFERENCES essays(id) ON DELETE CASCADE,
+    PRIMARY KEY (bucket, essay_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_essay_lsh_buckets_essay_id ON essay_lsh_buckets(essay_id);
+
+COMMIT;
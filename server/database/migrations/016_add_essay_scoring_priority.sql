@@ -0,0 +1,10 @@
+-- Migration: Add priority classes and fair-share ranks to essay scoring jobs
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/016_add_essay_scoring_priority.sql
+
+ALTER TABLE essay_scoring_jobs ADD COLUMN IF NOT EXISTS priority INTEGER NOT NULL DEFAULT 2;
+ALTER TABLE essay_scoring_jobs ADD COLUMN IF NOT EXISTS fair_rank INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_essay_scoring_jobs_schedule ON essay_scoring_jobs(status, priority, fair_rank, id);
+CREATE INDEX IF NOT EXISTS idx_essay_scoring_jobs_user_status ON essay_scoring_jobs(user_id, status);
+
+COMMIT;
@@ -0,0 +1,11 @@
+-- Migration: Store essay bodies and feedback blobs in Postgres
+-- Run with: psql -d web3_edu_platform -f server/database/migrations/017_add_essay_blobs.sql
+-- Then move inline essays with: python -m database.move_essays_to_blob_store
+
+CREATE TABLE IF NOT EXISTS essay_blobs (
+    key VARCHAR(64) PRIMARY KEY,
+    data BYTEA NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMIT;
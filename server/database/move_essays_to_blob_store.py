@@ -0,0 +1,72 @@
+"""
+Move essay bodies and feedback stored inline into the blob store
+Rows written before the blob store keep their text in the essays table
+(and still load); this rewrites them as blob references. Refuses to run
+unless the blob store is durable (see BlobStore.check_durable). Safe to re-run.
+Run with: python -m database.move_essays_to_blob_store
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.database import SessionLocal
+from app.models.writing import Essay
+from app.services.blob_store import BlobStore, is_blob_ref, stored_value
+
+BATCH_SIZE = 500
+
+
+def move_essays_to_blob_store():
+    # The inline copies are the only ones; keep them unless blobs will last
+    try:
+        BlobStore.check_durable()
+    except RuntimeError as e:
+        print(f"❌ Not moving essays: {e}")
+        return
+
+    db = SessionLocal()
+
+    try:
+        last_id, scanned, moved = 0, 0, 0
+        while True:
+            # What is stored, not the loaded blob
+            rows = (
+                db.query(Essay.id, stored_value(Essay.content), stored_value(Essay.ai_feedback))
+                .filter(Essay.id > last_id)
+                .order_by(Essay.id)
+                .limit(BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+
+            updates = []
+            for essay_id, content, feedback in rows:
+                update = {}
+                if content is not None and not is_blob_ref(content):
+                    update["content"] = content
+                if feedback is not None and not is_blob_ref(feedback):
+                    update["ai_feedback"] = feedback
+                if update:
+                    updates.append({"id": essay_id, **update})
+            if updates:
+                db.bulk_update_mappings(Essay, updates)
+            db.commit()
+
+            scanned += len(rows)
+            moved += len(updates)
+            last_id = rows[-1][0]
+
+        print("✅ Moved inline essays to the blob store")
+        print(f"   - {scanned} essays scanned")
+        print(f"   - {moved} essays moved")
+
+    except Exception as e:
+        print(f"❌ Error moving essays to the blob store: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    move_essays_to_blob_store()
@@ -0,0 +1,30 @@
+"""
+Rebuild the essay near-duplicate index from all stored essays
+Run with: python -m database.rebuild_duplicate_index
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.database import SessionLocal
+from app.services.essay_duplicate_index import EssayDuplicateIndex
+
+
+def rebuild_duplicate_index():
+    db = SessionLocal()
+
+    try:
+        result = EssayDuplicateIndex.rebuild(db)
+        print("✅ Rebuilt essay near-duplicate index")
+        print(f"   - {result['essays']} essays")
+        print(f"   - {result['buckets']} LSH bucket entries")
+
+    except Exception as e:
+        print(f"❌ Error rebuilding near-duplicate index: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild_duplicate_index()
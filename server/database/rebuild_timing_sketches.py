@@ -0,0 +1,31 @@
+"""
+Rebuild reading solve-time sketches from user_reading_attempts
+Run with: python -m database.rebuild_timing_sketches
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.database import SessionLocal
+from app.services.analytics_service import AnalyticsService
+
+
+def rebuild_timing_sketches():
+    db = SessionLocal()
+
+    try:
+        result = AnalyticsService.rebuild_reading_timing(db)
+        print("✅ Rebuilt reading timing sketches")
+        print(f"   - {result['attempts']} timed attempts")
+        print(f"   - {result['questions']} question sketches")
+        print(f"   - {result['skills']} skill sketches")
+
+    except Exception as e:
+        print(f"❌ Error rebuilding sketches: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild_timing_sketches()
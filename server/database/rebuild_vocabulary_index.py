@@ -0,0 +1,31 @@
+"""
+Rebuild the passage vocabulary index from all reading items
+Run with: python -m database.rebuild_vocabulary_index
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.database import SessionLocal
+from app.services.vocabulary_service import VocabularyService
+
+
+def rebuild_vocabulary_index():
+    db = SessionLocal()
+
+    try:
+        result = VocabularyService.rebuild(db)
+        print("✅ Rebuilt vocabulary index")
+        print(f"   - {result['passages']} passages")
+        print(f"   - {result['entries']} passage/term entries")
+        print(f"   - {result['terms']} distinct terms")
+
+    except Exception as e:
+        print(f"❌ Error rebuilding vocabulary index: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild_vocabulary_index()
@@ -0,0 +1,79 @@
+"""
+Re-score stored essays with the current scorer, resuming from the last checkpoint
+Run with: python -m database.rescore_essays [--dry-run] [--limit N] [--all] [--restart]
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.database import SessionLocal
+from app.services.essay_rescoring_service import EssayRescoringService, JOB_NAME, DEFAULT_BATCH_SIZE
+from app.services.gemini_service import SCORER_VERSION
+
+
+def print_progress(progress):
+    print(
+        f"   ... {progress['scanned']} scanned, {progress['rescored']} rescored, "
+        f"{progress['failed']} failed (last id {progress['last_id']}, checkpoint {progress['checkpoint']})"
+    )
+
+
+def print_comparison(comparison):
+    if not comparison["compared"]:
+        print("   No previously scored essays to compare")
+        return
+    print(f"   Overall score, {comparison['compared']} essays (old -> new):")
+    for stat in ("mean", "p10", "p50", "p90"):
+        print(f"   - {stat}: {comparison['old'][stat]} -> {comparison['new'][stat]}")
+    print(f"   - mean shift: {comparison['mean_shift']}, mean absolute diff: {comparison['mean_abs_diff']}")
+    for threshold, share in comparison["changed_share"].items():
+        print(f"   - changed by >= {threshold} band: {share:.1%}")
+
+
+def rescore_essays(args):
+    db = SessionLocal()
+
+    try:
+        print(f"Re-scoring essays with {SCORER_VERSION}{' (dry run)' if args.dry_run else ''}")
+        result = EssayRescoringService.run(
+            db,
+            job_name=args.job_name,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            dry_run=args.dry_run,
+            limit=args.limit,
+            only_stale=not args.all,
+            restart=args.restart,
+            progress=print_progress
+        )
+
+        status = "❌ Re-scoring stopped" if result["aborted"] else "✅ Re-scoring complete"
+        print(f"{status}: {result['rescored']} rescored, {result['failed']} failed of {result['scanned']} scanned")
+        if result["aborted"]:
+            print(f"   Scorer unavailable: {result['aborted']}")
+            print("   Run the same command again to resume from the checkpoint")
+        if result["errors"]:
+            for essay_id, error in list(result["errors"].items())[:10]:
+                print(f"   - essay {essay_id}: {error}")
+        if not args.dry_run:
+            print(f"   - checkpoint at essay id {result['checkpoint']}")
+        print_comparison(result["comparison"])
+
+    except Exception as e:
+        print(f"❌ Error re-scoring essays: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score stored essays with the current scorer")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Essays per batch and per write")
+    parser.add_argument("--concurrency", type=int, default=None, help="Concurrent scoring calls (default: GEMINI_MAX_CONCURRENCY)")
+    parser.add_argument("--dry-run", action="store_true", help="Score and compare distributions without writing")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many essays")
+    parser.add_argument("--all", action="store_true", help="Include essays already scored by the current scorer")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first essay")
+    parser.add_argument("--job-name", default=JOB_NAME, help="Checkpoint name, to run independent passes")
+    rescore_essays(parser.parse_args())
@@ -0,0 +1,35 @@
+"""
+Nightly classical item analysis for reading questions
+Run with: python -m database.run_item_analysis [--full]
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.database import SessionLocal
+from app.services.item_analysis_service import ItemAnalysisService
+
+
+def run_item_analysis(full: bool = False):
+    db = SessionLocal()
+
+    try:
+        result = ItemAnalysisService.run(db, full=full)
+        print("✅ Item analysis complete")
+        print(f"   - {result['questions']} questions refreshed")
+        print(f"   - {result['attempts']} attempts analysed")
+        print(f"   - watermark at attempt id {result['watermark']}")
+
+    except Exception as e:
+        print(f"❌ Error running item analysis: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh reading question statistics")
+    parser.add_argument("--full", action="store_true", help="Recompute every question, ignoring the watermark")
+    args = parser.parse_args()
+    run_item_analysis(full=args.full)
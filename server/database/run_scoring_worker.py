@@ -0,0 +1,30 @@
+"""
+Run essay scoring workers as a standalone process
+Use with ESSAY_SCORING_WORKERS=0 on the API to keep LLM calls off web hosts
+Run with: python -m database.run_scoring_worker [workers]
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.settings import settings
+from app.services.scoring_worker import ScoringWorkerPool
+
+
+def run_scoring_worker(workers: int):
+    pool = ScoringWorkerPool(workers, settings.essay_scoring_poll_interval_seconds)
+    pool.start()
+    print(f"✅ Started {workers} essay scoring workers (Ctrl+C to stop)")
+
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print("Stopping essay scoring workers...")
+    finally:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    run_scoring_worker(int(sys.argv[1]) if len(sys.argv) > 1 else max(settings.essay_scoring_workers, 1))
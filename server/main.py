@@ -1,7 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config.database import engine, Base
-from app.api.routes import auth, reading, writing, quests, dashboard, settings, staking
+from app.api.routes import auth, reading, writing, quests, dashboard, settings, staking, analytics
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -31,6 +31,80 @@ app.include_router(quests.router, prefix="/api")
 app.include_router(dashboard.router, prefix="/api")
 app.include_router(settings.router, prefix="/api")
 app.include_router(staking.router, prefix="/api")
+app.include_router(analytics.router, prefix="/api")
+
+
+@app.on_event("startup")
+def check_blob_store():
+    """Refuse to start when stored essay bodies would not survive a redeploy"""
+    from app.services.blob_store import BlobStore
+
+    BlobStore.check_durable()
+
+
+@app.on_event("startup")
+def check_gemini_schemas():
+    """Refuse to start when the installed Gemini SDK would reject our response schemas"""
+    from app.services.gemini_service import GeminiService
+
+    if GeminiService.structured_output_enabled():
+        GeminiService.check_response_schemas()
+
+
+@app.on_event("startup")
+def warm_caches():
+    """Preload immutable content caches before serving traffic"""
+    from app.config.database import SessionLocal
+    from app.services.answer_key_cache import AnswerKeyCache
+    from app.services.essay_prescorer import EssayPreScorer
+
+    db = SessionLocal()
+    try:
+        count = AnswerKeyCache.warm(db)
+        print(f"Warmed answer-key cache with {count} questions")
+    except Exception as e:
+        print(f"Error warming answer-key cache: {e}")
+    try:
+        EssayPreScorer.load_model(db)
+    except Exception as e:
+        db.rollback()
+        print(f"Error loading essay pre-scorer model: {e}")
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def start_scoring_workers():
+    """Start the in-process essay scoring worker pool"""
+    from app.config.settings import settings as app_settings
+    from app.services.scoring_worker import get_scoring_worker_pool
+
+    if app_settings.essay_scoring_workers > 0:
+        get_scoring_worker_pool().start()
+
+
+@app.on_event("shutdown")
+def stop_scoring_workers():
+    """Let scoring workers finish their current job before exit"""
+    from app.services.scoring_worker import get_scoring_worker_pool
+
+    get_scoring_worker_pool().stop()
+
+
+@app.on_event("startup")
+def start_sketch_flush():
+    """Flush buffered analytics observations on a timer"""
+    from app.services.sketch_service import SketchService
+
+    SketchService.start_background_flush()
+
+
+@app.on_event("shutdown")
+def flush_sketches():
+    """Flush buffered analytics observations before exit (after workers stop adding to them)"""
+    from app.services.sketch_service import SketchService
+
+    SketchService.stop_background_flush()
 
 
 @app.get("/")